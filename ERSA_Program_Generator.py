@@ -1,16 +1,2776 @@
 # Create the final, clean, and complete Python script with all features
 
 
+import time
+_STARTUP_T0 = time.perf_counter()
+
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox, scrolledtext
-import pandas as pd
-import xml.etree.ElementTree as ET
+from tkinter import ttk, filedialog, messagebox, scrolledtext, simpledialog
 from datetime import datetime
+import argparse
+import importlib.util
 import os
+import sys
 import json
 import threading
 import traceback
 import getpass
+import hashlib
+import copy
+import queue
+import sqlite3
+import re
+import gzip
+import bisect
+import csv
+import shutil
+from xml.sax.saxutils import escape as xml_escape
+
+# ==================== LAZY IMPORTS ====================
+# pandas/numpy/openpyxl dominate launch time on the shop-floor PCs, so they are
+# only imported on first use (Excel load / generation) or warmed in the
+# background once the window is visible.
+STARTUP_BUDGET_MS = 1500
+
+class _LazyModule:
+    """Module proxy that imports the real module on first attribute access"""
+    _lock = threading.Lock()
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _resolve(self):
+        if self._module is None:
+            with _LazyModule._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._resolve(), attr)
+
+pd = _LazyModule("pandas")
+np = _LazyModule("numpy")
+ET = _LazyModule("xml.etree.ElementTree")
+
+def warm_heavy_imports():
+    """Import the heavy modules ahead of first use (run in a background thread)"""
+    for module in (np, pd, ET, _LazyModule("openpyxl")):
+        try:
+            module._resolve()
+        except ImportError:
+            pass
+
+# ==================== ZONE LAYOUT ====================
+# Zone blocks shown in the heating/cooling tabs: (prefix, number of zones)
+ZONE_LAYOUT = [
+    ("Heating_Top", 10),
+    ("Heating_Bottom", 10),
+    ("Cooling_Top", 3),
+    ("Cooling_Bottom", 3),
+]
+ZONE_PARAMS = ["Temp", "TolPlus", "TolMinus", "Conv"]
+
+def find_zone_column(columns, pattern, zone_num):
+    """Return the Excel column for zone_num of a column pattern (or None)"""
+    for col in (f"{pattern}{zone_num}", f"{pattern}_{zone_num}", f"{pattern}_Z{zone_num}"):
+        if col in columns:
+            return col
+    return None
+
+# ==================== ZONE OVERRIDES ====================
+ZONE_OVERRIDES_FILE = "zone_overrides.npz"
+
+# Flat zone list matching the second axis of the zone matrices
+ZONE_SLOTS = [f"{prefix}_Z{zone_num}" for prefix, count in ZONE_LAYOUT
+              for zone_num in range(1, count + 1)]
+
+def build_zone_matrix(df, mapping):
+    """Excel zone values as float32 array (programs × zones × params); NaN = no value"""
+    matrix = np.full((len(df), len(ZONE_SLOTS), len(ZONE_PARAMS)), np.nan, dtype=np.float32)
+    slot = 0
+    for prefix, count in ZONE_LAYOUT:
+        for param_idx, param in enumerate(ZONE_PARAMS):
+            pattern = mapping.get(f"{prefix}_{param}")
+            if not pattern or pattern == "(None)":
+                continue
+            for zone_num in range(1, count + 1):
+                col = find_zone_column(df.columns, pattern, zone_num)
+                if col:
+                    matrix[:, slot + zone_num - 1, param_idx] = pd.to_numeric(
+                        df[col], errors='coerce').to_numpy(dtype=np.float32)
+        slot += count
+    return matrix
+
+class ZoneOverrideStore:
+    """Zone values edited in the GUI, keyed by program name (STENCIL).
+
+    Only edited programs are held: values/edited are (edited programs × zones ×
+    params) arrays, so 50k loaded programs with a few hundred edited ones cost a
+    few hundred KB. apply() merges them into a full zone matrix in one step.
+    """
+
+    def __init__(self):
+        self.stencils = []
+        self.values = np.zeros((0, len(ZONE_SLOTS), len(ZONE_PARAMS)), dtype=np.float32)
+        self.edited = np.zeros((0, len(ZONE_SLOTS), len(ZONE_PARAMS)), dtype=bool)
+        self._rows = {}
+        self.version = 0    # bumped on every change (stale bulk-edit plans are refused)
+
+    def __len__(self):
+        return len(self.stencils)
+
+    def _row(self, stencil):
+        """Block row for a program, appending an empty one if needed"""
+        if stencil not in self._rows:
+            self._rows[stencil] = len(self.stencils)
+            self.stencils.append(stencil)
+            self.values = np.concatenate([self.values, np.zeros((1,) + self.values.shape[1:], np.float32)])
+            self.edited = np.concatenate([self.edited, np.zeros((1,) + self.edited.shape[1:], bool)])
+        return self._rows[stencil]
+
+    def get(self, stencil):
+        """(values, edited) for one program, or None if it has no edits"""
+        row = self._rows.get(stencil)
+        if row is None:
+            return None
+        return self.values[row], self.edited[row]
+
+    def set_program(self, stencil, values, edited):
+        """Replace the edits of one program (zones × params arrays)"""
+        if not edited.any():
+            self.clear(stencil)
+            return
+        self.version += 1
+        row = self._row(stencil)
+        self.values[row] = np.where(edited, values, 0)
+        self.edited[row] = edited
+
+    def clear(self, stencil):
+        """Drop all edits of one program"""
+        row = self._rows.pop(stencil, None)
+        if row is None:
+            return
+        self.version += 1
+        keep = np.arange(len(self.stencils)) != row
+        self.stencils.pop(row)
+        self.values = self.values[keep]
+        self.edited = self.edited[keep]
+        self._rows = {name: i for i, name in enumerate(self.stencils)}
+
+    def set_values(self, stencils, slot, param, values, edited):
+        """Set one zone parameter for many programs in one step.
+
+        stencils/values/edited are aligned arrays; edited=False drops that
+        value's edit. Programs left without any edit are removed.
+        """
+        self.version += 1
+        new = [name for name in dict.fromkeys(stencils) if name not in self._rows]
+        if new:
+            self._rows.update({name: len(self.stencils) + i for i, name in enumerate(new)})
+            self.stencils.extend(new)
+            self.values = np.concatenate([self.values, np.zeros((len(new),) + self.values.shape[1:], np.float32)])
+            self.edited = np.concatenate([self.edited, np.zeros((len(new),) + self.edited.shape[1:], bool)])
+        rows = np.fromiter((self._rows[name] for name in stencils), dtype=np.intp, count=len(stencils))
+        self.values[rows, slot, param] = np.where(edited, values, 0)
+        self.edited[rows, slot, param] = edited
+        
+        keep = self.edited.any(axis=(1, 2))
+        if not keep.all():
+            self.stencils = [name for name, kept in zip(self.stencils, keep) if kept]
+            self.values = self.values[keep]
+            self.edited = self.edited[keep]
+            self._rows = {name: i for i, name in enumerate(self.stencils)}
+
+    def cells(self, stencils, slot, param):
+        """(values, edited) of one zone parameter for many programs (no edit: 0, False)"""
+        rows = np.fromiter((self._rows.get(name, -1) for name in stencils), dtype=np.intp, count=len(stencils))
+        present = rows >= 0
+        values = np.zeros(len(stencils), dtype=np.float32)
+        edited = np.zeros(len(stencils), dtype=bool)
+        values[present] = self.values[rows[present], slot, param]
+        edited[present] = self.edited[rows[present], slot, param]
+        return values, edited
+
+    def apply(self, matrix, names):
+        """Merge edits into matrix (programs × zones × params) in place.
+
+        names gives the STENCIL of every matrix row; returns the number of
+        programs that received overrides.
+        """
+        if not self.stencils:
+            return 0
+        block_rows = pd.Index(self.stencils).get_indexer(list(names))
+        programs = np.flatnonzero(block_rows >= 0)
+        blocks = block_rows[programs]
+        matrix[programs] = np.where(self.edited[blocks], self.values[blocks], matrix[programs])
+        return len(programs)
+
+    def save(self, path):
+        """Persist as compressed .npz (only edited programs are stored)"""
+        np.savez_compressed(path, stencils=np.array(self.stencils, dtype=str),
+                            values=self.values, edited=self.edited)
+
+    @classmethod
+    def load(cls, path):
+        """Load a store saved with save(); empty store if the file is missing"""
+        store = cls()
+        if os.path.exists(path):
+            with np.load(path, allow_pickle=False) as data:
+                store.stencils = [str(name) for name in data['stencils']]
+                store.values = data['values'].astype(np.float32)
+                store.edited = data['edited'].astype(bool)
+            store._rows = {name: i for i, name in enumerate(store.stencils)}
+        return store
+
+# ==================== BULK ZONE EDITS ====================
+BULK_EDIT_UNDO_LIMIT = 20
+BULK_EDIT_PREVIEW_ROWS = 200
+# One variable per zone slot and parameter (e.g. Heating_Top_Z3_Temp), matrix order
+ZONE_VARIABLES = [f"{slot}_{param}" for slot in ZONE_SLOTS for param in ZONE_PARAMS]
+_BULK_EDIT_SYNTAX = re.compile(r'^\s*(\w+)\s*=(?!=)(.+?)(?:\s+where\s+(.+?))?\s*$', re.IGNORECASE | re.DOTALL)
+
+def parse_bulk_edit(text):
+    """Split "<zone variable> = <expression> [where <condition>]" into its parts"""
+    match = _BULK_EDIT_SYNTAX.match(text)
+    if not match:
+        raise ValueError("Expected: <zone variable> = <expression> [where <condition>]")
+    target, expression, condition = match.groups()
+    if target not in ZONE_VARIABLES:
+        raise ValueError(f"{target} is not a zone variable (e.g. Heating_Top_Z3_Temp)")
+    return target, expression.strip(), condition
+
+def bulk_edit_table(df, mapping, zone_overrides=None):
+    """Everything an expression can use, one row per program.
+
+    Returns (names, excel zone matrix, table): the table has every
+    ZONE_VARIABLES column with its effective value (Excel plus overrides)
+    and each mapped board parameter (PCB_Length, PCB_Width, CBS_Width, ...)
+    as numbers.
+    """
+    names = program_names(df, mapping)
+    excel = build_zone_matrix(df, mapping)
+    effective = excel.copy()
+    if zone_overrides is not None:
+        zone_overrides.apply(effective, names)
+    columns = {key: pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=np.float64)
+               for key, column in mapping.items()
+               if key != 'STENCIL' and _zone_block(key) is None and column in df.columns}
+    table = pd.concat([pd.DataFrame(effective.reshape(len(df), -1).astype(np.float64), columns=ZONE_VARIABLES),
+                       pd.DataFrame(columns, index=range(len(df)))], axis=1)
+    return names, excel, table
+
+class ZoneBulkEditor:
+    """Expression edits of one zone variable across all programs, with undo.
+
+    evaluate() computes a plan over the whole program table with
+    DataFrame.eval; apply() writes it into the ZoneOverrideStore in one step
+    and keeps the previous values of the cells it touched on the undo stack,
+    so undo() leaves every other edit (e.g. from the zone tabs) alone.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.undo_stack = []    # [(expression text, stencils, slot, param, previous values, previous edited)]
+
+    def evaluate(self, text, df, mapping):
+        """Plan for one expression: matched rows, current and new values (nothing is changed)"""
+        target, expression, condition = parse_bulk_edit(text)
+        names, excel, table = bulk_edit_table(df, mapping, self.store)
+        try:
+            new = table.eval(expression)
+            matched = table.eval(condition) if condition else np.ones(len(table), dtype=bool)
+        except Exception as e:
+            raise ValueError(f"Cannot evaluate expression: {e}") from e
+        new = np.broadcast_to(np.asarray(new, dtype=np.float64), (len(table),))
+        matched = np.asarray(matched)
+        if matched.dtype != bool:
+            raise ValueError(f"The where condition must be true/false, got {matched.dtype}")
+        matched = np.broadcast_to(matched, (len(table),))    # scalar conditions, e.g. "where True"
+        
+        slot, param = divmod(ZONE_VARIABLES.index(target), len(ZONE_PARAMS))
+        current = table[target].to_numpy()
+        rows = np.flatnonzero(matched & ~np.isnan(new))
+        changed = ~np.isclose(new[rows], current[rows], equal_nan=True)
+        rows = rows[changed]
+        # overrides are keyed by STENCIL: duplicate names with different new values keep the last one
+        names = [names[row] for row in rows]
+        conflicts = int((pd.Series(new[rows]).groupby(names).nunique() > 1).sum()) if len(rows) else 0
+        return {
+            'text': text.strip(),
+            'target': target,
+            'slot': slot,
+            'param': param,
+            'matched': int(matched.sum()),
+            'no_value': int((matched & np.isnan(new)).sum()),
+            'rows': rows,
+            'names': names,
+            'conflicts': conflicts,
+            'current': current[rows],
+            'new': new[rows].astype(np.float32),
+            'excel': excel[rows, slot, param],
+            'store_version': self.store.version,
+        }
+
+    @staticmethod
+    def preview(plan, limit=BULK_EDIT_PREVIEW_ROWS):
+        """First rows of a plan as a table (Row, Program, Current, New)"""
+        return pd.DataFrame({'Row': plan['rows'][:limit] + 1, 'Program': plan['names'][:limit],
+                             'Current': plan['current'][:limit], 'New': plan['new'][:limit]})
+
+    def apply(self, plan):
+        """Write a plan into the store; values equal to the Excel sheet are no edit"""
+        if plan['store_version'] != self.store.version:
+            raise ValueError("Zone overrides changed since the preview; preview again")
+        stencils = list(dict.fromkeys(plan['names']))
+        self.undo_stack.append((plan['text'], stencils, plan['slot'], plan['param'])
+                               + self.store.cells(stencils, plan['slot'], plan['param']))
+        del self.undo_stack[:-BULK_EDIT_UNDO_LIMIT]
+        edited = np.isnan(plan['excel']) | ~np.isclose(plan['new'], plan['excel'])
+        self.store.set_values(plan['names'], plan['slot'], plan['param'], plan['new'], edited)
+        return len(plan['rows'])
+
+    def undo(self):
+        """Revert the last applied edit; returns its text (None if nothing to undo)"""
+        if not self.undo_stack:
+            return None
+        text, stencils, slot, param, values, edited = self.undo_stack.pop()
+        self.store.set_values(stencils, slot, param, values, edited)
+        return text
+
+# ==================== MACHINE RULES ====================
+MACHINE_RULES_FILE = "machine_rules.json"
+
+# Used when no machine_rules.json exists. Each rule checks one mapped parameter
+# against fixed limits ("min"/"max") or against another mapped parameter
+# ("less_than"/"at_most"). Zone parameters (e.g. Heating_Top_Temp) are expanded
+# to every zone of their block.
+DEFAULT_MACHINE_RULES = [
+    {"name": "Conveyor width range", "param": "PCB_Width", "min": 50, "max": 460},
+    {"name": "CBS narrower than width", "param": "CBS_Width", "less_than": "PCB_Width"},
+    {"name": "Top heating temperature", "param": "Heating_Top_Temp", "min": 0, "max": 350},
+    {"name": "Bottom heating temperature", "param": "Heating_Bottom_Temp", "min": 0, "max": 350},
+    {"name": "Top cooling temperature", "param": "Cooling_Top_Temp", "min": 0, "max": 150},
+    {"name": "Bottom cooling temperature", "param": "Cooling_Bottom_Temp", "min": 0, "max": 150},
+    {"name": "Top heating TolMinus <= Temp", "param": "Heating_Top_TolMinus", "at_most": "Heating_Top_Temp"},
+    {"name": "Bottom heating TolMinus <= Temp", "param": "Heating_Bottom_TolMinus", "at_most": "Heating_Bottom_Temp"},
+    {"name": "Top cooling TolMinus <= Temp", "param": "Cooling_Top_TolMinus", "at_most": "Cooling_Top_Temp"},
+    {"name": "Bottom cooling TolMinus <= Temp", "param": "Cooling_Bottom_TolMinus", "at_most": "Cooling_Bottom_Temp"},
+    {"name": "Top heating convection %", "param": "Heating_Top_Conv", "min": 0, "max": 100},
+    {"name": "Bottom heating convection %", "param": "Heating_Bottom_Conv", "min": 0, "max": 100},
+    {"name": "Top cooling convection %", "param": "Cooling_Top_Conv", "min": 0, "max": 100},
+    {"name": "Bottom cooling convection %", "param": "Cooling_Bottom_Conv", "min": 0, "max": 100},
+]
+
+def load_machine_rules(path=MACHINE_RULES_FILE):
+    """Load machine-limit rules from JSON ({"rules": [...]}), or the defaults"""
+    if not os.path.exists(path):
+        return list(DEFAULT_MACHINE_RULES)
+    with open(path, 'r') as f:
+        data = json.load(f)
+    return data.get('rules', []) if isinstance(data, dict) else data
+
+def _zone_block(param_key):
+    """Return (prefix, zone_count) if param_key is a zone pattern key"""
+    for prefix, count in ZONE_LAYOUT:
+        if param_key.startswith(prefix + "_") and param_key[len(prefix) + 1:] in ZONE_PARAMS:
+            return prefix, count
+    return None
+
+def _rule_column_pairs(columns, mapping, rule):
+    """Yield (column, other_column) pairs a rule applies to"""
+    param = rule.get('param')
+    other = rule.get('less_than') or rule.get('at_most')
+    col = mapping.get(param)
+    other_col = mapping.get(other) if other else None
+    if not col or col == "(None)" or (other and (not other_col or other_col == "(None)")):
+        return
+
+    block = _zone_block(param)
+    if block is None:
+        if col in columns and (not other or other_col in columns):
+            yield col, other_col
+        return
+
+    # Zone rule: expand the column pattern over every zone of the block
+    for zone_num in range(1, block[1] + 1):
+        zone_col = find_zone_column(columns, col, zone_num)
+        zone_other = find_zone_column(columns, other_col, zone_num) if other else None
+        if zone_col and (not other or zone_other):
+            yield zone_col, zone_other
+
+def _rule_zone_operands(columns, mapping, rule, zone_matrix, as_number):
+    """Yield (label, values, other_label, other_values) of a zone rule from the zone matrix"""
+    param = rule.get('param')
+    other = rule.get('less_than') or rule.get('at_most')
+    other_col = mapping.get(other) if other and _zone_block(other) is None else None
+    if other and _zone_block(other) is None and other_col not in columns:
+        return
+
+    def zone(key, zone_num):
+        # Excel column name when the sheet has one, else the zone variable (set by an override)
+        prefix, count = _zone_block(key)
+        if zone_num > count:
+            return None, None
+        pattern = mapping.get(key)
+        col = find_zone_column(columns, pattern, zone_num) if pattern and pattern != "(None)" else None
+        values = zone_matrix[:, ZONE_SLOTS.index(f"{prefix}_Z{zone_num}"),
+                             ZONE_PARAMS.index(key[len(prefix) + 1:])].astype(float)
+        return col or f"{prefix}_Z{zone_num}_{key[len(prefix) + 1:]}", values
+
+    for zone_num in range(1, _zone_block(param)[1] + 1):
+        label, values = zone(param, zone_num)
+        if np.isnan(values).all():
+            continue
+        if not other:
+            yield label, values, None, None
+        elif other_col:
+            yield label, values, other_col, as_number(other_col)
+        else:
+            other_label, other_values = zone(other, zone_num)
+            if other_label is not None:
+                yield label, values, other_label, other_values
+
+def evaluate_machine_rules(df, mapping, rules, zone_matrix=None):
+    """Check all rows against the machine rules in one vectorized pass.
+
+    mapping is {param_key: excel_column}. Blank/non-numeric cells never
+    violate a rule (missing values are handled by the generator itself).
+    With zone_matrix (programs × zones × params, e.g. the sheet merged with
+    the zone overrides) zone rules check those values instead of the sheet.
+    Returns (pass_mask, violations): a boolean Series aligned with df.index and
+    a long-format DataFrame with one row per violation
+    (Row, Rule, Column, Value, Limit, Message).
+    """
+    numeric = {}
+
+    def as_number(col):
+        if col not in numeric:
+            numeric[col] = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float)
+        return numeric[col]
+
+    def operands(rule):
+        if zone_matrix is not None and _zone_block(rule.get('param', '')) is not None:
+            yield from _rule_zone_operands(df.columns, mapping, rule, zone_matrix, as_number)
+            return
+        for col, other_col in _rule_column_pairs(df.columns, mapping, rule):
+            yield col, as_number(col), other_col, as_number(other_col) if other_col else None
+
+    frames = []
+    for rule in rules:
+        name = rule.get('name', rule.get('param', '?'))
+        for col, values, other_col, other_values in operands(rule):
+            with np.errstate(invalid='ignore'):
+                if other_col:
+                    if 'less_than' in rule:
+                        bad = values >= other_values
+                        limit = f"< {other_col}"
+                    else:
+                        bad = values > other_values
+                        limit = f"<= {other_col}"
+                else:
+                    bad = np.zeros(len(values), dtype=bool)
+                    if rule.get('min') is not None:
+                        bad |= values < rule['min']
+                    if rule.get('max') is not None:
+                        bad |= values > rule['max']
+                    limit = f"{rule.get('min', '-inf')}..{rule.get('max', 'inf')}"
+
+            positions = np.flatnonzero(bad)
+            if len(positions):
+                frames.append(pd.DataFrame({
+                    'Position': positions,
+                    'Rule': name,
+                    'Column': col,
+                    'Value': values[positions],
+                    'Limit': limit,
+                }))
+
+    pass_array = np.ones(len(df), dtype=bool)
+    if not frames:
+        empty = pd.DataFrame(columns=['Row', 'Rule', 'Column', 'Value', 'Limit', 'Message'])
+        return pd.Series(pass_array, index=df.index), empty
+
+    violations = pd.concat(frames, ignore_index=True).sort_values('Position', kind='stable')
+    pass_array[violations['Position'].to_numpy()] = False
+    violations.insert(0, 'Row', df.index.to_numpy()[violations['Position'].to_numpy()])
+    violations['Message'] = (violations['Rule'] + " (" + violations['Column'] + "="
+                             + violations['Value'].round(3).astype(str) + ", limit "
+                             + violations['Limit'] + ")")
+    violations = violations.drop(columns='Position').reset_index(drop=True)
+    return pd.Series(pass_array, index=df.index), violations
+
+def summarize_violations(violations):
+    """Join all violation messages per row: {row_label: 'msg; msg'}"""
+    reasons = {}
+    # Plain loop over the (row-sorted) arrays; much faster than groupby().agg(join)
+    for row, message in zip(violations['Row'].tolist(), violations['Message'].tolist()):
+        if row in reasons:
+            reasons[row] += "; " + message
+        else:
+            reasons[row] = message
+    return reasons
+
+# ==================== THERMAL PROFILE ====================
+THERMAL_PROFILE_FILE = "thermal_profile.json"
+
+# Used when no thermal_profile.json exists (keys there override these).
+# The board is one lumped thermal mass carried through the heating zones
+# and then the cooling zones at constant conveyor speed; it exchanges heat
+# with the top and bottom zone gas, with a per-side coefficient that grows
+# with the zone's convection %.
+DEFAULT_THERMAL_PROFILE = {
+    "conveyor_speed_mm_min": 800,
+    "heating_zone_length_mm": 400,
+    "cooling_zone_length_mm": 400,
+    "ambient_c": 25,
+    "board_heat_capacity_j_m2k": 4900,   # 1.6 mm FR4 plus a typical component load
+    "h_min_w_m2k": 20,                   # per side at 0 % convection (also outside the oven)
+    "h_max_w_m2k": 90,                   # per side at 100 % convection
+    "default_conv_pct": 50,              # when no convection column is mapped
+    "edge_gain_mm": 10,                  # extra heat pick-up through the edges (× perimeter/area)
+    "time_step_s": 1.0,
+    "liquidus_c": 217,
+    "peak_min_c": 235,
+    "peak_max_c": 250,
+    "tal_min_s": 30,
+    "tal_max_s": 90,
+    "max_ramp_k_s": 3.0,
+}
+PROFILE_BLOCK_ROWS = 4096  # programs per block (bounds the programs × time-step arrays)
+PROFILE_LOG_LIMIT = 50
+
+def load_thermal_profile_config(path=THERMAL_PROFILE_FILE):
+    """Estimator settings from JSON merged over DEFAULT_THERMAL_PROFILE"""
+    config = dict(DEFAULT_THERMAL_PROFILE)
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            config.update(json.load(f))
+    return config
+
+def _zone_slots(prefix):
+    return [i for i, slot in enumerate(ZONE_SLOTS) if slot.startswith(prefix + "_Z")]
+
+def _oven_tracks(zone_matrix, config):
+    """Per-program (sum of h, sum of h·T) for every oven zone, heating then cooling"""
+    ambient = config['ambient_c']
+    temp, conv = zone_matrix[:, :, 0].astype(np.float64), zone_matrix[:, :, 3].astype(np.float64)
+    top = _zone_slots("Heating_Top") + _zone_slots("Cooling_Top")
+    bottom = _zone_slots("Heating_Bottom") + _zone_slots("Cooling_Bottom")
+    heating = len(_zone_slots("Heating_Top"))
+    
+    t_top, t_bot = temp[:, top], temp[:, bottom]
+    # a side without a value takes the other side's; heating zones then inherit the
+    # previous zone's setpoint, cooling zones and anything before the first setpoint run at ambient
+    t_top, t_bot = np.where(np.isnan(t_top), t_bot, t_top), np.where(np.isnan(t_bot), t_top, t_bot)
+    for track in (t_top, t_bot):
+        last = np.where(~np.isnan(track[:, :heating]), np.arange(heating), 0)
+        np.maximum.accumulate(last, axis=1, out=last)
+        filled = np.take_along_axis(track[:, :heating], last, axis=1)
+        track[:, :heating] = filled
+    t_top, t_bot = np.nan_to_num(t_top, nan=ambient), np.nan_to_num(t_bot, nan=ambient)
+    
+    def coefficient(values):
+        pct = np.clip(np.nan_to_num(values, nan=config['default_conv_pct']), 0, 100)
+        return config['h_min_w_m2k'] + (config['h_max_w_m2k'] - config['h_min_w_m2k']) * pct / 100
+    h_top, h_bot = coefficient(conv[:, top]), coefficient(conv[:, bottom])
+    lengths = np.array([config['heating_zone_length_mm']] * heating
+                       + [config['cooling_zone_length_mm']] * (len(top) - heating), dtype=np.float64)
+    has_heat = ~np.all(np.isnan(temp[:, _zone_slots("Heating_Top") + _zone_slots("Heating_Bottom")]), axis=1)
+    return h_top + h_bot, h_top * t_top + h_bot * t_bot, lengths, has_heat
+
+def _span_integral(values, cumulative, starts, oven_length, outside, x):
+    """∫ values dx from 0 to x (piecewise constant per zone, `outside` beyond the oven)"""
+    k = np.clip(np.searchsorted(starts, x, side='right') - 1, 0, len(starts) - 1)
+    rows = np.arange(x.shape[0])[:, None]
+    inside = cumulative[rows, k] + values[rows, k] * (x - starts[k])
+    return np.where(x < 0, outside * x,
+                    np.where(x > oven_length, cumulative[:, -1:] + outside * (x - oven_length), inside))
+
+def has_zone_temperatures(zone_matrix):
+    """True if any program has a zone setpoint (the estimate needs at least one)"""
+    return bool(len(zone_matrix)) and not np.isnan(zone_matrix[:, :, ZONE_PARAMS.index("Temp")]).all()
+
+def estimate_thermal_profiles(zone_matrix, length, width, config=None, return_curves=False):
+    """Approximate board temperature curve of every program; DataFrame of profile metrics.
+
+    All programs of a block advance together through programs × time-step
+    arrays: the board (length × width) averages the zone gas over its span,
+    then T[t+1] = T_gas + (T[t] - T_gas)·exp(-h·dt / C) per step. Returns
+    Peak_C, TAL_s (time above liquidus), Time_To_Peak_s, Max_Ramp_K_s and
+    Flag (None when inside the window), plus the curves if requested.
+    """
+    config = {**DEFAULT_THERMAL_PROFILE, **(config or {})}
+    length = np.asarray(length, dtype=np.float64)
+    width = np.asarray(width, dtype=np.float64)
+    n = len(length)
+    h_sum, ht_sum, lengths, has_heat = _oven_tracks(zone_matrix, config)
+    starts = np.concatenate([[0.0], np.cumsum(lengths)[:-1]])
+    oven_length = float(lengths.sum())
+    speed = config['conveyor_speed_mm_min'] / 60.0
+    dt = config['time_step_s']
+    ambient = config['ambient_c']
+    h_out = 2 * config['h_min_w_m2k']
+    
+    valid = has_heat & np.isfinite(length) & np.isfinite(width) & (length > 0) & (width > 0)
+    board_length = np.where(valid, length, 1.0)
+    board_width = np.where(valid, width, 1.0)
+    steps = int(np.ceil((oven_length + np.nanmax(np.where(valid, length, 0), initial=0)) / speed / dt)) + 1
+    times = np.arange(steps) * dt
+    
+    peak = np.full(n, np.nan)
+    tal = np.full(n, np.nan)
+    time_to_peak = np.full(n, np.nan)
+    max_ramp = np.full(n, np.nan)
+    curves = np.full((n, steps), np.nan, dtype=np.float32) if return_curves else None
+    
+    for start in range(0, n, PROFILE_BLOCK_ROWS):
+        block = slice(start, min(n, start + PROFILE_BLOCK_ROWS))
+        rows = np.flatnonzero(valid[block]) + start
+        if not len(rows):
+            continue
+        L, W = board_length[rows], board_width[rows]
+        hs, hts = h_sum[rows], ht_sum[rows]
+        cum_h = np.concatenate([np.zeros((len(rows), 1)), np.cumsum(hs * lengths, axis=1)], axis=1)
+        cum_ht = np.concatenate([np.zeros((len(rows), 1)), np.cumsum(hts * lengths, axis=1)], axis=1)
+        
+        # Board span [front - L, front] at every time step (programs × steps)
+        front = np.broadcast_to(speed * times[None, :], (len(rows), steps))
+        rear = front - L[:, None]
+        h_span = (_span_integral(hs, cum_h, starts, oven_length, h_out, front)
+                  - _span_integral(hs, cum_h, starts, oven_length, h_out, rear))
+        ht_span = (_span_integral(hts, cum_ht, starts, oven_length, h_out * ambient, front)
+                   - _span_integral(hts, cum_ht, starts, oven_length, h_out * ambient, rear))
+        gas = ht_span / h_span
+        edge = 1 + config['edge_gain_mm'] * 2 * (L + W) / (L * W)
+        decay = np.exp(-(h_span / L[:, None]) * edge[:, None] * dt / config['board_heat_capacity_j_m2k'])
+        
+        board = np.empty((len(rows), steps))
+        board[:, 0] = ambient
+        for step in range(1, steps):
+            board[:, step] = gas[:, step - 1] + (board[:, step - 1] - gas[:, step - 1]) * decay[:, step - 1]
+        
+        peak[rows] = board.max(axis=1)
+        time_to_peak[rows] = board.argmax(axis=1) * dt
+        tal[rows] = (board > config['liquidus_c']).sum(axis=1) * dt
+        max_ramp[rows] = np.diff(board, axis=1).max(axis=1) / dt
+        if curves is not None:
+            curves[rows] = board
+    
+    flags = np.full(n, None, dtype=object)
+    flags[~valid] = "No heating zone temperatures or PCB size"
+    checks = [
+        (peak < config['peak_min_c'], lambda i: f"peak {peak[i]:.0f} °C < {config['peak_min_c']}"),
+        (peak > config['peak_max_c'], lambda i: f"peak {peak[i]:.0f} °C > {config['peak_max_c']}"),
+        (tal < config['tal_min_s'], lambda i: f"TAL {tal[i]:.0f} s < {config['tal_min_s']}"),
+        (tal > config['tal_max_s'], lambda i: f"TAL {tal[i]:.0f} s > {config['tal_max_s']}"),
+        (max_ramp > config['max_ramp_k_s'], lambda i: f"ramp {max_ramp[i]:.1f} K/s > {config['max_ramp_k_s']}"),
+    ]
+    for mask, message in checks:
+        for i in np.flatnonzero(mask & valid):
+            flags[i] = message(i) if flags[i] is None else f"{flags[i]}; {message(i)}"
+    
+    report = pd.DataFrame({
+        'Peak_C': peak.round(1),
+        'TAL_s': tal,
+        'Time_To_Peak_s': time_to_peak,
+        'Max_Ramp_K_s': max_ramp.round(2),
+        'Flag': flags,
+    })
+    return (report, curves) if return_curves else report
+
+def log_thermal_report(report, log, elapsed_ms=None):
+    """Log the flagged programs of a thermal profile report (Program/Flag columns)"""
+    flagged = report[report['Flag'].notna()]
+    timing = f", {elapsed_ms:.0f} ms" if elapsed_ms is not None else ""
+    log(f"\nThermal profile estimate: {len(report) - len(flagged)}/{len(report)} programs inside the window"
+        f" (median peak {report['Peak_C'].median():.0f} °C, median TAL {report['TAL_s'].median():.0f} s{timing})")
+    for idx, program, flag in zip(flagged.index[:PROFILE_LOG_LIMIT], flagged['Program'], flagged['Flag']):
+        log(f"  ⚠ Row {idx + 1} {program}: {flag}", color='red')
+    if len(flagged) > PROFILE_LOG_LIMIT:
+        log(f"  ... {len(flagged) - PROFILE_LOG_LIMIT} more flagged programs")
+
+# ==================== SIMILARITY SEARCH ====================
+SIMILARITY_K = 5
+SIMILARITY_ZONE_PARAMS = ("Temp", "Conv")
+# Board size/CBS and zone settings weigh the same, however many zone columns are mapped
+SIMILARITY_WEIGHTS = {"board": 1.0, "zones": 1.0}
+SIMILARITY_BOARD_FEATURES = ["Length", "Width", "CBS"]
+SIMILARITY_FEATURES = SIMILARITY_BOARD_FEATURES + [f"{slot}_{param}" for slot in ZONE_SLOTS
+                                                   for param in SIMILARITY_ZONE_PARAMS]
+
+def workbook_features(df, mapping, zone_overrides=None):
+    """(names, features) of loaded rows: programs × SIMILARITY_FEATURES, NaN = no value"""
+    names = program_names(df, mapping)
+    features = np.full((len(df), len(SIMILARITY_FEATURES)), np.nan, dtype=np.float32)
+    for i, key in enumerate(('PCB_Length', 'PCB_Width', 'CBS_Width')):
+        if mapping.get(key) in df.columns:
+            features[:, i] = measure_series(df[mapping[key]]).to_numpy()
+    if mapping.get('CBS_Width') in df.columns:
+        features[:, 2] = np.nan_to_num(features[:, 2], nan=0.0)    # no CBS = width 0
+    zones = build_zone_matrix(df, mapping)
+    if zone_overrides is not None:
+        zone_overrides.apply(zones, names)
+    params = [ZONE_PARAMS.index(param) for param in SIMILARITY_ZONE_PARAMS]
+    features[:, len(SIMILARITY_BOARD_FEATURES):] = zones[:, :, params].reshape(len(df), -1)
+    return names, features
+
+def catalog_features(catalog_path):
+    """(names, program_ids, features) of the newest catalog entry of every stencil"""
+    rows = ProgramCatalog(catalog_path).latest_programs()
+    features = np.full((len(rows), len(SIMILARITY_FEATURES)), np.nan, dtype=np.float32)
+    if rows:
+        board = pd.DataFrame.from_records(rows, columns=['length', 'width', 'cbs_width'])
+        features[:, :3] = board.astype(float).fillna({'cbs_width': 0.0}).to_numpy()
+        zones = pd.DataFrame.from_records([json.loads(row['zones']) if row['zones'] else {} for row in rows])
+        zones = zones.reindex(columns=SIMILARITY_FEATURES[len(SIMILARITY_BOARD_FEATURES):])
+        features[:, len(SIMILARITY_BOARD_FEATURES):] = zones.to_numpy(dtype=np.float32)
+    return [row['stencil'] for row in rows], [row['program_id'] for row in rows], features
+
+class ProgramSimilarityIndex:
+    """k most similar programs over normalized board size, CBS and zone settings.
+
+    Sources ("workbook", "library") are set separately; set_source() skips
+    unchanged data, so reloading a workbook only rebuilds when its values
+    changed. build() drops features no program has, z-scores the rest and
+    weights the board and zone groups per SIMILARITY_WEIGHTS. Queries use
+    scipy's cKDTree when installed, else a NumPy scan (both a few ms over
+    100k programs).
+    """
+
+    def __init__(self, weights=None):
+        self.weights = {**SIMILARITY_WEIGHTS, **(weights or {})}
+        self.sources = {}   # name → (program names, labels, features, digest)
+        self._points = None
+
+    def set_source(self, name, names, labels, features):
+        """Add or replace a source; returns False if it is unchanged"""
+        digest = hashlib.sha1(np.ascontiguousarray(features).tobytes()
+                              + "\0".join(map(str, names)).encode('utf-8')).hexdigest()
+        if name in self.sources and self.sources[name][3] == digest:
+            return False
+        self.sources[name] = (list(names), list(labels), features, digest)
+        self._points = None
+        return True
+
+    def drop_source(self, name):
+        if self.sources.pop(name, None) is not None:
+            self._points = None
+
+    def __len__(self):
+        return sum(len(source[0]) for source in self.sources.values())
+
+    def build(self):
+        """Normalize all sources into one point set and index it"""
+        features = np.concatenate([source[2] for source in self.sources.values()]).astype(np.float64)
+        self._source_of = np.concatenate([np.full(len(source[0]), i)
+                                          for i, source in enumerate(self.sources.values())])
+        self._offsets = np.cumsum([0] + [len(source[0]) for source in self.sources.values()])
+        self._present = ~np.all(np.isnan(features), axis=0)
+        features = features[:, self._present]
+        self._mean = np.nanmean(features, axis=0)
+        self._std = np.nanstd(features, axis=0)
+        self._std[self._std == 0] = 1.0
+        is_board = np.array([name in SIMILARITY_BOARD_FEATURES for name in SIMILARITY_FEATURES])[self._present]
+        self._scale = np.where(is_board, self.weights['board'] / np.sqrt(max(1, is_board.sum())),
+                               self.weights['zones'] / np.sqrt(max(1, (~is_board).sum())))
+        self._points = self._normalize(features)
+        try:
+            from scipy.spatial import cKDTree
+            self._tree = cKDTree(self._points)
+        except ImportError:
+            self._tree = None
+
+    def _normalize(self, features):
+        z = (features - self._mean) / self._std
+        return np.nan_to_num(z, nan=0.0) * self._scale    # missing value = average program
+
+    def _nearest(self, point, k):
+        if self._tree is not None:
+            distances, positions = self._tree.query(point, k=min(k, len(self._points)))
+            return np.atleast_1d(distances), np.atleast_1d(positions)
+        distances = np.sqrt(((self._points - point) ** 2).sum(axis=1))
+        positions = np.argpartition(distances, min(k, len(distances) - 1))[:k]
+        positions = positions[np.lexsort((positions, distances[positions]))]   # ties: input order
+        return distances[positions], positions
+
+    def query(self, features, k=SIMILARITY_K, exclude=None):
+        """k nearest programs to one feature vector (SIMILARITY_FEATURES order).
+
+        exclude=(source, position) leaves that program (the query row itself) out.
+        """
+        if self._points is None:
+            self.build()
+        point = self._normalize(np.asarray(features, dtype=np.float64)[self._present])
+        skip = None
+        if exclude is not None:
+            skip = self._offsets[list(self.sources).index(exclude[0])] + exclude[1]
+        distances, positions = self._nearest(point, k + (skip is not None))
+        sources = list(self.sources.items())
+        results = []
+        for distance, position in zip(distances, positions):
+            if position == skip or position >= len(self._points):
+                continue
+            source_idx = self._source_of[position]
+            name, (names, labels, raw, _digest) = sources[source_idx]
+            local = position - self._offsets[source_idx]
+            results.append({'Source': name, 'Program': names[local], 'Label': labels[local],
+                            'Distance': round(float(distance), 4), 'Length': raw[local, 0],
+                            'Width': raw[local, 1], 'CBS': raw[local, 2]})
+        return pd.DataFrame(results[:k], columns=['Source', 'Program', 'Label', 'Distance',
+                                                  'Length', 'Width', 'CBS'])
+
+    def query_program(self, source, position, k=SIMILARITY_K):
+        """k programs most similar to one program of a source (itself excluded)"""
+        return self.query(self.sources[source][2][position], k, exclude=(source, position))
+
+# ==================== INPUT SOURCES ====================
+INPUT_CHUNK_ROWS = 50000
+INPUT_FILETYPES = [("Data files", "*.xlsx *.xls *.csv *.parquet *.pq *.feather *.arrow"),
+                   ("Excel files", "*.xlsx *.xls"), ("CSV files", "*.csv"),
+                   ("Parquet / Feather", "*.parquet *.pq *.feather *.arrow"), ("All files", "*.*")]
+
+def has_pyarrow():
+    """True if pyarrow is installed (fast CSV engine, Parquet and Feather)"""
+    return importlib.util.find_spec('pyarrow') is not None
+
+def _require_pyarrow(path):
+    if not has_pyarrow():
+        raise ImportError(f"Reading {os.path.basename(path)} needs pyarrow (pip install pyarrow)")
+
+def _excel_columns(path):
+    return list(pd.read_excel(path, nrows=0).columns)
+
+def _excel_chunks(path, columns, chunksize):
+    # openpyxl has no streaming reader in pandas: the sheet arrives as one chunk
+    yield pd.read_excel(path, usecols=columns)
+
+def _csv_columns(path):
+    return list(pd.read_csv(path, nrows=0).columns)
+
+def _csv_chunks(path, columns, chunksize):
+    if chunksize is None and has_pyarrow():
+        yield pd.read_csv(path, usecols=columns, engine='pyarrow')
+    elif chunksize is None:
+        yield pd.read_csv(path, usecols=columns)
+    else:
+        # the pyarrow engine cannot chunk; the C engine streams the file
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunksize)
+
+def _parquet_columns(path):
+    _require_pyarrow(path)
+    import pyarrow.parquet as pq
+    return [name for name in pq.read_schema(path).names if not name.startswith('__index_level_')]
+
+def _parquet_chunks(path, columns, chunksize):
+    _require_pyarrow(path)
+    import pyarrow.parquet as pq
+    parquet = pq.ParquetFile(path)
+    if chunksize is None:
+        yield parquet.read(columns=columns).to_pandas()
+        return
+    for batch in parquet.iter_batches(batch_size=chunksize, columns=columns):
+        yield batch.to_pandas()
+
+def _feather_columns(path):
+    _require_pyarrow(path)
+    import pyarrow.ipc as ipc
+    with ipc.open_file(path) as reader:
+        return [name for name in reader.schema.names if not name.startswith('__index_level_')]
+
+def _feather_chunks(path, columns, chunksize):
+    _require_pyarrow(path)
+    import pyarrow.ipc as ipc
+    with ipc.open_file(path) as reader:
+        if chunksize is None:
+            table = reader.read_all()
+            yield (table.select(columns) if columns else table).to_pandas()
+            return
+        # Feather v2 is an Arrow IPC file: record batches are read (memory-mapped) one at a time
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i)
+            batch = batch.select(columns) if columns else batch
+            for start in range(0, batch.num_rows, chunksize):
+                yield batch.slice(start, chunksize).to_pandas()
+
+# extension → (column reader, chunk reader)
+INPUT_READERS = {
+    '.xlsx': (_excel_columns, _excel_chunks),
+    '.xls': (_excel_columns, _excel_chunks),
+    '.csv': (_csv_columns, _csv_chunks),
+    '.parquet': (_parquet_columns, _parquet_chunks),
+    '.pq': (_parquet_columns, _parquet_chunks),
+    '.feather': (_feather_columns, _feather_chunks),
+    '.arrow': (_feather_columns, _feather_chunks),
+}
+
+def _input_reader(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in INPUT_READERS:
+        raise ValueError(f"Unsupported input file type '{ext}' "
+                         f"(supported: {', '.join(sorted(INPUT_READERS))})")
+    return INPUT_READERS[ext]
+
+def input_columns(path):
+    """Column names of an input file without reading its rows"""
+    return _input_reader(path)[0](path)
+
+def mapped_columns(columns, mapping, custom_bindings=None):
+    """Input columns the mapping uses: plain columns, every zone column of a pattern
+    and the columns of custom parameter bindings"""
+    needed = [column for column in (custom_bindings or {}).values() if column in columns]
+    for key, column in mapping.items():
+        if not column or column == "(None)":
+            continue
+        block = _zone_block(key)
+        if block is None:
+            if column in columns:
+                needed.append(column)
+            continue
+        for zone_num in range(1, block[1] + 1):
+            zone_col = find_zone_column(columns, column, zone_num)
+            if zone_col:
+                needed.append(zone_col)
+    if SOURCE_COLUMN in columns:
+        needed.append(SOURCE_COLUMN)
+    return list(dict.fromkeys(needed))
+
+def iter_input_chunks(path, columns=None, chunksize=INPUT_CHUNK_ROWS):
+    """Yield DataFrames of at most chunksize rows (None: one frame) with a continuous RangeIndex.
+
+    columns projects the read to those columns (Parquet/Feather/CSV skip the
+    rest entirely), so a wide ERP export costs only what the mapping uses.
+    """
+    offset = 0
+    for chunk in _input_reader(path)[1](path, columns, chunksize):
+        if any(name is not None for name in chunk.index.names):
+            # Parquet/Feather written from an indexed frame: named index levels are data columns
+            chunk = chunk.reset_index()
+        if columns:
+            chunk = chunk[[col for col in columns if col in chunk.columns]]
+        chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+        offset += len(chunk)
+        yield chunk
+
+def default_chunksize(path):
+    """Chunk size for a GUI/CLI load: whole-file where one read is fastest"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.xlsx', '.xls') or (ext == '.csv' and has_pyarrow()):
+        # the multi-threaded pyarrow CSV engine beats streaming through the C engine
+        return None
+    return INPUT_CHUNK_ROWS
+
+def read_input(path, columns=None, chunksize=None, progress=None):
+    """Read a whole input file into one DataFrame (RangeIndex = program ID offset).
+
+    With chunksize the file is streamed and progress(rows_so_far) is called
+    after every chunk.
+    """
+    chunks = []
+    for chunk in iter_input_chunks(path, columns, chunksize):
+        chunks.append(chunk)
+        if progress:
+            progress(chunk.index.stop)
+    if not chunks:
+        return pd.DataFrame(columns=columns or input_columns(path))
+    return chunks[0] if len(chunks) == 1 else pd.concat(chunks)
+
+# ==================== BATCH INGESTION ====================
+SHEET_OVERRIDES_FILE = "sheet_mapping_overrides.json"
+SOURCE_COLUMN = "_Source_Sheet"
+
+def load_sheet_overrides(path=SHEET_OVERRIDES_FILE):
+    """Load per-sheet mapping overrides: {"Book.xlsx:Sheet" or "Sheet": {param_key: column}}"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def read_workbook_sheets(path, all_sheets=True):
+    """Read one workbook into [(sheet_name, DataFrame)] (runs in a worker process)"""
+    if os.path.splitext(path)[1].lower() not in ('.xlsx', '.xls'):
+        # CSV/Parquet/Feather: a single "sheet" named after the file
+        return [(os.path.splitext(os.path.basename(path))[0], read_input(path))]
+    with pd.ExcelFile(path) as xl:
+        # the sidecar sheet written by back-annotation is never program data
+        names = [name for name in xl.sheet_names if name != ANNOTATION_SHEET]
+        names = names if all_sheets else names[:1]
+        return [(name, xl.parse(name)) for name in names]
+
+def apply_sheet_overrides(df, mapping, override):
+    """Rename a sheet's override columns to the base mapping's column names"""
+    renames = {}
+    for key, column in override.items():
+        base = mapping.get(key)
+        if not base or base == "(None)" or not column or column == base:
+            continue
+        if _zone_block(key) is None:
+            if column in df.columns:
+                renames[column] = base
+            continue
+        # Zone pattern: rename every zone column to the base pattern
+        for zone_num in range(1, _zone_block(key)[1] + 1):
+            zone_col = find_zone_column(df.columns, column, zone_num)
+            if zone_col:
+                renames[zone_col] = find_zone_column(df.columns, base, zone_num) or f"{base}_Z{zone_num}"
+    if not renames:
+        return df
+    clashes = [col for col in renames.values() if col in df.columns and col not in renames]
+    return df.drop(columns=clashes).rename(columns=renames)
+
+def align_zone_columns(df, mapping, names):
+    """Rename a sheet's zone columns to the names earlier sheets used.
+
+    Zone patterns match HT1, HT_1 or HT_Z1; after concatenation only the
+    first style found would be read, so every sheet uses the first sheet's.
+    names is {(pattern, zone_num): column} and is filled in as sheets arrive.
+    """
+    renames = {}
+    for key, pattern in mapping.items():
+        block = _zone_block(key)
+        if block is None or not pattern or pattern == "(None)":
+            continue
+        for zone_num in range(1, block[1] + 1):
+            col = find_zone_column(df.columns, pattern, zone_num)
+            if col is None:
+                continue
+            target = names.setdefault((pattern, zone_num), col)
+            if col != target and target not in df.columns:
+                renames[col] = target
+    return df.rename(columns=renames) if renames else df
+
+def load_batch(paths, mapping, overrides=None, all_sheets=True, max_workers=None):
+    """Parse several workbooks concurrently and concatenate them into one table.
+
+    Each sheet gets its override (by "Book.xlsx:Sheet", then "Sheet") applied so
+    all sheets line up with the base mapping. Rows keep workbook/sheet order, so
+    the RangeIndex of the result gives continuous program IDs across the batch;
+    SOURCE_COLUMN records "Book.xlsx:Sheet" for every row.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    overrides = overrides or {}
+    
+    workers = max_workers or min(len(paths), os.cpu_count() or 1)
+    if len(paths) > 1 and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(read_workbook_sheets, path, all_sheets) for path in paths]
+            results = [future.result() for future in futures]
+    else:
+        results = [read_workbook_sheets(path, all_sheets) for path in paths]
+    
+    frames = []
+    zone_names = {}
+    for path, sheets in zip(paths, results):
+        book = os.path.basename(path)
+        for sheet_name, sheet_df in sheets:
+            source = f"{book}:{sheet_name}"
+            override = overrides.get(source, overrides.get(sheet_name, {}))
+            sheet_df = apply_sheet_overrides(sheet_df, mapping, override)
+            sheet_df = align_zone_columns(sheet_df, mapping, zone_names)
+            sheet_df[SOURCE_COLUMN] = source
+            frames.append(sheet_df)
+    return pd.concat(frames, ignore_index=True, sort=False)
+
+# ==================== OUTPUT LAYOUT ====================
+OUTPUT_LAYOUTS = ["Flat", "Hash prefix", "Stencil prefix"]
+INDEX_FILE = "program_index.json"
+
+def safe_program_name(pcb_name):
+    """File-system safe program name (used for the XML file name)"""
+    return pcb_name.replace('/', '_').replace(' ', '_')
+
+def shard_directory(layout, safe_name, width=2):
+    """Relative sub-directory for one program under the given output layout"""
+    if layout == "Hash prefix":
+        return hashlib.sha1(safe_name.encode('utf-8')).hexdigest()[:width]
+    if layout == "Stencil prefix":
+        prefix = ''.join(c.upper() if c.isalnum() else '_' for c in safe_name[:width])
+        return prefix or "_"
+    return ""
+
+def plan_output_paths(names, layout):
+    """Relative output path (shard/name.xml) for every program name"""
+    return [os.path.join(shard_directory(layout, safe), f"{safe}.xml")
+            for safe in map(safe_program_name, names)]
+
+def prepare_shard_directories(output_dir, relative_paths):
+    """Create every shard directory once, up front (no per-file exists checks)"""
+    shards = sorted({os.path.dirname(path) for path in relative_paths})
+    for shard in shards:
+        os.makedirs(os.path.join(output_dir, shard), exist_ok=True)
+    return len(shards)
+
+def write_program_index(output_dir, index):
+    """Write the top-level stencil → relative path index"""
+    index_path = os.path.join(output_dir, INDEX_FILE)
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump({name: path.replace(os.sep, '/') for name, path in sorted(index.items())},
+                  f, indent=1)
+    return index_path
+
+# ==================== ID ALLOCATOR ====================
+ID_ALLOCATOR_DB = "ersa_ids.sqlite"
+
+class IdAllocator:
+    """Persistent program/history ID allocator backed by a local SQLite file.
+
+    reserve() hands out a consecutive block for a whole run in one
+    BEGIN IMMEDIATE transaction, so parallel generator processes on the same
+    machine never receive overlapping IDs. record_assignments() stores which
+    workbook/row received which ID.
+    """
+
+    def __init__(self, path=ID_ALLOCATOR_DB, timeout=30.0):
+        self.path = path
+        self.timeout = timeout
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS id_counters (
+                    kind TEXT PRIMARY KEY,
+                    next_id INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS id_reservations (
+                    reservation_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    workbook TEXT,
+                    program_start INTEGER NOT NULL,
+                    history_start INTEGER NOT NULL,
+                    count INTEGER NOT NULL,
+                    user TEXT,
+                    created TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS id_assignments (
+                    reservation_id INTEGER NOT NULL,
+                    workbook TEXT,
+                    row_index INTEGER,
+                    stencil TEXT,
+                    program_id INTEGER NOT NULL,
+                    history_id INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_assignments_program ON id_assignments(program_id);
+                CREATE INDEX IF NOT EXISTS idx_assignments_stencil ON id_assignments(stencil);
+            """)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+        return conn
+
+    def reserve(self, count, workbook=None, program_start=None, history_start=None):
+        """Reserve count program and history IDs; returns the reservation dict.
+
+        program_start/history_start act as floors (e.g. the Metadata tab
+        values): allocation continues from max(stored counter, floor).
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                starts = {}
+                for kind, floor in (('program', program_start), ('history', history_start)):
+                    row = conn.execute("SELECT next_id FROM id_counters WHERE kind = ?",
+                                       (kind,)).fetchone()
+                    start = max(row[0] if row else 1, floor or 0)
+                    conn.execute("INSERT OR REPLACE INTO id_counters (kind, next_id) VALUES (?, ?)",
+                                 (kind, start + count))
+                    starts[kind] = start
+                cursor = conn.execute(
+                    "INSERT INTO id_reservations (workbook, program_start, history_start, count, user, created) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (workbook, starts['program'], starts['history'], count,
+                     getpass.getuser(), datetime.now().isoformat()))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+        return {
+            'reservation_id': cursor.lastrowid,
+            'program_start': starts['program'],
+            'history_start': starts['history'],
+            'count': count,
+        }
+
+    def record_assignments(self, reservation_id, assignments):
+        """Store [(workbook, row_index, stencil, program_id, history_id)] in one transaction"""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT INTO id_assignments (reservation_id, workbook, row_index, stencil, program_id, history_id) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(reservation_id,) + tuple(assignment) for assignment in assignments])
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def lookup(self, program_id=None, stencil=None):
+        """Assignments for a program ID and/or stencil (most recent first)"""
+        clauses, args = [], []
+        if program_id is not None:
+            clauses.append("program_id = ?")
+            args.append(program_id)
+        if stencil is not None:
+            clauses.append("stencil = ?")
+            args.append(stencil)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        conn = self._connect()
+        try:
+            return conn.execute(
+                f"SELECT reservation_id, workbook, row_index, stencil, program_id, history_id "
+                f"FROM id_assignments {where} ORDER BY reservation_id DESC", args).fetchall()
+        finally:
+            conn.close()
+
+# ==================== PROGRAM CATALOG ====================
+CATALOG_DB = "ersa_catalog.sqlite"
+CATALOG_BATCH_SIZE = 5000
+CATALOG_COLUMNS = ['run_id', 'stencil', 'program_id', 'history_id', 'length', 'width',
+                   'cbs_width', 'cbs_active', 'park_active', 'zones', 'template_hash',
+                   'output_path', 'content_hash']
+
+class ProgramCatalog:
+    """Indexed SQLite catalog with one row per generated program"""
+
+    def __init__(self, path=CATALOG_DB):
+        self.path = path
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS runs (
+                    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    created TEXT NOT NULL,
+                    workbook TEXT,
+                    template TEXT,
+                    template_hash TEXT,
+                    output_dir TEXT
+                );
+                CREATE TABLE IF NOT EXISTS programs (
+                    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+                    stencil TEXT NOT NULL,
+                    program_id INTEGER,
+                    history_id INTEGER,
+                    length REAL,
+                    width REAL,
+                    cbs_width REAL,
+                    cbs_active INTEGER,
+                    park_active INTEGER,
+                    zones TEXT,
+                    template_hash TEXT,
+                    output_path TEXT,
+                    content_hash TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_programs_stencil ON programs(stencil);
+                CREATE INDEX IF NOT EXISTS idx_programs_width ON programs(width, cbs_active);
+                CREATE INDEX IF NOT EXISTS idx_programs_program_id ON programs(program_id);
+                CREATE INDEX IF NOT EXISTS idx_programs_content_hash ON programs(content_hash);
+                CREATE INDEX IF NOT EXISTS idx_programs_run ON programs(run_id);
+            """)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30.0)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def start_run(self, workbook, template, template_hash, output_dir):
+        """Register a generation run and return its run_id"""
+        conn = self._connect()
+        try:
+            with conn:
+                cursor = conn.execute(
+                    "INSERT INTO runs (created, workbook, template, template_hash, output_dir) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (datetime.now().isoformat(), workbook, template, template_hash, output_dir))
+            return cursor.lastrowid
+        finally:
+            conn.close()
+
+    def add_programs(self, rows, batch_size=CATALOG_BATCH_SIZE):
+        """Bulk-insert program dicts (keys: CATALOG_COLUMNS), one transaction per batch"""
+        sql = (f"INSERT INTO programs ({', '.join(CATALOG_COLUMNS)}) "
+               f"VALUES ({', '.join('?' * len(CATALOG_COLUMNS))})")
+        conn = self._connect()
+        try:
+            for start in range(0, len(rows), batch_size):
+                with conn:
+                    conn.executemany(sql, [tuple(row.get(col) for col in CATALOG_COLUMNS)
+                                           for row in rows[start:start + batch_size]])
+        finally:
+            conn.close()
+
+    def query(self, stencil=None, stencil_like=None, program_id=None, width=None,
+              min_width=None, max_width=None, cbs_active=None, park_active=None,
+              run_id=None, content_hash=None, limit=100):
+        """Look up programs; every given filter must match. Newest runs first."""
+        filters = [
+            ("stencil = ?", stencil),
+            ("stencil LIKE ?", stencil_like),
+            ("program_id = ?", program_id),
+            ("width = ?", width),
+            ("width >= ?", min_width),
+            ("width <= ?", max_width),
+            ("cbs_active = ?", None if cbs_active is None else int(cbs_active)),
+            ("park_active = ?", None if park_active is None else int(park_active)),
+            ("run_id = ?", run_id),
+            ("content_hash = ?", content_hash),
+        ]
+        clauses = [clause for clause, value in filters if value is not None]
+        args = [value for clause, value in filters if value is not None]
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                f"SELECT * FROM programs {where} ORDER BY run_id DESC, program_id LIMIT ?",
+                args + [limit]).fetchall()
+            return [dict(row) for row in rows]
+        finally:
+            conn.close()
+
+    def latest_programs(self):
+        """Newest catalog row of every stencil"""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT p.* FROM programs p JOIN (SELECT stencil, MAX(run_id) AS run_id FROM programs "
+                "GROUP BY stencil) newest USING (stencil, run_id) ORDER BY p.stencil").fetchall()
+            return [dict(row) for row in rows]
+        finally:
+            conn.close()
+
+    def fingerprint(self):
+        """(newest run id, program rows): changes whenever programs are recorded"""
+        conn = self._connect()
+        try:
+            return tuple(conn.execute("SELECT MAX(run_id), COUNT(*) FROM programs").fetchone())
+        finally:
+            conn.close()
+
+def file_sha256(path):
+    """sha256 hex digest of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# ==================== OUTPUT STORE ====================
+OUTPUT_STORE_DIR = "ersa_store"
+# Creation/change dates and (with the ID allocator) program/history IDs differ on
+# every run; stored bodies carry these tokens instead
+STORE_TIMESTAMP = "@@ERSA_TIMESTAMP@@"
+STORE_PROGRAM_ID = "@@ERSA_PROGRAM_ID@@"
+STORE_HISTORY_ID = "@@ERSA_HISTORY_ID@@"
+
+def fill_store_tokens(body, entry):
+    """Canonical body with the run's dates and IDs of a manifest entry put back"""
+    body = body.replace(STORE_TIMESTAMP, entry['stamp'])
+    if 'program_id' in entry:    # manifests written before IDs were tokenized keep them in the body
+        body = body.replace(STORE_PROGRAM_ID, str(entry['program_id']))
+        body = body.replace(STORE_HISTORY_ID, str(entry['history_id']))
+    return body
+
+class OutputStore:
+    """Content-addressed history of generated programs.
+
+    Each program body is stored once, gzip-compressed, under the SHA-256 of
+    its text with the creation/change dates and the program/history IDs
+    replaced by tokens, so unchanged programs cost nothing on the next run
+    even when new IDs were allocated. A run manifest maps
+    stencil → {hash, path, stamp, program_id, history_id}; materialize()
+    rebuilds the exact files.
+    """
+
+    def __init__(self, root=OUTPUT_STORE_DIR):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.runs_dir = os.path.join(root, "runs")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.runs_dir, exist_ok=True)
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], f"{digest[2:]}.xml.gz")
+
+    def put(self, body):
+        """Store one canonical body (str); returns (hash, newly_stored)"""
+        data = body.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            return digest, False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # unique temp name + atomic rename: concurrent writers of the same body are harmless
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(gzip.compress(data, compresslevel=6))
+        os.replace(tmp_path, path)
+        return digest, True
+
+    def get(self, digest):
+        """Canonical body for a hash"""
+        with open(self._object_path(digest), 'rb') as f:
+            return gzip.decompress(f.read()).decode('utf-8')
+
+    def save_run(self, programs, info=None):
+        """Write a run manifest ({stencil: {hash, path, stamp, IDs}}); returns the run id"""
+        run_id = datetime.now().strftime('%Y%m%d-%H%M%S')
+        suffix = 1
+        while os.path.exists(self._run_path(run_id if suffix == 1 else f"{run_id}-{suffix}")):
+            suffix += 1
+        run_id = run_id if suffix == 1 else f"{run_id}-{suffix}"
+        manifest = {'run_id': run_id, 'created': datetime.now().isoformat(), **(info or {}),
+                    'programs': programs}
+        with gzip.open(self._run_path(run_id), 'wt', encoding='utf-8') as f:
+            json.dump(manifest, f, separators=(',', ':'))
+        return run_id
+
+    def _run_path(self, run_id):
+        return os.path.join(self.runs_dir, f"{run_id}.json.gz")
+
+    def runs(self):
+        """Run ids, oldest first"""
+        return sorted(name[:-len(".json.gz")] for name in os.listdir(self.runs_dir)
+                      if name.endswith(".json.gz"))
+
+    def load_run(self, run_id):
+        """Run manifest; run_id may be "latest" or "previous" """
+        runs = self.runs()
+        if run_id in ("latest", "previous"):
+            needed = 1 if run_id == "latest" else 2
+            if len(runs) < needed:
+                raise ValueError(f"Store has {len(runs)} run(s); no '{run_id}' run")
+            run_id = runs[-needed]
+        if run_id not in runs:
+            raise ValueError(f"Unknown run '{run_id}' (store has {len(runs)} runs)")
+        with gzip.open(self._run_path(run_id), 'rt', encoding='utf-8') as f:
+            return json.load(f)
+
+    def program_bytes(self, entry):
+        """Exact file content of one manifest entry"""
+        return (XML_DECLARATION + fill_store_tokens(self.get(entry['hash']), entry)).encode('utf-8')
+
+    def materialize(self, run_id, output_dir, stencils=None):
+        """Recreate the files of a run (optionally only some stencils); returns the count"""
+        programs = self.load_run(run_id)['programs']
+        if stencils is not None:
+            programs = {name: programs[name] for name in stencils if name in programs}
+        prepare_shard_directories(output_dir, [entry['path'] for entry in programs.values()])
+        for entry in programs.values():
+            with open(os.path.join(output_dir, entry['path']), 'wb') as f:
+                f.write(self.program_bytes(entry))
+        write_program_index(output_dir, {name: entry['path'] for name, entry in programs.items()})
+        return len(programs)
+
+    def diff(self, run_a, run_b):
+        """Stencils added, removed and changed from run_a to run_b (dates and IDs are ignored)"""
+        a = self.load_run(run_a)['programs']
+        b = self.load_run(run_b)['programs']
+        return {
+            'added': sorted(set(b) - set(a)),
+            'removed': sorted(set(a) - set(b)),
+            'changed': sorted(name for name in set(a) & set(b) if a[name]['hash'] != b[name]['hash']),
+            'unchanged': sum(1 for name in set(a) & set(b) if a[name]['hash'] == b[name]['hash']),
+        }
+
+    def size(self):
+        """(object count, bytes on disk) of the object store"""
+        count = total = 0
+        for root, _dirs, files in os.walk(self.objects_dir):
+            for name in files:
+                count += 1
+                total += os.path.getsize(os.path.join(root, name))
+        return count, total
+
+# ==================== GENERATION ENGINE ====================
+# Fixed ERSA variable paths written by the generator
+VAR_PCB_LENGTH = 'enmProg|enmPcb|enmSngSollLaenge'
+VAR_PCB_WIDTH = 'enmProg|enmA_AxBr|1|enmSngSoll'
+VAR_CBS_WIDTH = 'enmProg|enmA_Tr|1|enmSngSoll'
+VAR_CBS_ACTIVE = 'enmProg|enmA_Tr|1|enmBlnSollAktiv'
+VAR_PARK_ACTIVE = 'enmProg|enmA_AxMu|1|enmBlnParkPosSollAktiv'
+
+DEFAULT_METADATA = {
+    'programid_start': 10000,
+    'libraryid': 100,
+    'version': 1,
+    'setnumber': 1,
+    'historyid_start': 6000,
+    'userid': 881,
+    'notes': "Auto-generated by ERSA tool",
+}
+
+def program_names(df, mapping):
+    """STENCIL of every row (Program_<n> when no name column is mapped)"""
+    col = mapping.get('STENCIL')
+    if col and col != "(None)" and col in df.columns:
+        return df[col].astype(str).tolist()
+    return [f"Program_{idx+1}" for idx in df.index]
+
+def measure_series(series):
+    """Positive floats of a column; NaN for blank/0/NA/N/A/-/invalid cells"""
+    if not pd.api.types.is_numeric_dtype(series):
+        # strings like " 75 " are accepted, "NA"/"N/A"/"-" become NaN
+        series = series.astype(str).str.strip()
+    numbers = pd.to_numeric(series, errors='coerce').astype(float)
+    return numbers.where(numbers > 0)
+
+def value_texts(numbers):
+    """Float column → value texts as written to XML (None where NaN)"""
+    return numbers.astype(str).astype(object).where(numbers.notna(), None)
+
+def index_program_parameters(root):
+    """{variable_path: <value> element} for every ProgramParameter (first match wins)"""
+    index = {}
+    for param in root.iter('ProgramParameter'):
+        var = param.find('variable')
+        val = param.find('value')
+        if var is not None and val is not None and var.text not in index:
+            index[var.text] = val
+    return index
+
+CUSTOM_BINDINGS_FILE = "custom_bindings.json"
+PARAMETER_LIST_LIMIT = 500  # rows shown in the parameter browser
+_TRUE_TEXTS = {'true', '1', '1.0', 'yes', 'y', 'x', 'on'}
+_FALSE_TEXTS = {'false', '0', '0.0', 'no', 'n', 'off'}
+
+class TemplateParameterIndex:
+    """Every ProgramParameter of a template (path, value, datatype), sorted for search.
+
+    search() finds prefix matches by bisection on the sorted lower-case
+    paths and substring matches with one linear scan, so it stays instant
+    for tens of thousands of parameters.
+    """
+
+    def __init__(self, root):
+        rows = {}
+        for param in root.iter('ProgramParameter'):
+            var = param.find('variable')
+            val = param.find('value')
+            if var is None or val is None or not var.text or var.text in rows:
+                continue
+            datatype = param.find('datatype')
+            rows[var.text] = (val.text or "", datatype.text if datatype is not None and datatype.text else "")
+        self.paths = sorted(rows, key=str.lower)
+        self.values = [rows[path][0] for path in self.paths]
+        self.datatypes = [rows[path][1] for path in self.paths]
+        self._lower = [path.lower() for path in self.paths]
+        self._types = {path: rows[path][1] for path in self.paths}
+
+    @classmethod
+    def from_file(cls, path):
+        return cls(ET.parse(path).getroot())
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __contains__(self, path):
+        return path in self._types
+
+    def datatype(self, path):
+        return self._types.get(path, "")
+
+    def search(self, query, limit=None):
+        """Positions of matching parameters: prefix matches first, then substrings"""
+        query = query.strip().lower()
+        if not query:
+            return list(range(len(self.paths) if limit is None else min(limit, len(self.paths))))
+        lo = bisect.bisect_left(self._lower, query)
+        hi = bisect.bisect_left(self._lower, query + "\uffff")
+        matches = list(range(lo, hi))
+        matches += [i for i, path in enumerate(self._lower) if query in path and not lo <= i < hi]
+        return matches if limit is None else matches[:limit]
+
+def binding_texts(series, datatype):
+    """Cell values → value texts for a template datatype (None keeps the template value)"""
+    kind = (datatype or "").lower()
+    text = series.astype(str).str.strip()
+    if kind == 'boolean':
+        lowered = text.str.lower()
+        return pd.Series(np.where(lowered.isin(_TRUE_TEXTS), 'True',
+                                  np.where(lowered.isin(_FALSE_TEXTS), 'False', None)),
+                         index=series.index, dtype=object)
+    if kind in ('single', 'double', 'decimal') or kind.startswith(('int', 'uint')):
+        numbers = pd.to_numeric(series if pd.api.types.is_numeric_dtype(series) else text,
+                                errors='coerce').astype(float)
+        numbers = numbers.where(np.isfinite(numbers))
+        if kind.startswith(('int', 'uint')):
+            return numbers.round().astype('Int64').astype(str).astype(object).where(numbers.notna(), None)
+        return value_texts(numbers)
+    return text.astype(object).where(series.notna() & (text != ""), None)
+
+def load_custom_bindings(path=CUSTOM_BINDINGS_FILE):
+    """{variable_path: column} bindings saved from the parameter browser"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def program_metadata_values(program_name, program_id, history_id, metadata, now=None):
+    """{(section, tag): text} for the SolderingPrograms / ProgramHistory metadata"""
+    now = now or datetime.now().isoformat()
+    values = {
+        ('SolderingPrograms', 'programid'): program_id,
+        ('SolderingPrograms', 'libraryid'): metadata['libraryid'],      # FIXED (not incremented)
+        ('SolderingPrograms', 'version'): metadata['version'],
+        ('SolderingPrograms', 'creationuser'): metadata['userid'],      # SINGLE User ID
+        ('SolderingPrograms', 'changeuser'): metadata['userid'],
+        ('SolderingPrograms', 'creationdate'): now,
+        ('SolderingPrograms', 'changedate'): now,
+        ('SolderingPrograms', 'notes'): metadata['notes'],
+        ('SolderingPrograms', 'name'): program_name,
+        ('ProgramHistory', 'historyid'): history_id,
+        ('ProgramHistory', 'setnumber'): metadata['setnumber'],        # FIXED (not incremented)
+        ('ProgramHistory', 'creationuser'): metadata['userid'],
+        ('ProgramHistory', 'changeuser'): metadata['userid'],
+        ('ProgramHistory', 'creationdate'): now,
+        ('ProgramHistory', 'changedate'): now,
+    }
+    return {key: str(value) for key, value in values.items()}
+
+XML_DECLARATION = "<?xml version='1.0' encoding='utf-8'?>\n"
+_SLOT_MARKER = re.compile(r'@@ERSA_SLOT_(\d+)@@')
+
+class CompiledTemplate:
+    """Template serialized once into constant text chunks and value slots.
+
+    Every ProgramParameter <value> (first occurrence per variable path) and
+    every metadata field becomes a slot; render() joins the chunks with the
+    escaped per-program values, so no tree is cloned or serialized per program.
+    """
+
+    def __init__(self, template_root):
+        marked = copy.deepcopy(template_root)
+        slot_keys = []
+        defaults = []
+
+        def mark(element, key):
+            defaults.append(xml_escape(element.text or ""))
+            slot_keys.append(key)
+            element.text = f"@@ERSA_SLOT_{len(slot_keys) - 1}@@"
+
+        for variable_path, element in index_program_parameters(marked).items():
+            mark(element, ('param', variable_path))
+        for section, tag in program_metadata_values('', 0, 0, DEFAULT_METADATA):
+            node = marked.find(section)
+            child = node.find(tag) if node is not None else None
+            if child is not None:
+                mark(child, ('meta', (section, tag)))
+
+        text = ET.tostring(marked, encoding='unicode')
+        if len(_SLOT_MARKER.findall(text)) != len(slot_keys):
+            raise ValueError("Template text collides with slot markers")
+        parts = _SLOT_MARKER.split(text)
+        # parts alternates: chunk, slot number, chunk, slot number, ..., chunk
+        self.chunks = parts[0::2]
+        order = [int(number) for number in parts[1::2]]
+        self.slot_keys = [slot_keys[i] for i in order]
+        self.defaults = [defaults[i] for i in order]
+        self.param_paths = {key[1] for key in slot_keys if key[0] == 'param'}
+
+    def render(self, params, meta):
+        """Program body (no XML declaration) with params {path: text} and meta {(section, tag): text}"""
+        out = [self.chunks[0]]
+        for i, (kind, key) in enumerate(self.slot_keys):
+            text = params.get(key) if kind == 'param' else meta.get(key)
+            out.append(self.defaults[i] if text is None else xml_escape(text))
+            out.append(self.chunks[i + 1])
+        return ''.join(out)
+
+# ==================== STREAMING EXPORT ====================
+EXPORT_ROOT_TAG = "ErsaProgramExport"
+
+EXPORT_FILE = "ersa_programs_export.xml"
+# Files-tab export modes: (write program files, combined export file or None)
+EXPORT_MODES = {
+    "Program files": (True, None),
+    "Combined XML": (False, EXPORT_FILE),
+    "Combined XML (gzip)": (False, EXPORT_FILE + ".gz"),
+    "Files + combined XML (gzip)": (True, EXPORT_FILE + ".gz"),
+}
+
+class StreamingExport:
+    """Single multi-program XML document written incrementally (gzip for *.gz)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        if path.endswith('.gz'):
+            self._file = gzip.open(path, 'wt', encoding='utf-8', compresslevel=6)
+        else:
+            self._file = open(path, 'w', encoding='utf-8')
+        self._file.write(XML_DECLARATION)
+        self._file.write(f'<{EXPORT_ROOT_TAG} created="{datetime.now().isoformat()}">\n')
+
+    def add(self, body):
+        """Append one rendered program body"""
+        self._file.write(body)
+        self._file.write("\n")
+        self.count += 1
+
+    def close(self):
+        self._file.write(f"</{EXPORT_ROOT_TAG}>\n")
+        self._file.close()
+
+def _log_to_stdout(message, color=None):
+    print(message)
+
+class ProgramGenerator:
+    """Headless generation engine shared by the GUI and the command line.
+
+    settings is a plain dict (see ERSAProgramGeneratorGUI.collect_generation_settings):
+    template_path, output_dir, mapping, metadata, zone_paths, output_layout,
+    machine_rules, writer_threads, verify, queue_size, workbook, id_allocator,
+    catalog, write_files, stream_export, output_store, custom_bindings,
+    thermal_profile.
+
+    run() is pipelined: the calling thread prepares rows, a render thread
+    fills the compiled template (and feeds the streaming export, if any), a
+    small writer pool writes the program files and an
+    optional verify thread re-parses each written file. Stages are joined by
+    bounded queues so disk latency overlaps CPU work and memory stays capped.
+    """
+
+    def __init__(self, settings, log=None, zone_overrides=None):
+        self.settings = settings
+        self.log = log or _log_to_stdout
+        self.zone_overrides = zone_overrides
+        self.metadata = {**DEFAULT_METADATA, **settings.get('metadata', {})}
+        self._lock = threading.Lock()
+
+    def _column(self, key):
+        col = self.settings['mapping'].get(key)
+        return col if col and col != "(None)" and col in self.df.columns else None
+
+    def program_names(self, df):
+        return program_names(df, self.settings['mapping'])
+
+    # ---------- planning (no side effects) ----------
+    def prepare(self, df):
+        """Parse the template and compute every row's values in vectorized passes"""
+        self.df = df
+        settings = self.settings
+        mapping = settings['mapping']
+        
+        # Parse template
+        self.log("\nParsing template XML...\n")
+        self.template_root = ET.parse(settings['template_path']).getroot()
+        self.log("\n✓ Template loaded\n")
+        self.template_hash = file_sha256(settings['template_path'])
+        self.compiled = CompiledTemplate(self.template_root)
+        self.parameters = TemplateParameterIndex(self.template_root)
+        
+        # Get column mappings
+        self.length_col = self._column('PCB_Length')
+        self.width_col = self._column('PCB_Width')
+        self.cbs_col = self._column('CBS_Width')
+        
+        self.log(f"\nColumn Mapping:")
+        self.log(f"\n  PCB Name: {mapping.get('STENCIL', '(None)')}")
+        self.log(f"\n  PCB Length: {mapping.get('PCB_Length', '(None)')}")
+        self.log(f"\n  PCB Width: {mapping.get('PCB_Width', '(None)')}")
+        self.log(f"\n  CBS Width: {mapping.get('CBS_Width', '(None)')}")
+        
+        # Program names and output paths for every row
+        self.names = self.program_names(df)
+        layout = settings.get('output_layout', "Flat")
+        if layout not in OUTPUT_LAYOUTS:
+            raise ValueError(f"Unknown output layout '{layout}' (choose from {', '.join(OUTPUT_LAYOUTS)})")
+        self.relative_paths = plan_output_paths(self.names, layout)
+        self.sources = df[SOURCE_COLUMN].to_numpy() if SOURCE_COLUMN in df.columns else None
+        
+        # Zone values: Excel sheet merged with saved per-program edits in one step
+        zone_start = time.perf_counter()
+        self.zone_matrix = build_zone_matrix(df, mapping)
+        overridden = self.zone_overrides.apply(self.zone_matrix, self.names) if self.zone_overrides else 0
+        zone_paths = settings.get('zone_paths', {})
+        self.zone_targets = [(slot, param_idx, zone_paths[f"{zone_key}_{param}"])
+                             for slot, zone_key in enumerate(ZONE_SLOTS)
+                             for param_idx, param in enumerate(ZONE_PARAMS)
+                             if f"{zone_key}_{param}" in zone_paths]
+        self.log(f"\nZone values: {overridden} programs with overrides, "
+                 f"{len(self.zone_targets)} zone parameters mapped to XML "
+                 f"({(time.perf_counter() - zone_start) * 1000:.0f} ms)\n")
+        
+        # Machine-limit rules: one vectorized pass, zones as they will be written
+        rule_start = time.perf_counter()
+        self.rule_pass, self.violations = evaluate_machine_rules(
+            df, mapping, settings.get('machine_rules', DEFAULT_MACHINE_RULES),
+            zone_matrix=self.zone_matrix)
+        self.rule_reasons = summarize_violations(self.violations)
+        self.log(f"\nMachine rules: {int(self.rule_pass.sum())}/{len(df)} programs pass "
+                 f"({len(self.violations)} violations, "
+                 f"{(time.perf_counter() - rule_start) * 1000:.0f} ms)\n")
+        
+        self._build_bindings(df)
+        if self.cbs_col:
+            active = ~np.isnan(self.cbs_values)
+            blank = ~active & self.cbs_blank
+            self.log(f"\nCBS: {int(active.sum())} programs CBS_Active; Park_Active for {int(blank.sum())} "
+                     f"with NA/empty CBS and {int((~active & ~blank).sum())} with an invalid value\n")
+        
+        # Generated rows sharing an output file (duplicate names): the last row's program is kept
+        generated = np.array([reason is None for reason in self.skip_reasons], dtype=bool)
+        paths = pd.Series(self.relative_paths, dtype=object)[generated]
+        self.superseded = np.zeros(len(df), dtype=bool)
+        self.superseded[generated] = paths.duplicated(keep='last').to_numpy()
+        shared = paths.duplicated(keep=False).to_numpy()
+        if shared.any():
+            names = np.asarray(self.names, dtype=object)[generated][shared]
+            examples = list(dict.fromkeys(names))
+            self.log(f"\n⚠ {int(shared.sum())} rows share an output file with another row "
+                     f"(duplicate program names: {', '.join(examples[:5])}{', ...' if len(examples) > 5 else ''}); "
+                     f"the last row of each name is kept\n", color='red')
+        
+        # Thermal profile estimate: reported only, flagged programs are still generated
+        self.thermal = None
+        if settings.get('thermal_profile') and not has_zone_temperatures(self.zone_matrix):
+            self.log("\nThermal profile estimate skipped: no zone temperatures mapped\n")
+        elif settings.get('thermal_profile'):
+            profile_start = time.perf_counter()
+            self.thermal = estimate_thermal_profiles(self.zone_matrix, self.length_values,
+                                                     self.width_values, settings['thermal_profile'])
+            self.thermal.index = df.index
+            self.thermal.insert(0, 'Program', self.names)
+            log_thermal_report(self.thermal, self.log, (time.perf_counter() - profile_start) * 1000)
+
+    def _build_bindings(self, df):
+        """Skip reasons and a (rows × variable paths) table of value texts"""
+        missing = pd.Series(np.nan, index=df.index)
+        length = measure_series(df[self.length_col]) if self.length_col else missing
+        width = measure_series(df[self.width_col]) if self.width_col else missing
+        
+        # Require BOTH length and width to be valid; if either is missing/zero/invalid, skip this program
+        measured = (length.notna() & width.notna()).to_numpy()
+        reasons = np.full(len(df), None, dtype=object)
+        reasons[~measured] = "Missing/invalid PCB Length or PCB Width (blank/0/NA/invalid) — both required"
+        rule_failed = measured & ~self.rule_pass.to_numpy()
+        reasons[rule_failed] = [f"Machine rule violation: {self.rule_reasons.get(idx, '')}"
+                                for idx in df.index[rule_failed]]
+        self.skip_reasons = reasons
+        
+        columns = {VAR_PCB_LENGTH: value_texts(length), VAR_PCB_WIDTH: value_texts(width)}
+        
+        # CBS and Park Position Logic: valid CBS → CBS active, otherwise park position
+        self.cbs = missing
+        self.cbs_blank = np.zeros(len(df), dtype=bool)
+        if self.cbs_col:
+            raw = df[self.cbs_col]
+            self.cbs = measure_series(raw)
+            self.cbs_blank = (raw.isna() | (raw.astype(str).str.strip().str.upper() == 'NA')).to_numpy()
+            active = self.cbs.notna().to_numpy()
+            columns[VAR_CBS_WIDTH] = value_texts(self.cbs)
+            columns[VAR_CBS_ACTIVE] = pd.Series(np.where(active, 'True', None), index=df.index)
+            columns[VAR_PARK_ACTIVE] = pd.Series(np.where(active, 'False', 'True'), index=df.index)
+        
+        # Zone parameters (Excel values merged with saved overrides)
+        for slot, param_idx, variable_path in self.zone_targets:
+            values = np.round(self.zone_matrix[:, slot, param_idx].astype(np.float64), 3)
+            columns[variable_path] = value_texts(pd.Series(values, index=df.index))
+        
+        # Custom bindings from the parameter browser: any variable path ← any column
+        for variable_path, column in (self.settings.get('custom_bindings') or {}).items():
+            if variable_path not in self.parameters:
+                self.log(f"⚠ Custom binding skipped: {variable_path} is not in the template", color='red')
+                continue
+            if column not in df.columns:
+                self.log(f"⚠ Custom binding skipped: column '{column}' not found", color='red')
+                continue
+            texts = binding_texts(df[column], self.parameters.datatype(variable_path))
+            if variable_path in columns:
+                # blank cells keep the built-in value
+                texts = texts.where(texts.notna(), columns[variable_path])
+            columns[variable_path] = texts
+        
+        self.bindings = pd.DataFrame(columns, index=df.index)
+        self.binding_paths = list(self.bindings.columns)
+        self.binding_values = self.bindings.to_numpy(dtype=object)
+        self.length_values = length.to_numpy()
+        self.width_values = width.to_numpy()
+        self.cbs_values = self.cbs.to_numpy()
+
+    def change_plan(self, df):
+        """Dry run: long table of template vs. new value per generated row and variable"""
+        self.prepare(df)
+        generate = np.array([reason is None for reason in self.skip_reasons], dtype=bool)
+        row_numbers = df.index.to_numpy()[generate] + 1
+        names = np.asarray(self.names, dtype=object)[generate]
+        
+        # Bound variables plus metadata (creation/change dates are set at generation time;
+        # IDs show the typed start values — allocator blocks are reserved only when generating)
+        template_values = {path: element.text
+                           for path, element in index_program_parameters(self.template_root).items()}
+        variables = {path: self.bindings[path].to_numpy(dtype=object)[generate]
+                     for path in self.binding_paths if path in template_values}
+        offsets = df.index.to_numpy()[generate]
+        meta_values = {
+            ('SolderingPrograms', 'programid'): (self.metadata['programid_start'] + offsets).astype(str),
+            ('SolderingPrograms', 'name'): names,
+            ('ProgramHistory', 'historyid'): (self.metadata['historyid_start'] + offsets).astype(str),
+        }
+        for key, text in program_metadata_values('', 0, 0, self.metadata).items():
+            if key not in meta_values and not key[1].endswith('date'):
+                meta_values[key] = np.full(len(names), text, dtype=object)
+        for (section, tag), values in meta_values.items():
+            node = self.template_root.find(section)
+            child = node.find(tag) if node is not None else None
+            if child is not None:
+                template_values[f"{section}|{tag}"] = child.text
+                variables[f"{section}|{tag}"] = values
+        
+        missing = [path for path in self.binding_paths if path not in template_values]
+        if missing:
+            self.log(f"⚠ {len(missing)} bound variables not in template: {', '.join(missing[:10])}")
+        
+        frames = []
+        for variable, values in variables.items():
+            present = np.array([isinstance(value, str) for value in values], dtype=bool)
+            frames.append(pd.DataFrame({
+                'Position': np.flatnonzero(present),
+                'Row': row_numbers[present],
+                'Program': names[present],
+                'Variable': variable,
+                'Template_Value': template_values[variable],
+                'New_Value': values[present],
+            }))
+        plan = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(
+            columns=['Position', 'Row', 'Program', 'Variable', 'Template_Value', 'New_Value'])
+        plan = plan.sort_values('Position', kind='stable').drop(columns='Position').reset_index(drop=True)
+        plan['Changed'] = plan['New_Value'] != plan['Template_Value'].fillna('')
+        self.plan_skipped = [{'Program': self.names[pos], 'Reason': reason}
+                             for pos, reason in enumerate(self.skip_reasons) if reason is not None]
+        return plan
+
+    # ---------- stage 1: row prep ----------
+    def _prepare_row(self, pos, idx):
+        """Render job for one planned row (None when skipped; only skips are logged per row)"""
+        pcb_name = self.names[pos]
+        if self.skip_reasons[pos] is not None:
+            source = f" ({self.sources[pos]})" if self.sources is not None else ""
+            self._skip(pcb_name, self.skip_reasons[pos], f"Row {idx + 1}{source}: ")
+            return None
+        
+        cbs_active = not np.isnan(self.cbs_values[pos])
+        catalog = None
+        if self.catalog is not None:
+            catalog = {
+                'length': float(self.length_values[pos]),
+                'width': float(self.width_values[pos]),
+                'cbs_width': float(self.cbs_values[pos]) if cbs_active else None,
+                'cbs_active': int(cbs_active),
+                'park_active': None if not self.cbs_col else int(not cbs_active),
+                'zones': self._zone_json(pos),
+            }
+        
+        return {
+            'catalog': catalog,
+            'pos': pos,
+            'name': pcb_name,
+            'path': self.relative_paths[pos],
+            'row': idx,
+            'source': self.sources[pos] if self.sources is not None else self.settings.get('workbook'),
+            'program_id': self.program_id_base + self.id_offsets[pos],    # AUTO-INCREMENT
+            'history_id': self.history_id_base + self.id_offsets[pos],    # AUTO-INCREMENT
+            'updates': [(path, text) for path, text in zip(self.binding_paths, self.binding_values[pos])
+                        if isinstance(text, str)],
+        }
+
+    def _zone_json(self, pos):
+        """Non-empty zone values of one program as compact JSON"""
+        values = self.zone_matrix[pos]
+        slots, params = np.nonzero(~np.isnan(values))
+        return json.dumps({f"{ZONE_SLOTS[slot]}_{ZONE_PARAMS[param]}": round(float(values[slot, param]), 3)
+                           for slot, param in zip(slots, params)}, separators=(',', ':'))
+
+    def _skip(self, pcb_name, reason, where=""):
+        self.skipped.append({'Program': pcb_name, 'Reason': reason})
+        self.log(f"  ✗ {where}Skipped {pcb_name} — {reason}", color='red')
+
+    # ---------- stage 2: render ----------
+    def render(self, job):
+        """Program body for one job (compiled template + metadata + parameters)"""
+        params = dict(job['updates'])
+        if self.store is None:
+            meta = program_metadata_values(job['name'], job['program_id'], job['history_id'], self.metadata)
+            return self.compiled.render(params, meta)
+        # Output store: keep the date- and ID-free body for hashing, fill them in afterwards
+        job['stamp'] = datetime.now().isoformat()
+        meta = program_metadata_values(job['name'], STORE_PROGRAM_ID, STORE_HISTORY_ID, self.metadata,
+                                       now=STORE_TIMESTAMP)
+        job['canonical'] = self.compiled.render(params, meta)
+        return fill_store_tokens(job['canonical'], job)
+
+    def _render_stage(self):
+        while True:
+            job = self.render_queue.get()
+            if job is None:
+                break
+            try:
+                body = self.render(job)
+                if self.export is not None:
+                    # Single thread here, so the export keeps row order
+                    self.export.add(body)
+                if self.write_files:
+                    job['data'] = (XML_DECLARATION + body).encode('utf-8')
+                    # one writer per output path: rows with the same file never write concurrently
+                    self.write_queues[hash(job['path']) % self.writer_count].put(job)
+                else:
+                    self._record(job, os.path.basename(self.export.path), body.encode('utf-8'))
+            except Exception as e:
+                self.log(f"  ✗ Error: {str(e)}\n")
+                self.log(traceback.format_exc())
+        for write_queue in self.write_queues:
+            write_queue.put(None)
+
+    # ---------- stage 3: write ----------
+    def _record(self, job, output_path, data):
+        """Bookkeeping for one successfully written program"""
+        # a row overwritten by a later row with the same name is neither stored nor catalogued
+        superseded = self.superseded[job['pos']]
+        catalog = job['catalog'] if not superseded else None
+        content_hash = hashlib.sha256(data).hexdigest() if catalog is not None else None
+        canonical = job.pop('canonical', None)
+        stored = self.store.put(canonical) if self.store is not None and not superseded else None
+        with self._lock:
+            if stored is not None:
+                self.store_entries[job['name']] = {'hash': stored[0], 'path': job['path'].replace(os.sep, '/'),
+                                                   'stamp': job['stamp'], 'program_id': int(job['program_id']),
+                                                   'history_id': int(job['history_id'])}
+                self.store_new += stored[1]
+            self.program_index[job['name']] = output_path
+            self.output_rows.append((int(job['row']), output_path))
+            self.assignments.append((job['source'], int(job['row']), job['name'],
+                                     int(job['program_id']), int(job['history_id'])))
+            if catalog is not None:
+                self.catalog_rows.append({
+                    **catalog,
+                    'run_id': self.catalog_run_id,
+                    'stencil': job['name'],
+                    'program_id': int(job['program_id']),
+                    'history_id': int(job['history_id']),
+                    'template_hash': self.template_hash,
+                    'output_path': output_path.replace(os.sep, '/'),
+                    'content_hash': content_hash,
+                })
+            self.success_count += 1
+
+    def _write_stage(self, write_queue):
+        while True:
+            job = write_queue.get()
+            if job is None:
+                break
+            try:
+                with open(os.path.join(self.output_dir, job['path']), 'wb') as f:
+                    f.write(job['data'])
+                self._record(job, job['path'], job['data'])
+                if self.verify_queue is not None and not self.superseded[job['pos']]:
+                    del job['data']
+                    self.verify_queue.put(job)
+            except Exception as e:
+                self.log(f"  ✗ Error writing {job['path']}: {str(e)}\n")
+
+    # ---------- stage 4: verify (optional) ----------
+    def _verify_stage(self):
+        while True:
+            job = self.verify_queue.get()
+            if job is None:
+                break
+            try:
+                params = index_program_parameters(
+                    ET.parse(os.path.join(self.output_dir, job['path'])).getroot())
+                mismatches = [path for path, text in job['updates']
+                              if path in params and params[path].text != text]
+            except Exception as e:
+                mismatches = [f"unreadable ({str(e)})"]
+            if mismatches:
+                with self._lock:
+                    self.verify_failures.append({'Program': job['name'], 'Reason': mismatches})
+                self.log(f"  ✗ Verify failed for {job['path']}: {', '.join(mismatches)}", color='red')
+
+    def _log_progress(self, done):
+        """One summary line per batch of rows: progress and pipeline queue depths"""
+        depths = [f"render {self.render_queue.qsize()}/{self.queue_size}",
+                  f"write {sum(q.qsize() for q in self.write_queues)}/{self.queue_size * self.writer_count}"]
+        if self.verify_queue is not None:
+            depths.append(f"verify {self.verify_queue.qsize()}/{self.queue_size}")
+        self.log(f"\n[{done}/{len(self.df)}] {self.success_count} written, {len(self.skipped)} skipped "
+                 f"(queue depths: {', '.join(depths)})\n")
+
+    def run(self, df):
+        """Generate one program per row of df; returns a result summary dict"""
+        settings = self.settings
+        self.output_dir = settings['output_dir']
+        self.skipped = []
+        self.program_index = {}
+        self.output_rows = []
+        self.verify_failures = []
+        self.success_count = 0
+        
+        # Create output directory
+        if not os.path.exists(self.output_dir):
+            os.makedirs(self.output_dir)
+            self.log(f"\n✓ Created output folder: {self.output_dir}\n")
+        
+        self.prepare(df)
+        
+        # Output targets: one file per program and/or a single streamed export document
+        self.write_files = settings.get('write_files', True)
+        self.export = None
+        if settings.get('stream_export'):
+            self.export = StreamingExport(os.path.join(self.output_dir, settings['stream_export']))
+            self.log(f"\n✓ Streaming export to {settings['stream_export']}\n")
+        elif not self.write_files:
+            raise ValueError("Nothing to write: enable program files or a streaming export")
+        
+        # Content-addressed history: every body stored once, one manifest per run
+        self.store = OutputStore(settings['output_store']) if settings.get('output_store') else None
+        self.store_entries = {}
+        self.store_new = 0
+        
+        # Catalog of generated programs (one row per program, inserted after the run)
+        self.catalog = ProgramCatalog(settings['catalog']) if settings.get('catalog') else None
+        self.catalog_rows = []
+        if self.catalog is not None:
+            self.catalog_run_id = self.catalog.start_run(settings.get('workbook'), settings['template_path'],
+                                                         self.template_hash, self.output_dir)
+        
+        # Generate programs
+        self.log(f"\n{'='*80}\n")
+        self.log("\nGENERATING PROGRAMS\n")
+        self.log("\n"+'='*80 + "\n")
+        
+        # Shard directories are created once here
+        layout = settings.get('output_layout', "Flat")
+        if self.write_files:
+            shard_count = prepare_shard_directories(self.output_dir, self.relative_paths)
+            if layout != "Flat":
+                self.log(f"\n✓ Output layout '{layout}': {shard_count} shard directories\n")
+        
+        # Program/history IDs: typed start values, or a block from the persistent allocator
+        self.program_id_base = self.metadata['programid_start']
+        self.history_id_base = self.metadata['historyid_start']
+        self.id_offsets = df.index
+        self.assignments = []
+        allocator = IdAllocator(settings['id_allocator']) if settings.get('id_allocator') else None
+        reservation = None
+        if allocator is not None:
+            reservation = allocator.reserve(len(df), settings.get('workbook'),
+                                            self.program_id_base, self.history_id_base)
+            self.program_id_base = reservation['program_start']
+            self.history_id_base = reservation['history_start']
+            self.id_offsets = range(len(df))
+            self.log(f"\n✓ Reserved IDs {self.program_id_base}-{self.program_id_base + len(df) - 1} "
+                     f"(history {self.history_id_base}-{self.history_id_base + len(df) - 1}), "
+                     f"reservation #{reservation['reservation_id']}\n")
+        
+        # Pipeline: prep (this thread) → render → writers → verify
+        self.queue_size = settings.get('queue_size', 64)
+        self.writer_count = max(1, settings.get('writer_threads', 4))
+        self.render_queue = queue.Queue(maxsize=self.queue_size)
+        self.write_queues = [queue.Queue(maxsize=self.queue_size) for _ in range(self.writer_count)]
+        self.verify_queue = (queue.Queue(maxsize=self.queue_size)
+                             if settings.get('verify') and self.write_files else None)
+        
+        render_thread = threading.Thread(target=self._render_stage, daemon=True)
+        writers = [threading.Thread(target=self._write_stage, args=(write_queue,), daemon=True)
+                   for write_queue in self.write_queues]
+        verify_thread = (threading.Thread(target=self._verify_stage, daemon=True)
+                         if self.verify_queue is not None else None)
+        for thread in [render_thread] + writers + ([verify_thread] if verify_thread else []):
+            thread.start()
+        
+        report_every = max(1, min(500, len(df) // 20))
+        try:
+            for pos, idx in enumerate(df.index):
+                job = self._prepare_row(pos, idx)
+                if job is not None:
+                    self.render_queue.put(job)
+                if pos % report_every == report_every - 1:
+                    self._log_progress(pos + 1)
+        finally:
+            # Drain the pipeline even if row prep failed
+            self.render_queue.put(None)
+            render_thread.join()
+            for writer in writers:
+                writer.join()
+            if verify_thread is not None:
+                self.verify_queue.put(None)
+                verify_thread.join()
+            if self.export is not None:
+                self.export.close()
+        
+        if reservation is not None:
+            allocator.record_assignments(reservation['reservation_id'], self.assignments)
+            self.log(f"\n✓ Recorded {len(self.assignments)} ID assignments in {settings['id_allocator']}\n")
+        
+        if self.catalog is not None:
+            catalog_start = time.perf_counter()
+            self.catalog.add_programs(self.catalog_rows)
+            self.log(f"\n✓ Catalog: {len(self.catalog_rows)} programs recorded as run "
+                     f"#{self.catalog_run_id} ({time.perf_counter() - catalog_start:.1f} s)\n")
+        
+        store_run = None
+        if self.store is not None:
+            store_run = self.store.save_run(self.store_entries, {
+                'workbook': settings.get('workbook'),
+                'template_hash': self.template_hash,
+                'output_layout': layout,
+                'output_dir': os.path.abspath(self.output_dir),
+            })
+            self.log(f"\n✓ Output store: run {store_run}, {len(self.store_entries)} programs, "
+                     f"{self.store_new} new bodies ({len(self.store_entries) - self.store_new} unchanged)\n")
+        
+        # Top-level index so downstream tools never have to list directories
+        if self.write_files:
+            index_path = write_program_index(self.output_dir, self.program_index)
+            self.log(f"\n✓ Program index written: {os.path.basename(index_path)}\n")
+        if self.export is not None:
+            self.log(f"\n✓ Export complete: {self.export.count} programs in {settings['stream_export']}\n")
+        if self.verify_queue is not None:
+            self.log(f"\nVerified {self.success_count} files: {len(self.verify_failures)} mismatches\n")
+        
+        return {
+            'total': len(df),
+            'success_count': self.success_count,
+            'skipped': self.skipped,
+            'violations': self.violations,
+            'program_index': self.program_index,
+            'verify_failures': self.verify_failures,
+            'assignments': self.assignments,
+            'store_run': store_run,
+            'thermal': self.thermal,
+        }
+
+    def annotations(self):
+        """Per-row result of the last run: program name, IDs, output file, skip reason (index = df.index)"""
+        index = self.df.index
+        ids = pd.DataFrame(self.assignments, columns=['Source', 'Row', 'Program', 'ProgramID', 'HistoryID'])
+        ids = ids.drop_duplicates('Row', keep='last').set_index('Row')
+        outputs = pd.Series(dict(self.output_rows), dtype=object)
+        frame = pd.DataFrame({
+            'Program': self.names,
+            'ERSA_ProgramID': ids['ProgramID'].reindex(index).astype('Int64').to_numpy(),
+            'ERSA_HistoryID': ids['HistoryID'].reindex(index).astype('Int64').to_numpy(),
+            'ERSA_Output_File': outputs.reindex(index).to_numpy(),
+            'ERSA_Skip_Reason': self.skip_reasons,
+        }, index=index)
+        # duplicate names: the row's file was overwritten by a later row
+        superseded = self.superseded & frame['ERSA_Output_File'].notna().to_numpy() & self.write_files
+        frame.loc[superseded, 'ERSA_Skip_Reason'] = "Overwritten by a later row with the same program name"
+        frame.loc[superseded, ['ERSA_ProgramID', 'ERSA_HistoryID', 'ERSA_Output_File']] = None
+        # neither written nor skipped: failed in render/write
+        failed = frame['ERSA_Output_File'].isna() & frame['ERSA_Skip_Reason'].isna()
+        frame.loc[failed, 'ERSA_Skip_Reason'] = "Not written (error, see log)"
+        return frame
+
+# ==================== BACK-ANNOTATION ====================
+ANNOTATION_COLUMNS = ['ERSA_ProgramID', 'ERSA_HistoryID', 'ERSA_Output_File', 'ERSA_Skip_Reason']
+ANNOTATION_SHEET = "ERSA_Annotations"
+# Files-tab choices: where generate_programs writes the annotations (None = not at all)
+ANNOTATION_MODES = {
+    "Off": None,
+    "Workbook copy": 'copy',
+    "Sidecar sheet": 'sheet',
+}
+
+SHEET_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+SHEET_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+SHEET_REL_TYPE = SHEET_REL_NS + "/worksheet"
+SHEET_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"
+
+def _column_letter(number):
+    letters = ""
+    while number:
+        number, rem = divmod(number - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+def _xml_attr(text):
+    return xml_escape(text, {'"': "&quot;"})
+
+def _iter_sheet_xml(table):
+    """Worksheet XML for a table, row by row (numbers as values, text as inline strings)"""
+    letters = [_column_letter(i + 1) for i in range(len(table.columns))]
+    
+    def cell(ref, value):
+        if value is None or (not isinstance(value, str) and pd.isna(value)):
+            return ""
+        if isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool):
+            return f'<c r="{ref}"><v>{value}</v></c>'
+        return f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{xml_escape(str(value))}</t></is></c>'
+    
+    yield f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<worksheet xmlns="{SHEET_NS}"><sheetData>'
+    yield '<row r="1">' + "".join(cell(f"{letter}1", str(name)) for letter, name in zip(letters, table.columns)) + '</row>'
+    for number, row in enumerate(table.itertuples(index=False, name=None), start=2):
+        yield (f'<row r="{number}">' + "".join(cell(f"{letter}{number}", value)
+                                                for letter, value in zip(letters, row)) + '</row>')
+    yield '</sheetData></worksheet>'
+
+def write_sidecar_sheet(source_path, target_path, sheet_name, table):
+    """Add (or replace) one worksheet in an .xlsx without loading the workbook.
+
+    The package is copied entry by entry into a temporary file, the sheet is
+    streamed in as a new part and registered in workbook.xml, its relations
+    and [Content_Types].xml; the result then replaces target_path (which may
+    be source_path itself).
+    """
+    import zipfile
+    with zipfile.ZipFile(source_path) as zin:
+        workbook = zin.read('xl/workbook.xml').decode('utf-8')
+        rels = zin.read('xl/_rels/workbook.xml.rels').decode('utf-8')
+        types = zin.read('[Content_Types].xml').decode('utf-8')
+        
+        part = None
+        for element in re.findall(r'<(?:\w+:)?sheet\b[^>]*>', workbook):
+            name = re.search(r'\sname="([^"]*)"', element)
+            if name and name.group(1) == _xml_attr(sheet_name):
+                rel_id = re.search(r'\s\w+:id="([^"]*)"', element).group(1)
+                rel = re.search(r'<Relationship\b[^>]*\bId="%s"[^>]*>' % re.escape(rel_id), rels).group(0)
+                target = re.search(r'\bTarget="([^"]*)"', rel).group(1)
+                part = target.lstrip('/') if target.startswith('/') else 'xl/' + target
+                break
+        if part is None:
+            names = set(zin.namelist())
+            number = next(n for n in range(1, len(names) + 2) if f"xl/worksheets/sheet{n}.xml" not in names)
+            part = f"xl/worksheets/sheet{number}.xml"
+            sheet_id = max(map(int, re.findall(r'\bsheetId="(\d+)"', workbook)), default=0) + 1
+            rel_number = max(map(int, re.findall(r'\bId="rId(\d+)"', rels)), default=0) + 1
+            rel_id = f"rId{rel_number}"
+            sheets_end = re.search(r'</(?:\w+:)?sheets>', workbook).start()
+            workbook = (workbook[:sheets_end] + f'<sheet xmlns:r="{SHEET_REL_NS}" name="{_xml_attr(sheet_name)}" '
+                        f'sheetId="{sheet_id}" r:id="{rel_id}"/>' + workbook[sheets_end:])
+            rels = rels.replace('</Relationships>', f'<Relationship Id="{rel_id}" Type="{SHEET_REL_TYPE}" '
+                                f'Target="worksheets/sheet{number}.xml"/></Relationships>')
+            types = types.replace('</Types>', f'<Override PartName="/{part}" '
+                                  f'ContentType="{SHEET_CONTENT_TYPE}"/></Types>')
+        
+        replaced = {'xl/workbook.xml': workbook, 'xl/_rels/workbook.xml.rels': rels,
+                    '[Content_Types].xml': types}
+        temp_path = target_path + ".tmp"
+        with zipfile.ZipFile(temp_path, 'w', zipfile.ZIP_DEFLATED) as zout:
+            for info in zin.infolist():
+                if info.filename == part:
+                    continue
+                if info.filename in replaced:
+                    zout.writestr(info.filename, replaced[info.filename])
+                    continue
+                with zin.open(info) as src, zout.open(zipfile.ZipInfo(info.filename, info.date_time), 'w') as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+            with zout.open(part, 'w') as dst:
+                for chunk in _iter_sheet_xml(table):
+                    dst.write(chunk.encode('utf-8'))
+    os.replace(temp_path, target_path)
+    return target_path
+
+def annotation_target(source_path, mode):
+    """Where write_annotations writes for a source file and mode"""
+    base, ext = os.path.splitext(source_path)
+    ext = ext.lower()
+    if ext == '.xlsx':
+        return source_path if mode == 'sheet' else f"{base}_annotated{ext}"
+    return f"{base}_annotations{ext}" if mode == 'sheet' else f"{base}_annotated{ext}"
+
+def write_annotations(source_path, annotations, mode, data=None):
+    """Write the annotations of a run back to the source data in one bulk write.
+
+    .xlsx sources get ANNOTATION_SHEET (Row, Program and ANNOTATION_COLUMNS,
+    one line per data row in data order), streamed into a copy of the
+    workbook ('copy': <name>_annotated.xlsx) or into the workbook itself
+    ('sheet'); the data sheets are copied byte for byte. CSV/Parquet/Feather
+    sources get the data plus ANNOTATION_COLUMNS as <name>_annotated ('copy',
+    data is the loaded frame, the file is read again only when it is None)
+    or the sidecar table alone as <name>_annotations ('sheet').
+    Returns the written path.
+    """
+    if mode not in ('copy', 'sheet'):
+        raise ValueError(f"Unknown annotation mode: {mode}")
+    ext = os.path.splitext(source_path)[1].lower()
+    if ext not in INPUT_READERS:
+        raise ValueError(f"Unsupported data file type: {ext}")
+    if ext == '.xls':
+        raise ValueError("Back-annotation needs .xlsx (save the .xls workbook as .xlsx first)")
+    path = annotation_target(source_path, mode)
+    sidecar = annotations[['Program'] + ANNOTATION_COLUMNS].reset_index(drop=True)
+    sidecar.insert(0, 'Row', np.arange(1, len(sidecar) + 1))
+    if ext == '.xlsx':
+        return write_sidecar_sheet(source_path, path, ANNOTATION_SHEET, sidecar)
+    
+    if mode == 'copy':
+        if data is None:
+            data = read_input(source_path)
+        columns = annotations[ANNOTATION_COLUMNS].reindex(data.index)
+        table = pd.concat([data.drop(columns=ANNOTATION_COLUMNS, errors='ignore'), columns], axis=1)
+    else:
+        table = sidecar
+    if ext == '.csv':
+        table.to_csv(path, index=False)
+    elif ext in ('.parquet', '.pq'):
+        table.to_parquet(path, index=False)
+    else:
+        table.reset_index(drop=True).to_feather(path)
+    return path
+
+# ==================== PARTITIONED RUNS ====================
+PARTITION_MANIFEST_VERSION = 1
+PARTITION_TEMPLATE = "template.xml"
+PARTITION_REPORT = "partition_report.json"
+SKIPPED_REPORT = "skipped_programs.csv"
+
+def _partition_name(number):
+    return f"part_{number:03d}"
+
+def _partition_frame(df):
+    """Rows ready for Parquet: mixed-type Excel columns (e.g. numbers and "NA") become text"""
+    df = df.reset_index(drop=True)
+    for col in df.columns[df.dtypes == object]:
+        values = df[col]
+        if not values.dropna().map(type).eq(str).all():
+            df[col] = values.map(lambda v: v if pd.isna(v) else str(v))
+    return df
+
+def write_partition_manifests(df, settings, partitions, manifest_dir, zone_overrides=None, log=_log_to_stdout):
+    """Split one generation run into self-contained partition manifests.
+
+    Every partition gets its rows (only the mapped columns), a copy of the
+    template with its hash, the settings snapshot and the zone overrides, so
+    `run-partition` can execute it on any machine. Row ranges keep their
+    global row numbers, and program/history IDs are fixed here (a reserved
+    allocator block when the allocator is used), so the merged result equals
+    one sequential run.
+    """
+    partitions = max(1, min(int(partitions), len(df)))
+    os.makedirs(manifest_dir, exist_ok=True)
+    job_id = datetime.now().strftime('%Y%m%d%H%M%S') + "-" + hashlib.sha1(os.urandom(8)).hexdigest()[:8]
+    
+    template_copy = os.path.join(manifest_dir, PARTITION_TEMPLATE)
+    with open(settings['template_path'], 'rb') as src, open(template_copy, 'wb') as dst:
+        dst.write(src.read())
+    template_hash = file_sha256(template_copy)
+    
+    overrides_file = None
+    if zone_overrides is not None and len(zone_overrides):
+        overrides_file = ZONE_OVERRIDES_FILE
+        zone_overrides.save(os.path.join(manifest_dir, overrides_file))
+    
+    # IDs are fixed at split time: typed start values, or one allocator block for the whole run
+    metadata = {**DEFAULT_METADATA, **(settings.get('metadata') or {})}
+    if settings.get('id_allocator'):
+        reservation = IdAllocator(settings['id_allocator']).reserve(
+            len(df), settings.get('workbook'), metadata['programid_start'], metadata['historyid_start'])
+        metadata['programid_start'] = reservation['program_start']
+        metadata['historyid_start'] = reservation['history_start']
+        log(f"✓ Reserved IDs {reservation['program_start']}-{reservation['program_start'] + len(df) - 1} "
+            f"for all partitions (reservation #{reservation['reservation_id']})")
+    snapshot = {key: settings[key] for key in
+                ('mapping', 'zone_paths', 'output_layout', 'machine_rules', 'writer_threads',
+                 'verify', 'workbook', 'custom_bindings') if settings.get(key) is not None}
+    snapshot['metadata'] = metadata
+    
+    columns = mapped_columns(list(df.columns), settings['mapping'], settings.get('custom_bindings'))
+    data = _partition_frame(df[columns].reset_index(drop=True))
+    bounds = np.linspace(0, len(df), partitions + 1).round().astype(int)
+    paths = []
+    for number in range(partitions):
+        start, stop = int(bounds[number]), int(bounds[number + 1])
+        name = _partition_name(number)
+        if has_pyarrow():
+            data_file = f"{name}.parquet"
+            data.iloc[start:stop].to_parquet(os.path.join(manifest_dir, data_file), index=False)
+        else:
+            data_file = f"{name}.pkl"
+            data.iloc[start:stop].reset_index(drop=True).to_pickle(os.path.join(manifest_dir, data_file))
+        manifest = {
+            'version': PARTITION_MANIFEST_VERSION,
+            'job_id': job_id,
+            'created': datetime.now().isoformat(),
+            'partition': number,
+            'partitions': partitions,
+            'row_start': start,
+            'row_stop': stop,
+            'total_rows': len(df),
+            'data_file': data_file,
+            'data_sha256': file_sha256(os.path.join(manifest_dir, data_file)),
+            'template_file': PARTITION_TEMPLATE,
+            'template_hash': template_hash,
+            'zone_overrides_file': overrides_file,
+            'settings': snapshot,
+        }
+        path = os.path.join(manifest_dir, f"{name}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1)
+        paths.append(path)
+        log(f"  {name}: rows {start + 1}-{stop}")
+    log(f"✓ Job {job_id}: {partitions} partition manifests in {manifest_dir}")
+    return paths
+
+def load_partition_manifest(path):
+    """Read a manifest and check its data file and template against the recorded hashes"""
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('version') != PARTITION_MANIFEST_VERSION:
+        raise ValueError(f"{os.path.basename(path)}: unsupported manifest version {manifest.get('version')}")
+    base = os.path.dirname(os.path.abspath(path))
+    for key, hash_key in (('data_file', 'data_sha256'), ('template_file', 'template_hash')):
+        file_path = os.path.join(base, manifest[key])
+        if file_sha256(file_path) != manifest[hash_key]:
+            raise ValueError(f"{os.path.basename(path)}: {manifest[key]} does not match the manifest hash")
+        manifest[key] = file_path
+    if manifest.get('zone_overrides_file'):
+        manifest['zone_overrides_file'] = os.path.join(base, manifest['zone_overrides_file'])
+    return manifest
+
+def run_partition(manifest_path, output_root, log=_log_to_stdout):
+    """Execute one partition with the headless engine; writes PARTITION_REPORT"""
+    manifest = load_partition_manifest(manifest_path)
+    data_file = manifest['data_file']
+    df = pd.read_pickle(data_file) if data_file.endswith('.pkl') else read_input(data_file)
+    if len(df) != manifest['row_stop'] - manifest['row_start']:
+        raise ValueError(f"{os.path.basename(data_file)}: {len(df)} rows, manifest expects "
+                         f"{manifest['row_stop'] - manifest['row_start']}")
+    # Global row numbers: program IDs and "Program_<n>" names match the sequential run
+    df.index = pd.RangeIndex(manifest['row_start'], manifest['row_stop'])
+    
+    output_dir = os.path.join(output_root, _partition_name(manifest['partition']))
+    settings = {**manifest['settings'], 'template_path': manifest['template_file'], 'output_dir': output_dir}
+    overrides = (ZoneOverrideStore.load(manifest['zone_overrides_file'])
+                 if manifest.get('zone_overrides_file') else None)
+    result = ProgramGenerator(settings, log=log, zone_overrides=overrides).run(df)
+    
+    report = {
+        'job_id': manifest['job_id'],
+        'partition': manifest['partition'],
+        'row_start': manifest['row_start'],
+        'row_stop': manifest['row_stop'],
+        'finished': datetime.now().isoformat(),
+        'success_count': result['success_count'],
+        'skipped': result['skipped'],
+        'verify_failures': result['verify_failures'],
+        'program_index': {name: path.replace(os.sep, '/') for name, path in result['program_index'].items()},
+    }
+    with open(os.path.join(output_dir, PARTITION_REPORT), 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=1)
+    return result
+
+def merge_partitions(manifest_dir, results_root, output_dir, log=_log_to_stdout):
+    """Validate and combine partition outputs into one output folder.
+
+    Fails if a partition is missing, reported twice or from another job;
+    programs produced by more than one partition are reported and the later
+    row wins, exactly as in a sequential run.
+    """
+    manifests = []
+    for name in sorted(os.listdir(manifest_dir)):
+        if name.startswith("part_") and name.endswith(".json"):
+            with open(os.path.join(manifest_dir, name), 'r', encoding='utf-8') as f:
+                manifests.append(json.load(f))
+    if not manifests:
+        raise ValueError(f"No partition manifests in {manifest_dir}")
+    job_ids = {m['job_id'] for m in manifests}
+    if len(job_ids) > 1:
+        raise ValueError(f"Manifests from several jobs: {', '.join(sorted(job_ids))}")
+    manifests.sort(key=lambda m: m['partition'])
+    expected = manifests[0]['partitions']
+    if [m['partition'] for m in manifests] != list(range(expected)):
+        raise ValueError(f"Manifest set incomplete: expected partitions 0..{expected - 1}, "
+                         f"found {[m['partition'] for m in manifests]}")
+    
+    # Reports: exactly one per partition, all from this job, covering the full row range
+    reports = {}
+    for root, _dirs, files in os.walk(results_root):
+        if PARTITION_REPORT not in files:
+            continue
+        with open(os.path.join(root, PARTITION_REPORT), 'r', encoding='utf-8') as f:
+            report = json.load(f)
+        if report['job_id'] not in job_ids:
+            continue
+        if report['partition'] in reports:
+            raise ValueError(f"Partition {report['partition']} reported twice: "
+                             f"{reports[report['partition']][0]} and {root}")
+        reports[report['partition']] = (root, report)
+    missing = [m['partition'] for m in manifests if m['partition'] not in reports]
+    if missing:
+        raise ValueError(f"Missing results for partitions: {', '.join(map(str, missing))}")
+    position = 0
+    for m in manifests:
+        report = reports[m['partition']][1]
+        if (report['row_start'], report['row_stop']) != (m['row_start'], m['row_stop']) \
+                or m['row_start'] != position:
+            raise ValueError(f"Partition {m['partition']}: row range does not match the manifest")
+        position = m['row_stop']
+    if position != manifests[0]['total_rows']:
+        raise ValueError(f"Partitions cover {position} of {manifests[0]['total_rows']} rows")
+    
+    # Combine program files (later partitions overwrite, as later rows do in one run)
+    os.makedirs(output_dir, exist_ok=True)
+    program_index, owner, duplicates, skipped = {}, {}, [], []
+    success_count = 0
+    for m in manifests:
+        root, report = reports[m['partition']]
+        success_count += report['success_count']
+        skipped.extend(report['skipped'])
+        prepare_shard_directories(output_dir, list(report['program_index'].values()))
+        for name, rel_path in report['program_index'].items():
+            if name in owner and owner[name] != m['partition']:
+                duplicates.append(name)
+            owner[name] = m['partition']
+            program_index[name] = rel_path
+            src = os.path.join(root, rel_path)
+            if os.path.abspath(src) != os.path.abspath(os.path.join(output_dir, rel_path)):
+                shutil.copyfile(src, os.path.join(output_dir, rel_path))
+    if duplicates:
+        log(f"⚠ {len(duplicates)} programs produced by more than one partition "
+            f"(later row kept): {', '.join(duplicates[:10])}")
+    
+    write_program_index(output_dir, program_index)
+    with open(os.path.join(output_dir, SKIPPED_REPORT), 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=['Program', 'Reason'])
+        writer.writeheader()
+        writer.writerows(skipped)
+    log(f"✓ Merged {expected} partitions: {success_count} programs, {len(skipped)} skipped → {output_dir}")
+    return {
+        'partitions': expected,
+        'success_count': success_count,
+        'skipped': skipped,
+        'duplicates': duplicates,
+        'program_index': program_index,
+    }
+
+# ==================== TEMPLATE MIGRATION ====================
+MIGRATION_REPORT = "migration_report.csv"
+MIGRATION_CHUNKSIZE = 16    # files per worker task
+MIGRATION_LOG_LIMIT = 20    # failed files listed in the log
+_META_SECTIONS = ('SolderingPrograms', 'ProgramHistory')
+_migration_state = {}       # per worker process: compiled template and carried paths
+
+def bound_variable_paths(zone_paths=None, custom_bindings=None):
+    """Variable paths the generator writes: board size, CBS/park, zones, custom bindings"""
+    paths = {VAR_PCB_LENGTH, VAR_PCB_WIDTH, VAR_CBS_WIDTH, VAR_CBS_ACTIVE, VAR_PARK_ACTIVE}
+    paths.update(path for path in (zone_paths or {}).values() if path)
+    paths.update(custom_bindings or {})
+    return paths
+
+def read_program_values(path):
+    """Stream one program file: ({variable_path: value text}, {(section, tag): text}).
+
+    ProgramParameter elements are cleared as soon as they are read, so memory
+    stays flat for large programs.
+    """
+    params, meta = {}, {}
+    for _event, element in ET.iterparse(path, events=('end',)):
+        if element.tag == 'ProgramParameter':
+            var = element.find('variable')
+            val = element.find('value')
+            if var is not None and val is not None and var.text not in params:
+                params[var.text] = val.text or ""
+            element.clear()
+        elif element.tag in _META_SECTIONS:
+            for child in element:
+                meta[(element.tag, child.tag)] = child.text or ""
+            element.clear()
+    return params, meta
+
+def _migration_init(template_path, carry_paths):
+    compiled = CompiledTemplate(ET.parse(template_path).getroot())
+    _migration_state['compiled'] = compiled
+    _migration_state['carry'] = compiled.param_paths if carry_paths is None else compiled.param_paths & carry_paths
+    _migration_state['meta_keys'] = {key for kind, key in compiled.slot_keys if kind == 'meta'}
+
+def _migrate_file(job):
+    """Re-render one program into the new template (runs in a worker process)"""
+    source_path, output_path = job
+    compiled = _migration_state['compiled']
+    row = {'File': source_path, 'Program': "", 'Status': "ok", 'Carried': 0,
+           'New_Defaults': 0, 'Unmatched_Count': 0, 'Unmatched': "", 'Error': ""}
+    try:
+        params, meta = read_program_values(source_path)
+        carried = {path: text for path, text in params.items() if path in _migration_state['carry']}
+        unmatched = sorted(path for path in params if path not in compiled.param_paths)
+        meta = {key: text for key, text in meta.items() if key in _migration_state['meta_keys']}
+        now = datetime.now().isoformat()
+        meta.update({(section, 'changedate'): now for section in _META_SECTIONS})
+        body = compiled.render(carried, meta)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with open(output_path, 'wb') as f:
+            f.write((XML_DECLARATION + body).encode('utf-8'))
+        row.update(Program=meta.get(('SolderingPrograms', 'name'), ""), Carried=len(carried),
+                   New_Defaults=len(compiled.param_paths - params.keys()),
+                   Unmatched_Count=len(unmatched), Unmatched=";".join(unmatched))
+        if unmatched:
+            row['Status'] = "unmatched"
+    except Exception as e:
+        row.update(Status="error", Error=str(e))
+    return row
+
+def migrate_programs(source_dir, template_path, output_dir, carry_paths=None, workers=None,
+                     log=_log_to_stdout):
+    """Re-render every program XML under source_dir into a new template revision.
+
+    Each program's variable values (all of them, or only carry_paths, e.g.
+    bound_variable_paths()) and its metadata go into the new template's
+    slots; variables the new template lacks are listed per file in
+    MIGRATION_REPORT. Files are parsed with iterparse and processed by a
+    process pool; the folder structure under source_dir is kept.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+    # parse the template here first: a broken template is one clear error, not one per worker
+    try:
+        CompiledTemplate(ET.parse(template_path).getroot())
+    except ET.ParseError as e:
+        raise ValueError(f"{os.path.basename(template_path)} is not a valid template: {e}") from e
+    source_dir = os.path.abspath(source_dir)
+    output_dir = os.path.abspath(output_dir)
+    jobs = []
+    for folder, dirs, files in os.walk(source_dir):
+        if os.path.commonpath([folder, output_dir]) == output_dir:
+            dirs[:] = []    # output folder inside the library
+            continue
+        for name in sorted(files):
+            if name.lower().endswith('.xml') and name != EXPORT_FILE:
+                source_path = os.path.join(folder, name)
+                jobs.append((source_path, os.path.join(output_dir, os.path.relpath(source_path, source_dir))))
+    if not jobs:
+        raise ValueError(f"No program XML files in {source_dir}")
+    
+    start = time.perf_counter()
+    workers = max(1, workers or min(len(jobs) // MIGRATION_CHUNKSIZE + 1, os.cpu_count() or 1))
+    log(f"Migrating {len(jobs)} programs to {os.path.basename(template_path)} ({workers} workers)...")
+    if workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_migration_init,
+                                     initargs=(template_path, carry_paths)) as pool:
+                rows = list(pool.map(_migrate_file, jobs, chunksize=MIGRATION_CHUNKSIZE))
+        except BrokenProcessPool as e:
+            raise RuntimeError(f"A migration worker process died ({e}); retry with --workers 1 "
+                               f"to see the error") from e
+    else:
+        _migration_init(template_path, carry_paths)
+        rows = [_migrate_file(job) for job in jobs]
+    
+    report = pd.DataFrame(rows)
+    report['File'] = [os.path.relpath(path, source_dir) for path in report['File']]
+    report_path = os.path.join(output_dir, MIGRATION_REPORT)
+    os.makedirs(output_dir, exist_ok=True)
+    report.to_csv(report_path, index=False)
+    
+    counts = report['Status'].value_counts()
+    log(f"✓ Migrated {len(report) - counts.get('error', 0)}/{len(report)} programs in "
+        f"{time.perf_counter() - start:.1f} s: {counts.get('unmatched', 0)} with variables missing "
+        f"from the new template, {counts.get('error', 0)} errors → {report_path}")
+    for row in report[report['Status'] == 'error'].head(MIGRATION_LOG_LIMIT).itertuples():
+        log(f"  ✗ {row.File}: {row.Error}", color='red')
+    return report
+
+# ==================== GUI ====================
+LOG_DRAIN_MS = 100       # log widget refresh interval
+LOG_DRAIN_BATCH = 2000   # messages inserted per refresh
 
 class ERSAProgramGeneratorGUI:
     def __init__(self, root):
@@ -19,10 +2779,21 @@ class ERSAProgramGeneratorGUI:
         self.root.geometry("1400x900")
         self.root.resizable(True, True)
         
+        # Log messages from worker threads; drained into the widget on the Tk thread
+        self.log_queue = queue.Queue()
+        
         # Core variables
         self.excel_file = tk.StringVar()
         self.template_file = tk.StringVar()
         self.output_folder = tk.StringVar(value="Generated_Programs")
+        self.output_layout = tk.StringVar(value="Flat")
+        self.export_mode = tk.StringVar(value="Program files")
+        self.writer_threads = tk.IntVar(value=4)
+        self.verify_output = tk.BooleanVar(value=False)
+        self.record_catalog = tk.BooleanVar(value=False)
+        self.keep_history = tk.BooleanVar(value=False)
+        self.annotate_mode = tk.StringVar(value="Off")
+        self.migrate_bound_only = tk.BooleanVar(value=False)
         self.df = None
         self.excel_columns = []
         
@@ -43,14 +2814,48 @@ class ERSAProgramGeneratorGUI:
         # Zone data (zone_key: tk.StringVar())
         self.zone_vars = {}
         self.current_program_index = 0
+        self.zone_overrides = None  # ZoneOverrideStore, loaded on first use
         
         # Skipped programs collector
         self.skipped_programs = []
         
+        # Batch ingestion: read every sheet of each workbook
+        self.batch_all_sheets = tk.BooleanVar(value=True)
+        
+        # Input sources: read only the mapped columns of wide CSV/Parquet/Feather exports
+        self.input_projection = tk.BooleanVar(value=False)
+
+        # Machine-limit rules and the last validation report
+        self.machine_rules = []
+        self.rule_violations = None
+        self.change_plan = None  # long-format DataFrame from the last dry run
+        
+        # Thermal profile estimator settings and the last report
+        self.thermal_config = dict(DEFAULT_THERMAL_PROFILE)
+        self.thermal_report = None
+        self.profile_before_generation = tk.BooleanVar(value=False)
+        
+        # Similar-program search (index kept across reloads, rebuilt only on changes)
+        self.similarity = ProgramSimilarityIndex()
+        self.similar_include_library = tk.BooleanVar(value=False)
+        self._library_fingerprint = None
+        
+        # Bulk zone edits: editor bound to the override store, plan of the last preview
+        self.bulk_editor = None
+        self.bulk_edit_plan = None
+        
+        # Template parameter browser: index of the loaded template and {variable_path: column}
+        self.parameter_index = None
+        self.custom_bindings = {}
+
         # Setup
         self.setup_styles()
         self.create_interface()
         self.load_saved_mapping()
+        self.load_machine_rules()
+        self.load_custom_bindings()
+        self.load_thermal_profile_config()
+        self.root.after(LOG_DRAIN_MS, self._drain_log)
         
     def setup_styles(self):
         """Configure professional styles"""
@@ -82,6 +2887,8 @@ class ERSAProgramGeneratorGUI:
         self.create_cooling_tab()
         self.create_log_tab()
         self.create_metadata_tab()
+        self.create_parameters_tab()
+        self.create_bulk_edit_tab()
 
     # ==================== TAB 1: FILES & SETTINGS ====================
     def create_files_tab(self):
@@ -103,7 +2910,7 @@ class ERSAProgramGeneratorGUI:
         file_frame.columnconfigure(1, weight=1)
         
         # Excel file
-        ttk.Label(file_frame, text="Excel Data File:", 
+        ttk.Label(file_frame, text="Data File:", 
                  style='Subtitle.TLabel').grid(row=0, column=0, sticky=tk.W, 
                                                pady=5, padx=(0, 10))
         ttk.Entry(file_frame, textvariable=self.excel_file, width=60).grid(
@@ -132,6 +2939,36 @@ class ERSAProgramGeneratorGUI:
                   command=self.browse_output).grid(row=2, column=2, pady=5, 
                                                    padx=(10, 0))
         
+        # Output layout (sharding)
+        ttk.Label(file_frame, text="Output Layout:", 
+                 style='Subtitle.TLabel').grid(row=3, column=0, sticky=tk.W, 
+                                               pady=5, padx=(0, 10))
+        layout_frame = ttk.Frame(file_frame)
+        layout_frame.grid(row=3, column=1, pady=5, sticky=tk.W)
+        ttk.Combobox(layout_frame, textvariable=self.output_layout, values=OUTPUT_LAYOUTS,
+                    width=20, state='readonly').pack(side=tk.LEFT)
+        ttk.Label(layout_frame, text="Export:").pack(side=tk.LEFT, padx=(15, 5))
+        ttk.Combobox(layout_frame, textvariable=self.export_mode, values=list(EXPORT_MODES),
+                    width=28, state='readonly').pack(side=tk.LEFT)
+        ttk.Label(layout_frame, text="Annotate workbook:").pack(side=tk.LEFT, padx=(15, 5))
+        ttk.Combobox(layout_frame, textvariable=self.annotate_mode, values=list(ANNOTATION_MODES),
+                    width=14, state='readonly').pack(side=tk.LEFT)
+        
+        # Writer pipeline
+        ttk.Label(file_frame, text="Writer Threads:", 
+                 style='Subtitle.TLabel').grid(row=4, column=0, sticky=tk.W, 
+                                               pady=5, padx=(0, 10))
+        pipeline_frame = ttk.Frame(file_frame)
+        pipeline_frame.grid(row=4, column=1, pady=5, sticky=tk.W)
+        ttk.Spinbox(pipeline_frame, from_=1, to=16, textvariable=self.writer_threads,
+                   width=5).pack(side=tk.LEFT)
+        ttk.Checkbutton(pipeline_frame, text="Verify written files", 
+                       variable=self.verify_output).pack(side=tk.LEFT, padx=(15, 0))
+        ttk.Checkbutton(pipeline_frame, text=f"Record in catalog ({CATALOG_DB})", 
+                       variable=self.record_catalog).pack(side=tk.LEFT, padx=(15, 0))
+        ttk.Checkbutton(pipeline_frame, text="Keep history (output store)", 
+                       variable=self.keep_history).pack(side=tk.LEFT, padx=(15, 0))
+        
         # Quick actions
         action_frame = ttk.LabelFrame(tab, text="Quick Actions", padding="15")
         action_frame.grid(row=2, column=0, columnspan=3, pady=(0, 20), 
@@ -145,6 +2982,18 @@ class ERSAProgramGeneratorGUI:
                   command=lambda: self.notebook.select(2)).pack(side=tk.LEFT, padx=5)
         ttk.Button(action_frame, text="ðŸ’¾ Save Mapping", 
                   command=self.save_mapping).pack(side=tk.LEFT, padx=5)
+        ttk.Button(action_frame, text="✅ Check Machine Rules", 
+                  command=self.check_machine_rules).pack(side=tk.LEFT, padx=5)
+        ttk.Button(action_frame, text="🌡 Estimate Profiles", 
+                  command=self.estimate_profiles).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(action_frame, text="before generating", 
+                       variable=self.profile_before_generation).pack(side=tk.LEFT, padx=5)
+        ttk.Button(action_frame, text="📚 Load Batch...", 
+                  command=self.load_batch_files).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(action_frame, text="All sheets", 
+                       variable=self.batch_all_sheets).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(action_frame, text="Mapped columns only", 
+                       variable=self.input_projection).pack(side=tk.LEFT, padx=5)
         
         # Program list preview
         preview_frame = ttk.LabelFrame(tab, text="Programs to Generate", 
@@ -177,71 +3026,95 @@ class ERSAProgramGeneratorGUI:
                                        command=self.start_generation)
         self.generate_btn.pack(side=tk.LEFT, padx=5)
         
+        self.dry_run_btn = ttk.Button(btn_frame, text="🔍 Dry Run (Change Plan)",
+                                      command=self.start_dry_run)
+        self.dry_run_btn.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(btn_frame, text="🔎 Find Similar",
+                  command=self.find_similar_programs).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(btn_frame, text="incl. catalog library",
+                       variable=self.similar_include_library).pack(side=tk.LEFT, padx=(0, 5))
+        
+        ttk.Button(btn_frame, text="📦 Split into Partitions...",
+                  command=self.split_into_partitions).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(btn_frame, text="🔄 Migrate Library...",
+                  command=self.start_migration).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(btn_frame, text="bound variables only",
+                       variable=self.migrate_bound_only).pack(side=tk.LEFT, padx=(0, 5))
+        
         ttk.Button(btn_frame, text="Exit", 
                   command=self.root.quit).pack(side=tk.LEFT, padx=5)
     
     #===================== META DATA ====================
     def create_metadata_tab(self):
-    """Create metadata and program IDs configuration tab"""
-    tab = ttk.Frame(self.notebook, padding="20")
-    self.notebook.add(tab, text="📝 Metadata & IDs")
+        """Create metadata and program IDs configuration tab"""
+        tab = ttk.Frame(self.notebook, padding="20")
+        self.notebook.add(tab, text="📝 Metadata & IDs")
+    
+        ttk.Label(tab, text="Program Metadata & ID Management", 
+                 style='Title.TLabel').grid(row=0, column=0, columnspan=3, 
+                                           pady=(0, 10), sticky=tk.W)
     
-    ttk.Label(tab, text="Program Metadata & ID Management", 
-             style='Title.TLabel').grid(row=0, column=0, columnspan=3, 
-                                       pady=(0, 10), sticky=tk.W)
+        ttk.Label(tab, 
+                 text="Configure auto-incrementing IDs and metadata for generated programs.",
+                 style='Info.TLabel').grid(row=1, column=0, columnspan=3, 
+                                          pady=(0, 20), sticky=tk.W)
     
-    ttk.Label(tab, 
-             text="Configure auto-incrementing IDs and metadata for generated programs.",
-             style='Info.TLabel').grid(row=1, column=0, columnspan=3, 
-                                      pady=(0, 20), sticky=tk.W)
+        # Metadata variables - CORRECTED with numeric User ID
+        self.meta_programid_start = tk.IntVar(value=10000)
+        self.meta_libraryid_start = tk.IntVar(value=100)
+        self.meta_version = tk.IntVar(value=1)
+        self.meta_setnumber_start = tk.IntVar(value=1)
+        self.meta_historyid_start = tk.IntVar(value=6000)
+        self.meta_userid = tk.IntVar(value=881)  # SINGLE numeric User ID
+        self.meta_default_notes = tk.StringVar(value="Auto-generated by ERSA tool")
     
-    # Metadata variables - CORRECTED with numeric User ID
-    self.meta_programid_start = tk.IntVar(value=10000)
-    self.meta_libraryid_start = tk.IntVar(value=100)
-    self.meta_version = tk.IntVar(value=1)
-    self.meta_setnumber_start = tk.IntVar(value=1)
-    self.meta_historyid_start = tk.IntVar(value=6000)
-    self.meta_userid = tk.IntVar(value=881)  # SINGLE numeric User ID
-    self.meta_default_notes = tk.StringVar(value="Auto-generated by ERSA tool")
+        row = 2
+        ttk.Label(tab, text="Starting Program ID (auto-increment):").grid(
+            row=row, column=0, sticky=tk.W, pady=5); row+=1
+        ttk.Entry(tab, textvariable=self.meta_programid_start, width=12).grid(
+            row=row-1, column=1, sticky=tk.W)
     
-    row = 2
-    ttk.Label(tab, text="Starting Program ID (auto-increment):").grid(
-        row=row, column=0, sticky=tk.W, pady=5); row+=1
-    ttk.Entry(tab, textvariable=self.meta_programid_start, width=12).grid(
-        row=row-1, column=1, sticky=tk.W)
+        ttk.Label(tab, text="Library ID (Manual - Fixed):").grid(
+            row=row, column=0, sticky=tk.W, pady=5); row+=1
+        ttk.Entry(tab, textvariable=self.meta_libraryid_start, width=12).grid(
+            row=row-1, column=1, sticky=tk.W)
     
-    ttk.Label(tab, text="Library ID (Manual - Fixed):").grid(
-        row=row, column=0, sticky=tk.W, pady=5); row+=1
-    ttk.Entry(tab, textvariable=self.meta_libraryid_start, width=12).grid(
-        row=row-1, column=1, sticky=tk.W)
+        ttk.Label(tab, text="Default Program Version:").grid(
+            row=row, column=0, sticky=tk.W, pady=5); row+=1
+        ttk.Entry(tab, textvariable=self.meta_version, width=5).grid(
+            row=row-1, column=1, sticky=tk.W)
     
-    ttk.Label(tab, text="Default Program Version:").grid(
-        row=row, column=0, sticky=tk.W, pady=5); row+=1
-    ttk.Entry(tab, textvariable=self.meta_version, width=5).grid(
-        row=row-1, column=1, sticky=tk.W)
+        ttk.Label(tab, text="Setnumber (Manual - Fixed):").grid(
+            row=row, column=0, sticky=tk.W, pady=5); row+=1
+        ttk.Entry(tab, textvariable=self.meta_setnumber_start, width=6).grid(
+            row=row-1, column=1, sticky=tk.W)
     
-    ttk.Label(tab, text="Setnumber (Manual - Fixed):").grid(
-        row=row, column=0, sticky=tk.W, pady=5); row+=1
-    ttk.Entry(tab, textvariable=self.meta_setnumber_start, width=6).grid(
-        row=row-1, column=1, sticky=tk.W)
+        ttk.Label(tab, text="Starting historyid (auto-increment):").grid(
+            row=row, column=0, sticky=tk.W, pady=5); row+=1
+        ttk.Entry(tab, textvariable=self.meta_historyid_start, width=12).grid(
+            row=row-1, column=1, sticky=tk.W)
     
-    ttk.Label(tab, text="Starting historyid (auto-increment):").grid(
-        row=row, column=0, sticky=tk.W, pady=5); row+=1
-    ttk.Entry(tab, textvariable=self.meta_historyid_start, width=12).grid(
-        row=row-1, column=1, sticky=tk.W)
+        ttk.Label(tab, text="User ID (for creation & change):").grid(
+            row=row, column=0, sticky=tk.W, pady=5); row+=1
+        ttk.Entry(tab, textvariable=self.meta_userid, width=12).grid(
+            row=row-1, column=1, sticky=tk.W)
     
-    ttk.Label(tab, text="User ID (for creation & change):").grid(
-        row=row, column=0, sticky=tk.W, pady=5); row+=1
-    ttk.Entry(tab, textvariable=self.meta_userid, width=12).grid(
-        row=row-1, column=1, sticky=tk.W)
+        ttk.Label(tab, text="Default Notes:").grid(
+            row=row, column=0, sticky=tk.W, pady=5); row+=1
+        ttk.Entry(tab, textvariable=self.meta_default_notes, width=35).grid(
+            row=row-1, column=1, sticky=tk.W)
     
-    ttk.Label(tab, text="Default Notes:").grid(
-        row=row, column=0, sticky=tk.W, pady=5); row+=1
-    ttk.Entry(tab, textvariable=self.meta_default_notes, width=35).grid(
-        row=row-1, column=1, sticky=tk.W)
+        ttk.Label(tab, text="Creation/Change date will be set at time of generation.", 
+                 foreground="gray").grid(row=row, column=0, columnspan=2, sticky=tk.W)
+        row += 1
     
-    ttk.Label(tab, text="Creation/Change date will be set at time of generation.", 
-             foreground="gray").grid(row=row, column=0, columnspan=2, sticky=tk.W)
+        self.meta_use_allocator = tk.BooleanVar(value=False)
+        ttk.Checkbutton(tab, text=f"Reserve IDs from shared allocator ({ID_ALLOCATOR_DB}) - "
+                                  "start values above act as minimums",
+                       variable=self.meta_use_allocator).grid(
+            row=row, column=0, columnspan=2, sticky=tk.W, pady=(10, 0))
 
     #==================== END META DATA =====================
 
@@ -306,6 +3179,9 @@ class ERSAProgramGeneratorGUI:
                 ("Convection% Zone 1-3 (Column Pattern)", "Cooling_Top_Conv", "e.g., CZ_Top_Conv_Z1..."),
             ]),
             ("Cooling Zones - Bottom (Optional)", [
+                ("Temperature Zone 1-3 (Column Pattern)", "Cooling_Bottom_Temp", "e.g., CZ_Bot_Temp_Z1..."),
+                ("Tolerance+ Zone 1-3 (Column Pattern)", "Cooling_Bottom_TolPlus", "e.g., CZ_Bot_Plus_Z1..."),
+                ("Tolerance- Zone 1-3 (Column Pattern)", "Cooling_Bottom_TolMinus", "e.g., CZ_Bot_Minus_Z1..."),
                 ("Convection% Zone 1-3 (Column Pattern)", "Cooling_Bottom_Conv", "e.g., CZ_Bot_Conv_Z1..."),
             ]),
         ]
@@ -510,22 +3386,289 @@ class ERSAProgramGeneratorGUI:
         btn_frame.pack(fill='x', pady=(6, 0))
         ttk.Button(btn_frame, text="ðŸ“¤ Export Log", command=self.export_log).pack(side=tk.LEFT, padx=6)
         ttk.Button(btn_frame, text="ðŸ“¥ Export Skipped", command=self.export_skipped).pack(side=tk.LEFT, padx=6)
+        ttk.Button(btn_frame, text="🔍 Export Change Plan", command=self.export_change_plan).pack(side=tk.LEFT, padx=6)
         
         # Initial message
         self.log("ERSA Program Generator Enhanced Edition v2.0")
         self.log("=" * 80)
         self.log("Workflow: Load Excel â†’ Map Columns â†’ Edit Zones â†’ Generate")
         self.log("=" * 80 + "\n")
+    # ==================== BULK ZONE EDIT ====================
+    def create_bulk_edit_tab(self):
+        """Create expression console for zone edits across all programs"""
+        tab = ttk.Frame(self.notebook, padding="20")
+        self.notebook.add(tab, text="🧮 Bulk Zone Edit")
+        
+        ttk.Label(tab, text="Bulk Zone Edit (all programs at once)", 
+                 style='Title.TLabel').grid(row=0, column=0, columnspan=3, 
+                                           pady=(0, 10), sticky=tk.W)
+        ttk.Label(tab, 
+                 text="Syntax: <zone variable> = <expression> [where <condition>], e.g.\n"
+                      "    Heating_Top_Z3_Temp = Heating_Top_Z2_Temp + 10 where PCB_Length > 300\n"
+                      "Zone variables: Heating_Top_Z1_Temp ... Cooling_Bottom_Z3_Conv (Temp, TolPlus, TolMinus, Conv); "
+                      "board: PCB_Length, PCB_Width, CBS_Width. Edits are saved as zone overrides.",
+                 style='Info.TLabel').grid(row=1, column=0, columnspan=3, 
+                                          pady=(0, 10), sticky=tk.W)
+        
+        entry_frame = ttk.Frame(tab)
+        entry_frame.grid(row=2, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(0, 5))
+        self.bulk_edit_text = tk.StringVar()
+        entry = ttk.Entry(entry_frame, textvariable=self.bulk_edit_text, width=90)
+        entry.pack(side=tk.LEFT, padx=(0, 5))
+        entry.bind('<Return>', lambda e: self.preview_bulk_edit())
+        ttk.Button(entry_frame, text="👁 Preview", 
+                  command=self.preview_bulk_edit).pack(side=tk.LEFT, padx=5)
+        ttk.Button(entry_frame, text="✔ Apply", 
+                  command=self.apply_bulk_edit).pack(side=tk.LEFT, padx=5)
+        ttk.Button(entry_frame, text="↶ Undo", 
+                  command=self.undo_bulk_edit).pack(side=tk.LEFT, padx=5)
+        self.bulk_edit_summary = ttk.Label(tab, text="", style='Info.TLabel')
+        self.bulk_edit_summary.grid(row=3, column=0, columnspan=3, sticky=tk.W, pady=(0, 5))
+        
+        # Preview of the changed rows
+        columns = ('row', 'program', 'current', 'new')
+        self.bulk_edit_tree = ttk.Treeview(tab, columns=columns, show='headings', height=18)
+        for col, heading, width in zip(columns, ("Row", "Program", "Current", "New"), (70, 300, 100, 100)):
+            self.bulk_edit_tree.heading(col, text=heading)
+            self.bulk_edit_tree.column(col, width=width, anchor=tk.W)
+        scroll = ttk.Scrollbar(tab, orient="vertical", command=self.bulk_edit_tree.yview)
+        self.bulk_edit_tree.configure(yscrollcommand=scroll.set)
+        self.bulk_edit_tree.grid(row=4, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        scroll.grid(row=4, column=1, sticky=(tk.N, tk.S))
+        
+        # Applied edits (undo stack, newest last)
+        history_frame = ttk.LabelFrame(tab, text="Applied edits", padding="5")
+        history_frame.grid(row=4, column=2, sticky=(tk.W, tk.E, tk.N, tk.S), padx=(10, 0))
+        self.bulk_edit_history = tk.Listbox(history_frame, width=60, height=18)
+        self.bulk_edit_history.pack(fill='both', expand=True)
+        tab.rowconfigure(4, weight=1)
+        tab.columnconfigure(0, weight=1)
+    def _get_bulk_editor(self):
+        """Bulk editor on the current zone override store"""
+        if self.bulk_editor is None or self.bulk_editor.store is not self.get_zone_overrides():
+            self.bulk_editor = ZoneBulkEditor(self.get_zone_overrides())
+        return self.bulk_editor
+    def preview_bulk_edit(self):
+        """Evaluate the expression over all programs and show the rows it would change"""
+        if self.df is None:
+            messagebox.showerror("Error", "Please load an Excel file first!")
+            return
+        self.bulk_edit_plan = None
+        self.bulk_edit_tree.delete(*self.bulk_edit_tree.get_children())
+        try:
+            start = time.perf_counter()
+            plan = self._get_bulk_editor().evaluate(self.bulk_edit_text.get(), self.df, self.get_column_mapping())
+            elapsed = (time.perf_counter() - start) * 1000
+        except ValueError as e:
+            self.bulk_edit_summary.config(text=f"✗ {e}")
+            return
+        for row in ZoneBulkEditor.preview(plan).itertuples(index=False):
+            self.bulk_edit_tree.insert('', tk.END, values=(row.Row, row.Program,
+                                                           "" if np.isnan(row.Current) else f"{row.Current:g}",
+                                                           f"{row.New:g}"))
+        summary = (f"{plan['matched']} of {len(self.df)} programs match, {len(plan['rows'])} would change "
+                   f"({elapsed:.0f} ms)")
+        if plan['no_value']:
+            summary += f"; {plan['no_value']} without a value (left unchanged)"
+        if plan['conflicts']:
+            summary += f"; ⚠ {plan['conflicts']} duplicate program names get different values (last row wins)"
+        if len(plan['rows']) > BULK_EDIT_PREVIEW_ROWS:
+            summary += f" — showing first {BULK_EDIT_PREVIEW_ROWS}"
+        self.bulk_edit_summary.config(text=summary)
+        plan['df'] = self.df    # a reload invalidates the plan
+        self.bulk_edit_plan = plan
+    def apply_bulk_edit(self):
+        """Apply the previewed edit to the zone overrides (preview first if needed)"""
+        plan = self.bulk_edit_plan
+        stale = (plan is None or plan['text'] != self.bulk_edit_text.get().strip()
+                 or plan['df'] is not self.df or plan['store_version'] != self.get_zone_overrides().version)
+        if stale:
+            self.preview_bulk_edit()
+            if self.bulk_edit_plan is None:
+                return
+            if not messagebox.askyesno("Apply Bulk Edit", f"{len(self.bulk_edit_plan['rows'])} programs "
+                                       f"will change.\n\n{self.bulk_edit_plan['text']}\n\nApply?"):
+                return
+        plan = self.bulk_edit_plan
+        if not len(plan['rows']):
+            messagebox.showinfo("Info", "Nothing to change.")
+            return
+        try:
+            self._get_bulk_editor().apply(plan)
+        except ValueError as e:
+            self.bulk_edit_summary.config(text=f"✗ {e}")
+            return
+        finally:
+            self.bulk_edit_plan = None
+        if self._save_bulk_edits():
+            self.log(f"✓ Bulk edit applied to {len(plan['rows'])} programs: {plan['text']}")
+    def undo_bulk_edit(self):
+        """Revert the most recent bulk edit"""
+        text = self._get_bulk_editor().undo()
+        if text is None:
+            messagebox.showinfo("Info", "Nothing to undo.")
+            return
+        self.bulk_edit_plan = None
+        if self._save_bulk_edits():
+            self.log(f"↶ Bulk edit undone: {text}")
+    def _save_bulk_edits(self):
+        """Persist overrides after a bulk edit and refresh the views"""
+        overrides = self.get_zone_overrides()
+        try:
+            overrides.save(self._zone_overrides_path())
+        except Exception as e:
+            self.log(f"✗ Error saving zone overrides: {str(e)}", color='red')
+            messagebox.showerror("Error", f"Failed to save zone overrides:\n{str(e)}")
+            return False
+        self.bulk_edit_history.delete(0, tk.END)
+        for entry in self._get_bulk_editor().undo_stack:
+            self.bulk_edit_history.insert(tk.END, entry[0])
+        self.bulk_edit_tree.delete(*self.bulk_edit_tree.get_children())
+        self.bulk_edit_summary.config(text=f"{len(overrides)} programs with zone overrides")
+        self.load_program_zones(None)
+        return True
+    # ==================== TEMPLATE PARAMETERS ====================
+    def create_parameters_tab(self):
+        """Create template parameter browser with custom column bindings"""
+        tab = ttk.Frame(self.notebook, padding="20")
+        self.notebook.add(tab, text="🧩 Template Parameters")
+        
+        ttk.Label(tab, text="Browse Template Parameters & Bind Columns", 
+                 style='Title.TLabel').grid(row=0, column=0, columnspan=3, 
+                                           pady=(0, 10), sticky=tk.W)
+        ttk.Label(tab, 
+                 text="Search any ProgramParameter of the template and bind it to an Excel column "
+                      "(saved next to the column mapping, applied when generating).",
+                 style='Info.TLabel').grid(row=1, column=0, columnspan=3, 
+                                          pady=(0, 10), sticky=tk.W)
+        
+        # Search bar
+        search_frame = ttk.Frame(tab)
+        search_frame.grid(row=2, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(0, 5))
+        ttk.Label(search_frame, text="Search:").pack(side=tk.LEFT)
+        self.parameter_search = tk.StringVar()
+        self.parameter_search.trace_add('write', lambda *args: self.refresh_parameter_list())
+        ttk.Entry(search_frame, textvariable=self.parameter_search, width=50).pack(side=tk.LEFT, padx=5)
+        ttk.Button(search_frame, text="📄 Index Template", 
+                  command=self.index_template_parameters).pack(side=tk.LEFT, padx=5)
+        self.parameter_bound_only = tk.BooleanVar(value=False)
+        ttk.Checkbutton(search_frame, text="Bound only", variable=self.parameter_bound_only,
+                       command=self.refresh_parameter_list).pack(side=tk.LEFT, padx=5)
+        self.parameter_count_label = ttk.Label(search_frame, text="No template indexed", style='Info.TLabel')
+        self.parameter_count_label.pack(side=tk.LEFT, padx=10)
+        
+        # Parameter list
+        columns = ('variable', 'value', 'datatype', 'column')
+        self.parameter_tree = ttk.Treeview(tab, columns=columns, show='headings', height=22)
+        for col, heading, width in zip(columns, ("Variable Path", "Template Value", "Type", "Bound Column"),
+                                       (420, 120, 80, 200)):
+            self.parameter_tree.heading(col, text=heading)
+            self.parameter_tree.column(col, width=width, anchor=tk.W)
+        scroll = ttk.Scrollbar(tab, orient="vertical", command=self.parameter_tree.yview)
+        self.parameter_tree.configure(yscrollcommand=scroll.set)
+        self.parameter_tree.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S))
+        scroll.grid(row=3, column=2, sticky=(tk.N, tk.S))
+        tab.rowconfigure(3, weight=1)
+        tab.columnconfigure(0, weight=1)
+        
+        # Binding controls
+        bind_frame = ttk.Frame(tab)
+        bind_frame.grid(row=4, column=0, columnspan=3, sticky=tk.W, pady=(10, 0))
+        ttk.Label(bind_frame, text="Excel column:").pack(side=tk.LEFT)
+        self.parameter_column = tk.StringVar()
+        column_box = ttk.Combobox(bind_frame, textvariable=self.parameter_column, width=30, state='readonly')
+        column_box.configure(postcommand=lambda: column_box.configure(values=self.excel_columns))
+        column_box.pack(side=tk.LEFT, padx=5)
+        ttk.Button(bind_frame, text="🔗 Bind Selected", 
+                  command=self.bind_selected_parameters).pack(side=tk.LEFT, padx=5)
+        ttk.Button(bind_frame, text="✂ Unbind Selected", 
+                  command=self.unbind_selected_parameters).pack(side=tk.LEFT, padx=5)
+        ttk.Button(bind_frame, text="💾 Save Bindings", 
+                  command=self.save_custom_bindings).pack(side=tk.LEFT, padx=5)
+    def _custom_bindings_path(self):
+        """Custom bindings live next to the column mapping config"""
+        return os.path.join(os.path.dirname(os.path.abspath(self.config_file)), CUSTOM_BINDINGS_FILE)
+    def load_custom_bindings(self):
+        """Load saved {variable_path: column} bindings"""
+        try:
+            self.custom_bindings = load_custom_bindings(self._custom_bindings_path())
+            if self.custom_bindings:
+                self.log(f"✓ Loaded {len(self.custom_bindings)} custom parameter bindings")
+        except Exception as e:
+            self.custom_bindings = {}
+            self.log(f"⚠ Could not load {CUSTOM_BINDINGS_FILE}: {str(e)}")
+    def save_custom_bindings(self):
+        """Persist custom bindings next to the column mapping config"""
+        try:
+            with open(self._custom_bindings_path(), 'w', encoding='utf-8') as f:
+                json.dump(self.custom_bindings, f, indent=2)
+            self.log(f"✓ Saved {len(self.custom_bindings)} custom parameter bindings")
+            messagebox.showinfo("Success", f"{len(self.custom_bindings)} parameter bindings saved!")
+        except Exception as e:
+            self.log(f"✗ Error saving bindings: {str(e)}", color='red')
+    def index_template_parameters(self):
+        """Parse the template once into the searchable parameter index"""
+        template = self.template_file.get()
+        if not template or not os.path.exists(template):
+            messagebox.showerror("Error", "Please select a valid template XML file!")
+            return
+        try:
+            start = time.perf_counter()
+            self.parameter_index = TemplateParameterIndex.from_file(template)
+            self.log(f"✓ Indexed {len(self.parameter_index)} template parameters "
+                     f"({(time.perf_counter() - start) * 1000:.0f} ms)")
+            missing = [path for path in self.custom_bindings if path not in self.parameter_index]
+            if missing:
+                self.log(f"⚠ {len(missing)} bound paths are not in this template: {', '.join(missing[:5])}")
+            self.refresh_parameter_list()
+        except Exception as e:
+            self.log(f"✗ Error indexing template: {str(e)}", color='red')
+            messagebox.showerror("Error", f"Failed to index template:\n{str(e)}")
+    def refresh_parameter_list(self):
+        """Show the parameters matching the search (first PARAMETER_LIST_LIMIT)"""
+        if self.parameter_index is None:
+            return
+        index = self.parameter_index
+        matches = index.search(self.parameter_search.get())
+        if self.parameter_bound_only.get():
+            matches = [i for i in matches if index.paths[i] in self.custom_bindings]
+        self.parameter_tree.delete(*self.parameter_tree.get_children())
+        for i in matches[:PARAMETER_LIST_LIMIT]:
+            path = index.paths[i]
+            self.parameter_tree.insert('', tk.END, iid=path, values=(
+                path, index.values[i], index.datatypes[i], self.custom_bindings.get(path, "")))
+        shown = min(len(matches), PARAMETER_LIST_LIMIT)
+        self.parameter_count_label.config(
+            text=f"{len(matches)} of {len(index)} parameters" + (f" (showing {shown})" if shown < len(matches) else ""))
+    def bind_selected_parameters(self):
+        """Bind the selected variable paths to the chosen Excel column"""
+        column = self.parameter_column.get()
+        selected = self.parameter_tree.selection()
+        if not column or not selected:
+            messagebox.showinfo("Info", "Select one or more parameters and an Excel column first.")
+            return
+        for path in selected:
+            self.custom_bindings[path] = column
+            self.parameter_tree.set(path, 'column', column)
+        self.log(f"✓ Bound {len(selected)} parameter(s) → {column} (Save Bindings to keep)")
+    def unbind_selected_parameters(self):
+        """Remove the bindings of the selected variable paths"""
+        selected = [path for path in self.parameter_tree.selection() if path in self.custom_bindings]
+        for path in selected:
+            del self.custom_bindings[path]
+            self.parameter_tree.set(path, 'column', "")
+        if selected:
+            self.log(f"✓ Unbound {len(selected)} parameter(s) (Save Bindings to keep)")
     # ==================== FILE OPERATIONS ====================
     def browse_excel(self):
-        """Browse for Excel file"""
+        """Browse for the data file (Excel, CSV, Parquet or Feather)"""
         filename = filedialog.askopenfilename(
-            title="Select Excel Data File",
-            filetypes=[("Excel files", "*.xlsx *.xls"), ("All files", "*.*")]
+            title="Select Data File",
+            filetypes=INPUT_FILETYPES
         )
         if filename:
             self.excel_file.set(filename)
-            self.log(f"âœ“ Excel file selected: {os.path.basename(filename)}")
+            self.log(f"âœ“ Data file selected: {os.path.basename(filename)}")
     def browse_template(self):
         """Browse for template XML"""
         filename = filedialog.askopenfilename(
@@ -542,44 +3685,88 @@ class ERSAProgramGeneratorGUI:
             self.output_folder.set(folder)
             self.log(f"âœ“ Output folder selected: {folder}")
     def load_excel_file(self):
-        """Load Excel file and populate column dropdowns"""
+        """Load the data file (any supported format) and populate column dropdowns"""
         excel_path = self.excel_file.get()
         
         if not excel_path or not os.path.exists(excel_path):
-            messagebox.showerror("Error", "Please select a valid Excel file first!")
+            messagebox.showerror("Error", "Please select a valid data file first!")
             return
         
         try:
-            self.log("\nLoading Excel file...")
-            self.df = pd.read_excel(excel_path)
-            self.excel_columns = list(self.df.columns)
-            
-            self.log(f"âœ“ Loaded {len(self.df)} programs")
-            self.log(f"  Excel columns found: {', '.join(self.excel_columns)}")
+            self.log(f"\nLoading {os.path.basename(excel_path)}...")
+            start = time.perf_counter()
+            schema = input_columns(excel_path)
+            columns = None
+            if self.input_projection.get():
+                columns = mapped_columns(schema, self.get_column_mapping(), self.custom_bindings) or None
+                if columns:
+                    self.log(f"  Reading {len(columns)} of {len(schema)} columns "
+                             f"(reload after changing the mapping)")
+            chunksize = default_chunksize(excel_path)
+            progress = (lambda rows: self.log(f"  ... {rows} rows")) if chunksize else None
+            self.df = read_input(excel_path, columns, chunksize=chunksize, progress=progress)
+            self.log(f"✓ Parsed in {time.perf_counter() - start:.1f} s")
+            self._populate_columns(schema)
             
-            # Update all dropdown comboboxes with Excel columns
-            dropdown_values = ["(None)"] + self.excel_columns
-            
-            for key, var in self.mapping_vars.items():
-                for widget in self.root.winfo_children():
-                    self._update_comboboxes_recursive(widget, var, dropdown_values)
-            
-            self.log("âœ“ Dropdown lists updated with your Excel columns")
+            messagebox.showinfo("Success", 
+                              f"Data loaded!\n{len(self.df)} programs found\n\n"
+                              f"Next: Go to 'Column Mapping' tab to map your columns")
             
-            # Auto-detect common columns
-            self.auto_detect_columns()
+        except Exception as e:
+            self.log(f"âœ— Error loading data file: {str(e)}")
+            messagebox.showerror("Error", f"Failed to load data file:\n{str(e)}")
+    def load_batch_files(self):
+        """Load several workbooks (optionally all sheets) as one generation run"""
+        paths = filedialog.askopenfilenames(
+            title="Select Workbooks / Data Files",
+            filetypes=INPUT_FILETYPES
+        )
+        if not paths:
+            return
+        
+        try:
+            self.log(f"\nLoading batch of {len(paths)} workbook(s)...")
+            start = time.perf_counter()
+            overrides = load_sheet_overrides(SHEET_OVERRIDES_FILE)
+            self.df = load_batch(list(paths), self.get_column_mapping(), overrides,
+                                 all_sheets=self.batch_all_sheets.get())
+            self.excel_file.set(paths[0])
             
-            # Update program list and selectors
-            self.update_program_list()
-            self.update_program_selectors()
+            for source, count in self.df[SOURCE_COLUMN].value_counts(sort=False).items():
+                self.log(f"  {source}: {count} programs")
+            self.log(f"✓ Batch parsed in {time.perf_counter() - start:.1f} s")
+            self._populate_columns()
             
             messagebox.showinfo("Success", 
-                              f"Excel loaded!\n{len(self.df)} programs found\n\n"
-                              f"Next: Go to 'Column Mapping' tab to map your columns")
-            
+                              f"Batch loaded!\n{len(self.df)} programs from "
+                              f"{self.df[SOURCE_COLUMN].nunique()} sheet(s)")
         except Exception as e:
-            self.log(f"âœ— Error loading Excel: {str(e)}")
-            messagebox.showerror("Error", f"Failed to load Excel:\n{str(e)}")
+            self.log(f"✗ Error loading batch: {str(e)}")
+            messagebox.showerror("Error", f"Failed to load batch:\n{str(e)}")
+    def _populate_columns(self, schema=None):
+        """Refresh column dropdowns, program list and selectors after a load"""
+        # with a projected load the dropdowns still offer every column of the file
+        self.excel_columns = [col for col in (schema or self.df.columns) if col != SOURCE_COLUMN]
+        self.bulk_edit_plan = None    # previewed on the previous data
+        
+        self.log(f"âœ“ Loaded {len(self.df)} programs")
+        self.log(f"  Excel columns found: {', '.join(map(str, self.excel_columns))}")
+        
+        # Update all dropdown comboboxes with Excel columns
+        dropdown_values = ["(None)"] + self.excel_columns
+        
+        for key, var in self.mapping_vars.items():
+            for widget in self.root.winfo_children():
+                self._update_comboboxes_recursive(widget, var, dropdown_values)
+        
+        self.log("âœ“ Dropdown lists updated with your Excel columns")
+        
+        # Auto-detect common columns
+        self.auto_detect_columns()
+        
+        # Update program list and selectors
+        self.update_program_list()
+        self.update_program_selectors()
     def _update_comboboxes_recursive(self, widget, var, values):
         """Recursively find and update comboboxes"""
         try:
@@ -650,7 +3837,7 @@ class ERSAProgramGeneratorGUI:
                 self.load_program_zones(None)
     # ==================== ZONE OPERATIONS ====================
     def load_program_zones(self, event):
-        """Load zone data for selected program from Excel"""
+        """Load zone data for selected program from Excel (plus saved overrides)"""
         if self.df is None:
             return
         
@@ -659,36 +3846,23 @@ class ERSAProgramGeneratorGUI:
             return
         
         self.current_program_index = idx
-        row = self.df.iloc[idx]
-        
-        # Load zone values from Excel columns (if mapped)
-        for var_key in self.zone_vars:
-            parts = var_key.split('_')
-            if len(parts) >= 4:
-                zone_type = '_'.join(parts[:-2])  # "Heating_Top"
-                zone_num = parts[-2].replace('Z', '')  # "1"
-                param_type = parts[-1]  # "Temp"
-                
-                mapping_key = f"{zone_type}_{param_type}"
-                if mapping_key in self.mapping_vars:
-                    col_pattern = self.mapping_vars[mapping_key].get()
-                    
-                    if col_pattern and col_pattern != "(None)":
-                        possible_cols = [
-                            f"{col_pattern}{zone_num}",
-                            f"{col_pattern}_{zone_num}",
-                            f"{col_pattern}_Z{zone_num}",
-                        ]
-                        
-                        for col in possible_cols:
-                            if col in self.df.columns:
-                                value = row[col]
-                                if pd.notna(value):
-                                    self.zone_vars[var_key].set(str(value))
-                                break
-        
         program_name = self.program_selector.get()
-        self.log(f"Loaded zones for: {program_name}")
+        
+        # Excel values for this row, then any saved per-program edits on top
+        values = build_zone_matrix(self.df.iloc[[idx]], self.get_column_mapping())
+        overrides = self.get_zone_overrides()
+        overrides.apply(values, [program_name])
+        
+        for slot, zone_key in enumerate(ZONE_SLOTS):
+            for param_idx, param in enumerate(ZONE_PARAMS):
+                var_key = f"{zone_key}_{param}"
+                if var_key in self.zone_vars:
+                    value = values[0, slot, param_idx]
+                    self.zone_vars[var_key].set("" if np.isnan(value) else f"{float(value):g}")
+        
+        edited = overrides.get(program_name)
+        note = f" ({int(edited[1].sum())} edited values)" if edited is not None else ""
+        self.log(f"Loaded zones for: {program_name}{note}")
     def prev_program(self):
         """Navigate to previous program"""
         current = self.program_selector.current()
@@ -704,9 +3878,53 @@ class ERSAProgramGeneratorGUI:
             self.cooling_selector.current(current + 1)
             self.load_program_zones(None)
     def save_zone_changes(self):
-        """Save manually edited zone values"""
-        messagebox.showinfo("Info", "Zone changes saved for current program!")
-        self.log("âœ“ Zone values updated")
+        """Save manually edited zone values as overrides for the current program"""
+        if self.df is None or self.program_selector.current() < 0:
+            messagebox.showerror("Error", "Please load an Excel file and select a program first!")
+            return
+        
+        idx = self.program_selector.current()
+        program_name = self.program_selector.get()
+        excel = build_zone_matrix(self.df.iloc[[idx]], self.get_column_mapping())[0]
+        
+        values = np.full(excel.shape, np.nan, dtype=np.float32)
+        for slot, zone_key in enumerate(ZONE_SLOTS):
+            for param_idx, param in enumerate(ZONE_PARAMS):
+                var = self.zone_vars.get(f"{zone_key}_{param}")
+                try:
+                    values[slot, param_idx] = float(var.get()) if var and var.get().strip() else np.nan
+                except ValueError:
+                    messagebox.showerror("Error", f"Invalid number for {zone_key} {param}: {var.get()}")
+                    return
+        
+        # Only values that differ from the Excel sheet count as edits
+        entered = ~np.isnan(values)
+        edited = entered & (np.isnan(excel) | ~np.isclose(values, excel))
+        
+        overrides = self.get_zone_overrides()
+        overrides.set_program(program_name, values, edited)
+        try:
+            overrides.save(self._zone_overrides_path())
+        except Exception as e:
+            self.log(f"✗ Error saving zone overrides: {str(e)}")
+            messagebox.showerror("Error", f"Failed to save zone overrides:\n{str(e)}")
+            return
+        
+        messagebox.showinfo("Info", f"Zone changes saved for {program_name}!")
+        self.log(f"✓ Zone values updated for {program_name}: {int(edited.sum())} edited values "
+                 f"({len(overrides)} programs with overrides)")
+    def _zone_overrides_path(self):
+        """Zone overrides live next to the column mapping config"""
+        return os.path.join(os.path.dirname(os.path.abspath(self.config_file)), ZONE_OVERRIDES_FILE)
+    def get_zone_overrides(self):
+        """Per-program zone override store (loaded on first use)"""
+        if self.zone_overrides is None:
+            try:
+                self.zone_overrides = ZoneOverrideStore.load(self._zone_overrides_path())
+            except Exception as e:
+                self.log(f"⚠ Could not load zone overrides: {str(e)}")
+                self.zone_overrides = ZoneOverrideStore()
+        return self.zone_overrides
     # ==================== CONFIGURATION ====================
     def save_mapping(self):
         """Save column mapping to JSON file"""
@@ -737,32 +3955,151 @@ class ERSAProgramGeneratorGUI:
             except Exception as e:
                 self.log(f"âš  Could not load saved mapping: {str(e)}")
 
+    def get_column_mapping(self):
+        """Return the current mapping as a plain {param_key: column} dict"""
+        return {key: var.get() for key, var in self.mapping_vars.items()
+                if var.get() and var.get() != "(None)"}
+
+    def load_heating_mapping(self):
+        """Load heating zone → XML variable path mapping from JSON"""
+        self.heating_zone_mapping = self._load_zone_mapping_file("heating_zone_mapping.json")
+
+    def load_cooling_mapping(self):
+        """Load cooling zone → XML variable path mapping from JSON"""
+        self.cooling_zone_mapping = self._load_zone_mapping_file("cooling_zone_mapping.json")
+
+    def save_heating_mapping(self):
+        """Save heating zone → XML variable path mapping to JSON"""
+        with open("heating_zone_mapping.json", 'w') as f:
+            json.dump(self.heating_zone_mapping, f, indent=2)
+
+    def save_cooling_mapping(self):
+        """Save cooling zone → XML variable path mapping to JSON"""
+        with open("cooling_zone_mapping.json", 'w') as f:
+            json.dump(self.cooling_zone_mapping, f, indent=2)
+
+    def _load_zone_mapping_file(self, path):
+        """Read a {zone_key: variable_path} JSON file (empty if missing)"""
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            self.log(f"⚠ Could not load {path}: {str(e)}")
+            return {}
+
+    def load_machine_rules(self):
+        """Load machine-limit rules (machine_rules.json or built-in defaults)"""
+        try:
+            self.machine_rules = load_machine_rules(MACHINE_RULES_FILE)
+            source = MACHINE_RULES_FILE if os.path.exists(MACHINE_RULES_FILE) else "built-in defaults"
+            self.log(f"✓ Loaded {len(self.machine_rules)} machine rules from {source}")
+        except Exception as e:
+            self.machine_rules = list(DEFAULT_MACHINE_RULES)
+            self.log(f"⚠ Could not load {MACHINE_RULES_FILE}, using defaults: {str(e)}")
+
     def save_all_mappings(self):
-    """Save all mappings at once"""
-    try:
-        self.save_mapping()
-        self.save_heating_mapping()
-        self.save_cooling_mapping()
-        self.log("✓ All mappings saved successfully")
-        messagebox.showinfo("Success", "All column mappings saved!")
-    except Exception as e:
-        self.log(f"✗ Error saving mappings: {str(e)}")
+        """Save all mappings at once"""
+        try:
+            self.save_mapping()
+            self.save_heating_mapping()
+            self.save_cooling_mapping()
+            self.log("✓ All mappings saved successfully")
+            messagebox.showinfo("Success", "All column mappings saved!")
+        except Exception as e:
+            self.log(f"✗ Error saving mappings: {str(e)}")
 
     # ==================== GENERATION ====================
-    def start_generation(self):
-        """Start program generation process"""
-        # Validation
+    def check_machine_rules(self):
+        """Validate the loaded sheet against the machine rules and log the report"""
         if self.df is None:
             messagebox.showerror("Error", "Please load an Excel file first!")
             return
         
-        if not self.template_file.get() or not os.path.exists(self.template_file.get()):
-            messagebox.showerror("Error", "Please select a valid template XML file!")
-            return
+        start = time.perf_counter()
+        mapping = self.get_column_mapping()
+        zones = build_zone_matrix(self.df, mapping)
+        self.get_zone_overrides().apply(zones, program_names(self.df, mapping))
+        rule_pass, self.rule_violations = evaluate_machine_rules(
+            self.df, mapping, self.machine_rules, zone_matrix=zones)
+        elapsed = (time.perf_counter() - start) * 1000
         
-        if self.mapping_vars.get('STENCIL', tk.StringVar()).get() == "(None)":
-            messagebox.showerror("Error", "Please map the STENCIL/PCB Name column!\n\n"
-                               "Go to 'Column Mapping' tab and select which column contains PCB names.")
+        failed = len(self.df) - int(rule_pass.sum())
+        self.log(f"\nMachine rules: {len(self.df) - failed}/{len(self.df)} programs pass "
+                 f"({len(self.rule_violations)} violations, {elapsed:.0f} ms)")
+        for row, message in list(summarize_violations(self.rule_violations).items())[:50]:
+            self.log(f"  ✗ Row {row + 1}: {message}", color='red')
+        if failed > 50:
+            self.log(f"  ... {failed - 50} more rows (see 'Export Skipped' after generation)")
+        self.notebook.select(4)
+    def load_thermal_profile_config(self):
+        """Load estimator settings (thermal_profile.json or built-in defaults)"""
+        try:
+            self.thermal_config = load_thermal_profile_config(THERMAL_PROFILE_FILE)
+        except Exception as e:
+            self.thermal_config = dict(DEFAULT_THERMAL_PROFILE)
+            self.log(f"⚠ Could not load {THERMAL_PROFILE_FILE}, using defaults: {str(e)}")
+    def estimate_profiles(self):
+        """Estimate the reflow profile of every loaded program and log the flagged ones"""
+        if self.df is None:
+            messagebox.showerror("Error", "Please load an Excel file first!")
+            return
+        mapping = self.get_column_mapping()
+        start = time.perf_counter()
+        names = program_names(self.df, mapping)
+        matrix = build_zone_matrix(self.df, mapping)
+        self.get_zone_overrides().apply(matrix, names)
+        if not has_zone_temperatures(matrix):
+            self.log("Thermal profile estimate skipped: no zone temperatures mapped", color='red')
+            self.notebook.select(4)
+            return
+        length, width = (measure_series(self.df[mapping[key]]).to_numpy() if mapping.get(key) in self.df.columns
+                         else np.full(len(self.df), np.nan) for key in ('PCB_Length', 'PCB_Width'))
+        report = estimate_thermal_profiles(matrix, length, width, self.thermal_config)
+        report.index = self.df.index
+        report.insert(0, 'Program', names)
+        self.thermal_report = report
+        log_thermal_report(report, self.log, (time.perf_counter() - start) * 1000)
+        self.notebook.select(4)
+    def find_similar_programs(self):
+        """Log the programs most similar to the selected one (workbook and catalog library)"""
+        if self.df is None:
+            messagebox.showerror("Error", "Please load an Excel file first!")
+            return
+        selection = self.program_listbox.curselection()
+        position = selection[0] if selection else self.current_program_index
+        if position is None or position >= len(self.df):
+            messagebox.showinfo("Info", "Select a program in the list first.")
+            return
+        try:
+            start = time.perf_counter()
+            names, features = workbook_features(self.df, self.get_column_mapping(), self.get_zone_overrides())
+            self.similarity.set_source('workbook', names, list(self.df.index + 1), features)
+            catalog_path = os.path.join(os.path.dirname(os.path.abspath(self.config_file)), CATALOG_DB)
+            if self.similar_include_library.get() and os.path.exists(catalog_path):
+                fingerprint = ProgramCatalog(catalog_path).fingerprint()
+                if fingerprint != self._library_fingerprint:
+                    library_names, program_ids, library_features = catalog_features(catalog_path)
+                    self.similarity.set_source('library', library_names, program_ids, library_features)
+                    self._library_fingerprint = fingerprint
+            else:
+                self.similarity.drop_source('library')
+            matches = self.similarity.query_program('workbook', position)
+            elapsed = (time.perf_counter() - start) * 1000
+            
+            self.log(f"\nPrograms most similar to {names[position]} "
+                     f"(of {len(self.similarity)}, {elapsed:.0f} ms):")
+            for match in matches.itertuples():
+                where = f"row {match.Label}" if match.Source == 'workbook' else f"catalog ID {match.Label}"
+                self.log(f"  {match.Program:<30} {where:<20} distance {match.Distance:.3f}  "
+                         f"L={match.Length:g} W={match.Width:g} CBS={match.CBS:g}")
+            self.notebook.select(4)
+        except Exception as e:
+            self.log(f"✗ Similar-program search failed: {str(e)}", color='red')
+    def start_generation(self):
+        """Start program generation process"""
+        if not self._check_generation_inputs():
             return
         
         # Disable button and show progress
@@ -777,164 +4114,78 @@ class ERSAProgramGeneratorGUI:
         thread = threading.Thread(target=self.generate_programs)
         thread.daemon = True
         thread.start()
+    def start_dry_run(self):
+        """Compute the change plan in a background thread (no files written)"""
+        if not self._check_generation_inputs():
+            return
+        self.dry_run_btn.config(state='disabled')
+        self.progress.start()
+        self.notebook.select(4)
+        threading.Thread(target=self.run_dry_run, daemon=True).start()
+    def _check_generation_inputs(self):
+        """Validate workbook, template and name mapping before a run"""
+        if self.df is None:
+            messagebox.showerror("Error", "Please load an Excel file first!")
+            return False
+        
+        if not self.template_file.get() or not os.path.exists(self.template_file.get()):
+            messagebox.showerror("Error", "Please select a valid template XML file!")
+            return False
+        
+        if self.mapping_vars.get('STENCIL', tk.StringVar()).get() == "(None)":
+            messagebox.showerror("Error", "Please map the STENCIL/PCB Name column!\n\n"
+                               "Go to 'Column Mapping' tab and select which column contains PCB names.")
+            return False
+        return True
+    def collect_generation_settings(self):
+        """Snapshot the GUI state as a plain settings dict for ProgramGenerator"""
+        return {
+            'template_path': self.template_file.get(),
+            'output_dir': self.output_folder.get(),
+            'mapping': self.get_column_mapping(),
+            'metadata': {
+                'programid_start': self.meta_programid_start.get(),
+                'libraryid': self.meta_libraryid_start.get(),
+                'version': self.meta_version.get(),
+                'setnumber': self.meta_setnumber_start.get(),
+                'historyid_start': self.meta_historyid_start.get(),
+                'userid': self.meta_userid.get(),
+                'notes': self.meta_default_notes.get(),
+            },
+            'zone_paths': {**self.heating_zone_mapping, **self.cooling_zone_mapping},
+            'output_layout': self.output_layout.get(),
+            'write_files': EXPORT_MODES[self.export_mode.get()][0],
+            'stream_export': EXPORT_MODES[self.export_mode.get()][1],
+            'machine_rules': self.machine_rules,
+            'writer_threads': self.writer_threads.get(),
+            'verify': self.verify_output.get(),
+            'workbook': os.path.basename(self.excel_file.get()),
+            'id_allocator': self._id_allocator_path() if self.meta_use_allocator.get() else None,
+            'catalog': (os.path.join(os.path.dirname(os.path.abspath(self.config_file)), CATALOG_DB)
+                        if self.record_catalog.get() else None),
+            'custom_bindings': dict(self.custom_bindings),
+            'thermal_profile': self.thermal_config if self.profile_before_generation.get() else None,
+            'output_store': (os.path.join(os.path.dirname(os.path.abspath(self.config_file)), OUTPUT_STORE_DIR)
+                             if self.keep_history.get() else None),
+        }
+    def _id_allocator_path(self):
+        """The ID allocator database lives next to the column mapping config"""
+        return os.path.join(os.path.dirname(os.path.abspath(self.config_file)), ID_ALLOCATOR_DB)
     def generate_programs(self):
-        """Main generation logic with CBS â†’ Park Position logic"""
+        """Main generation logic with CBS → Park Position logic"""
         try:
-            template_path = self.template_file.get()
-            output_dir = self.output_folder.get()
-            
             self.log("\n" + "=" * 80)
             self.log("\nSTARTING PROGRAM GENERATION\n")
             self.log("=" * 80)
             
-            # Create output directory
-            if not os.path.exists(output_dir):
-                os.makedirs(output_dir)
-                self.log(f"\nâœ“ Created output folder: {output_dir}\n")
-            
-            # Parse template
-            self.log("\nParsing template XML...\n")
-            template_tree = ET.parse(template_path)
-            template_root = template_tree.getroot()
-            self.log("\nâœ“ Template loaded\n")
-            
-            # Get column mappings
-            stencil_col = self.mapping_vars.get('STENCIL', tk.StringVar()).get()
-            length_col = self.mapping_vars.get('PCB_Length', tk.StringVar()).get()
-            width_col = self.mapping_vars.get('PCB_Width', tk.StringVar()).get()
-            cbs_col = self.mapping_vars.get('CBS_Width', tk.StringVar()).get()
-            
-            self.log(f"\nColumn Mapping:")
-            self.log(f"\n  PCB Name: {stencil_col}")
-            self.log(f"\n  PCB Length: {length_col}")
-            self.log(f"\n  PCB Width: {width_col}")
-            self.log(f"\n  CBS Width: {cbs_col}")
-            
-            # Generate programs
-            self.log(f"\n{'='*80}\n")
-            self.log("\nGENERATING PROGRAMS\n")
-            self.log("\n"+'='*80 + "\n")
-            
-            success_count = 0
-            
-            for idx, row in self.df.iterrows():
-                pcb_name = str(row[stencil_col]) if stencil_col and stencil_col != "(None)" and stencil_col in self.df.columns else f"Program_{idx+1}"
-                self.log(f"\n[{idx+1}/{len(self.df)}] Processing: {pcb_name}\n")
-                
-                # determine length/width values up-front (used both for validation and updates)
-                length_val = None
-                width_val = None
-
-                def _valid_measure(v):
-                    # treat NaN, empty, NA/N/A, '-' as invalid
-                    if pd.isna(v):
-                        return None
-                    if isinstance(v, str):
-                        s = v.strip()
-                        if s == "" or s.upper() in ("NA", "N/A", "-"):
-                            return None
-                        # try numeric conversion for strings like "75"
-                        try:
-                            f = float(s)
-                        except Exception:
-                            return None
-                        return f if f > 0 else None
-                    # numeric types
-                    try:
-                        f = float(v)
-                        return f if f > 0 else None
-                    except Exception:
-                        return None
-
-                if length_col and length_col != "(None)" and length_col in self.df.columns:
-                    tmp = row[length_col]
-                    length_val = _valid_measure(tmp)
-
-                if width_col and width_col != "(None)" and width_col in self.df.columns:
-                    tmp = row[width_col]
-                    width_val = _valid_measure(tmp)
-
-                # Require BOTH length and width to be valid; if either is missing/zero/invalid, skip this program
-                if length_val is None or width_val is None:
-                    reason = "Missing/invalid PCB Length or PCB Width (blank/0/NA/invalid) â€” both required"
-                    try:
-                        self.skipped_programs.append({'Program': pcb_name, 'Reason': reason})
-                    except Exception:
-                        self.skipped_programs = [{'Program': pcb_name, 'Reason': reason}]
-                    self.log(f"  âœ— Skipped {pcb_name} â€” {reason}", color='red')
-                    continue
-
-                try:
-                    # Create copy of template
-                    new_tree = ET.ElementTree(ET.fromstring(ET.tostring(template_root)))
-                    new_root = new_tree.getroot()
-                    
-                    # Update metadata (use configured meta fields)
-                    try:
-                        self.update_program_metadata(new_root, pcb_name, idx)
-                    except Exception:
-                        self.log("  âš  Failed to update metadata (continuing)", color=None)
-                    
-                    # Update parameters
-                    updates = 0
-                    
-                    # PCB Length (use length_val)
-                    if length_val is not None:
-                        if self.update_xml_param(new_root, 'enmProg|enmPcb|enmSngSollLaenge', length_val):
-                            updates += 1
-                    
-                    # PCB Width (use width_val)
-                    if width_val is not None:
-                        if self.update_xml_param(new_root, 'enmProg|enmA_AxBr|1|enmSngSoll', width_val):
-                            updates += 1
-                    
-                    # CBS and Park Position Logic
-                    if cbs_col and cbs_col != "(None)" and cbs_col in self.df.columns:
-                        cbs_val = row[cbs_col]
-                        
-                        if pd.isna(cbs_val) or (isinstance(cbs_val, str) and str(cbs_val).strip().upper() == 'NA'):
-                            # CBS is NA â†’ Park = True, CBS Active = False
-                            park_active = True
-                            cbs_active = False
-                            self.log(f"  â†’ CBS is NA/empty â†’ Park_Active = True, CBS_Active = False")
-                        else:
-                            # validate CBS value similar to pcb measures
-                            validated_cbs = _valid_measure(cbs_val)
-                            if validated_cbs is None:
-                                park_active = True
-                                cbs_active = False
-                                self.log(f"  â†’ CBS value invalid â†’ Park_Active = True, CBS_Active = False")
-                            else:
-                                park_active = False
-                                cbs_active = True
-                                self.log(f"  â†’ CBS = {validated_cbs} â†’ Park_Active = False, CBS_Active = True")
-                                # Update CBS Width value
-                                if self.update_xml_param(new_root, 'enmProg|enmA_Tr|1|enmSngSoll', validated_cbs):
-                                    updates += 1
-                                # Update CBS Active/Enable parameter
-                                if self.update_xml_param(new_root, 'enmProg|enmA_Tr|1|enmBlnSollAktiv', cbs_active, 'Boolean'):
-                                    updates += 1
-                        
-                        # Update Park Position
-                        if self.update_xml_param(new_root, 'enmProg|enmA_AxMu|1|enmBlnParkPosSollAktiv', 
-                                                park_active, 'Boolean'):
-                            updates += 1
-                    
-                    # Update zone parameters from zone_vars if edited (optional logic left as-is)
-                    self.log(f" \n âœ“ Updated {updates} parameters\n")
-                    
-                    # Save file
-                    safe_name = pcb_name.replace('/', '_').replace(' ', '_')
-                    output_filename = f"{safe_name}.xml"
-                    output_path = os.path.join(output_dir, output_filename)
-                    new_tree.write(output_path, encoding='utf-8', xml_declaration=True)
-                    self.log(f"\n  âœ“ Saved: {output_filename}\n")
-                    
-                    success_count += 1
-                    
-                except Exception as e:
-                    self.log(f"  âœ— Error: {str(e)}\n")
-                    self.log(traceback.format_exc())
+            settings = self.collect_generation_settings()
+            generator = ProgramGenerator(settings, log=self.log,
+                                         zone_overrides=self.get_zone_overrides())
+            result = generator.run(self.df)
+            self.skipped_programs = result['skipped']
+            self.rule_violations = result['violations']
+            success_count = result['success_count']
+            output_dir = settings['output_dir']
             
             # Summary
             self.log('='*80)
@@ -943,123 +4194,160 @@ class ERSAProgramGeneratorGUI:
                 self.log(f"\nSkipped programs: {len(self.skipped_programs)} (use 'Export Skipped' to save details)\n")
             self.log('='*80 + "\n")
             
+            if ANNOTATION_MODES[self.annotate_mode.get()]:
+                self.annotate_source(generator.annotations(), ANNOTATION_MODES[self.annotate_mode.get()])
+            
             self.root.after(0, lambda: messagebox.showinfo(
                 "Success", 
                 f"Generated {success_count}/{len(self.df)} programs!\n\nOutput: {output_dir}"
             ))
             
         except Exception as e:
-            self.log(f"\nâœ— FATAL ERROR: {str(e)}")
+            self.log(f"\n✗ FATAL ERROR: {str(e)}")
             self.log(traceback.format_exc())
             self.root.after(0, lambda: messagebox.showerror("Error", f"Generation failed:\n{str(e)}"))
         
         finally:
             self.root.after(0, lambda: self.generate_btn.config(state='normal'))
             self.root.after(0, lambda: self.progress.stop())
-    def update_program_metadata(self, root, program_name, row_index):
-        """Update SolderingPrograms metadata using configured meta fields"""
+
+    def annotate_source(self, annotations, mode):
+        """Write programid/historyid/output file/skip reason back to the loaded data file"""
+        if SOURCE_COLUMN in self.df.columns:
+            self.log("⚠ Back-annotation is not available for batch loads", color='red')
+            return
+        try:
+            start = time.perf_counter()
+            # a projected load lacks columns: write_annotations then re-reads the whole file
+            complete = set(self.excel_columns) <= set(self.df.columns)
+            path = write_annotations(self.excel_file.get(), annotations, mode,
+                                     data=self.df if complete else None)
+            self.log(f"✓ Annotated {len(annotations)} rows: {os.path.basename(path)}"
+                     f"{f' (sheet {ANNOTATION_SHEET})' if path.lower().endswith('.xlsx') else ''} "
+                     f"({time.perf_counter() - start:.1f} s)")
+        except Exception as e:
+            self.log(f"✗ Back-annotation failed: {str(e)}", color='red')
+    def start_migration(self):
+        """Re-render a folder of existing programs into the selected (new) template"""
+        template = self.template_file.get()
+        if not template or not os.path.exists(template):
+            messagebox.showerror("Error", "Please select the new template XML file first!")
+            return
+        source_dir = filedialog.askdirectory(title="Select Folder of Existing Programs")
+        if not source_dir:
+            return
+        output_dir = filedialog.askdirectory(title="Select Output Folder for Migrated Programs")
+        if not output_dir:
+            return
+        carry = None
+        if self.migrate_bound_only.get():
+            carry = bound_variable_paths({**self.heating_zone_mapping, **self.cooling_zone_mapping},
+                                         self.custom_bindings)
+        self.notebook.select(4)
+        self.progress.start()
+        threading.Thread(target=self.run_migration, args=(source_dir, template, output_dir, carry),
+                         daemon=True).start()
+    def run_migration(self, source_dir, template, output_dir, carry):
+        """Migration worker thread"""
+        try:
+            migrate_programs(source_dir, template, output_dir, carry_paths=carry, log=self.log)
+        except Exception as e:
+            self.log(f"✗ Migration failed: {str(e)}", color='red')
+            self.root.after(0, lambda: messagebox.showerror("Error", f"Migration failed:\n{str(e)}"))
+        finally:
+            self.root.after(0, lambda: self.progress.stop())
+    def split_into_partitions(self):
+        """Write partition manifests so the run can be generated on several machines"""
+        if not self._check_generation_inputs():
+            return
+        partitions = simpledialog.askinteger("Split Run", "Number of partitions:",
+                                             initialvalue=4, minvalue=1, maxvalue=max(1, len(self.df)),
+                                             parent=self.root)
+        if not partitions:
+            return
+        manifest_dir = filedialog.askdirectory(title="Select Folder for Partition Manifests")
+        if not manifest_dir:
+            return
         try:
-            # Get metadata settings - CORRECTED
-            programid_base = self.meta_programid_start.get()
-            libraryid = self.meta_libraryid_start.get()      # FIXED (not incremented)
-            setnumber = self.meta_setnumber_start.get()      # FIXED (not incremented)
-            historyid_base = self.meta_historyid_start.get()
-            version = self.meta_version.get()
-            userid = self.meta_userid.get()                  # SINGLE User ID
-            notes = self.meta_default_notes.get()
+            self.notebook.select(4)
+            self.log(f"\nSplitting {len(self.df)} programs into {partitions} partitions...")
+            write_partition_manifests(self.df, self.collect_generation_settings(), partitions,
+                                      manifest_dir, self.get_zone_overrides(), log=self.log)
+            self.log(f"  Run each with: run-partition <part_NNN.json>, then: merge {manifest_dir} --output <folder>")
+        except Exception as e:
+            self.log(f"✗ Error splitting run: {e}", color='red')
+            messagebox.showerror("Error", f"Failed to split run:\n{e}")
+    def run_dry_run(self):
+        """Build the change plan and log a per-variable summary"""
+        try:
+            self.log("\n" + "=" * 80)
+            self.log("\nDRY RUN: CHANGE PLAN (no files are written)\n")
+            self.log("=" * 80)
             
-            # In the loop:
-            for idx, row in self.df.iterrows():
-                prog_id = programid_base + idx    # AUTO-INCREMENT
-                lib_id = libraryid                # FIXED
-                setnum = setnumber                # FIXED
-                historyid = historyid_base + idx  # AUTO-INCREMENT
-                now = datetime.now().isoformat()
-                
-                # Update metadata IN-PLACE
-                sp = new_root.find('SolderingPrograms')
-                if sp is not None:
-                    if sp.find('programid') is not None: 
-                        sp.find('programid').text = str(prog_id)
-                    if sp.find('libraryid') is not None: 
-                        sp.find('libraryid').text = str(lib_id)
-                    if sp.find('version') is not None: 
-                        sp.find('version').text = str(version)
-                    if sp.find('creationuser') is not None: 
-                        sp.find('creationuser').text = str(userid)
-                    if sp.find('changeuser') is not None: 
-                        sp.find('changeuser').text = str(userid)
-                    if sp.find('creationdate') is not None: 
-                        sp.find('creationdate').text = now
-                    if sp.find('changedate') is not None: 
-                        sp.find('changedate').text = now
-                    if sp.find('notes') is not None: 
-                        sp.find('notes').text = notes
-                    if sp.find('name') is not None: 
-                        sp.find('name').text = pcb_name
-                
-                ph = new_root.find('ProgramHistory')
-                if ph is not None:
-                    if ph.find('historyid') is not None: 
-                        ph.find('historyid').text = str(historyid)
-                    if ph.find('setnumber') is not None: 
-                        ph.find('setnumber').text = str(setnum)
-                    if ph.find('creationuser') is not None: 
-                        ph.find('creationuser').text = str(userid)
-                    if ph.find('changeuser') is not None: 
-                        ph.find('changeuser').text = str(userid)
-                    if ph.find('creationdate') is not None: 
-                        ph.find('creationdate').text = now
-                    if ph.find('changedate') is not None: 
-                        ph.find('changedate').text = now
+            start = time.perf_counter()
+            generator = ProgramGenerator(self.collect_generation_settings(), log=self.log,
+                                         zone_overrides=self.get_zone_overrides())
+            plan = generator.change_plan(self.df)
+            self.change_plan = plan
+            self.skipped_programs = generator.plan_skipped
+            
+            generated = len(self.df) - len(generator.plan_skipped)
+            self.log(f"\nPrograms: {generated} would be generated, {len(generator.plan_skipped)} skipped "
+                     f"(of {len(self.df)} rows)")
+            self.log(f"Values: {len(plan)} planned, {int(plan['Changed'].sum())} differ from the template "
+                     f"({(time.perf_counter() - start) * 1000:.0f} ms)\n")
+            changed = plan.groupby('Variable', sort=False)['Changed'].sum()
+            for variable, count in changed.items():
+                self.log(f"  {variable:<50} {int(count):>8} changed")
+            self.log("\nUse 'Export Change Plan' in the log tab to save the full table.")
+            self.log('=' * 80 + "\n")
+        except Exception as e:
+            self.log(f"\n✗ Dry run failed: {e}", color='red')
+            self.log(traceback.format_exc())
+        finally:
+            self.root.after(0, lambda: self.dry_run_btn.config(state='normal'))
+            self.root.after(0, lambda: self.progress.stop())
 
     def detect_template_file(self):
-    """Auto-detect template.xml in script directory"""
-    script_dir = os.path.dirname(os.path.abspath(__file__))
+        """Auto-detect template.xml in script directory"""
+        script_dir = os.path.dirname(os.path.abspath(__file__))
     
-    template_names = ['template.xml', 'Template.xml', 'TEMPLATE.xml', 
-                     'C5320-A422-B11-4.xml', 'ersa_template.xml']
+        template_names = ['template.xml', 'Template.xml', 'TEMPLATE.xml', 
+                         'C5320-A422-B11-4.xml', 'ersa_template.xml']
     
-    for name in template_names:
-        template_path = os.path.join(script_dir, name)
-        if os.path.exists(template_path):
-            self.template_file.set(template_path)
-            self.log(f"✓ Auto-detected template: {name}")
-            return
+        for name in template_names:
+            template_path = os.path.join(script_dir, name)
+            if os.path.exists(template_path):
+                self.template_file.set(template_path)
+                self.log(f"✓ Auto-detected template: {name}")
+                return
     
-    self.log("⚠ No template.xml found in script directory")
+        self.log("⚠ No template.xml found in script directory")
 
-
-
-    def update_xml_param(self, root, variable_path, value, datatype='Single'):
-        """Find and update parameter in XML"""
-        try:
-            for param in root.findall('.//ProgramParameter'):
-                var = param.find('variable')
-                if var is not None and var.text == variable_path:
-                    val = param.find('value')
-                    if val is not None:
-                        if datatype == 'Boolean':
-                            val.text = 'True' if value else 'False'
-                        else:
-                            val.text = str(value)
-                        return True
-        except Exception:
-            pass
-        return False
     # ==================== UTILITY ====================
     def log(self, message, color=None):
-        """Add message to log (optional color tag)"""
+        """Queue a message for the log (safe from any thread; optional color tag)"""
+        self.log_queue.put((message, color))
+    def _drain_log(self):
+        """Move queued log messages into the log widget (Tk thread only)"""
         try:
-            if color == 'red':
-                self.log_text.insert(tk.END, message + "\n", 'red')
-            else:
-                self.log_text.insert(tk.END, message + "\n")
-            self.log_text.see(tk.END)
-            self.root.update_idletasks()
+            messages = []
+            while len(messages) < LOG_DRAIN_BATCH:
+                try:
+                    messages.append(self.log_queue.get_nowait())
+                except queue.Empty:
+                    break
+            for message, color in messages:
+                if color == 'red':
+                    self.log_text.insert(tk.END, message + "\n", 'red')
+                else:
+                    self.log_text.insert(tk.END, message + "\n")
+            if messages:
+                self.log_text.see(tk.END)
         except Exception:
             # If logging fails silently, do not break the app
             pass
+        self.root.after(LOG_DRAIN_MS, self._drain_log)
     def export_log(self):
         """Export the contents of the log text area to a .txt file"""
         fname = filedialog.asksaveasfilename(title="Save Log As", defaultextension=".txt",
@@ -1073,6 +4361,28 @@ class ERSAProgramGeneratorGUI:
         except Exception as e:
             messagebox.showerror("Error", f"Failed to export log:\n{e}")
             self.log(f"âœ— Error exporting log: {e}")
+    def export_change_plan(self):
+        """Save the last dry-run change plan to CSV or Parquet"""
+        if self.change_plan is None:
+            messagebox.showinfo("Info", "No change plan yet — run 'Dry Run (Change Plan)' first.")
+            return
+        fname = filedialog.asksaveasfilename(title="Save Change Plan As", defaultextension=".csv",
+                                             filetypes=[("CSV files", "*.csv"), ("Parquet files", "*.parquet"),
+                                                        ("All files", "*.*")])
+        if not fname:
+            return
+        try:
+            if fname.lower().endswith('.parquet'):
+                self.change_plan.to_parquet(fname, index=False)
+            else:
+                self.change_plan.to_csv(fname, index=False)
+            self.log(f"✓ Change plan exported: {fname} ({len(self.change_plan)} rows)")
+            messagebox.showinfo("Success", f"Change plan exported to:\n{fname}")
+        except ImportError as e:
+            messagebox.showerror("Error", f"Parquet export needs pyarrow (pip install pyarrow):\n{e}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export change plan:\n{e}")
+            self.log(f"✗ Error exporting change plan: {e}", color='red')
     def export_skipped(self):
         """Export skipped program details to CSV"""
         if not getattr(self, 'skipped_programs', None):
@@ -1082,7 +4392,6 @@ class ERSAProgramGeneratorGUI:
                                              filetypes=[("CSV files","*.csv"), ("All files","*.*")])
         if not fname:
             return
-        import csv
         try:
             with open(fname, 'w', newline='', encoding='utf-8') as f:
                 writer = csv.DictWriter(f, fieldnames=['Program', 'Reason'])
@@ -1093,30 +4402,234 @@ class ERSAProgramGeneratorGUI:
         except Exception as e:
             messagebox.showerror("Error", f"Failed to export skipped programs:\n{e}")
             self.log(f"âœ— Error exporting skipped programs: {e}")
-def main():
+# ==================== COMMAND LINE ====================
+def _parse_bool(text):
+    return text.strip().lower() in ('1', 'true', 'yes', 'y')
+
+def cmd_catalog(args):
+    """Query the generated-program catalog and print matches as TSV"""
+    if not os.path.exists(args.db):
+        print(f"Catalog not found: {args.db}", file=sys.stderr)
+        return 1
+    start = time.perf_counter()
+    rows = ProgramCatalog(args.db).query(
+        stencil=args.stencil, stencil_like=args.stencil_like, program_id=args.program_id,
+        width=args.width, min_width=args.min_width, max_width=args.max_width,
+        cbs_active=None if args.cbs_active is None else _parse_bool(args.cbs_active),
+        park_active=None if args.park_active is None else _parse_bool(args.park_active),
+        run_id=args.run_id, content_hash=args.content_hash, limit=args.limit)
+    elapsed = (time.perf_counter() - start) * 1000
+    
+    columns = [col for col in CATALOG_COLUMNS if col != 'zones' or args.zones]
+    print('\t'.join(columns))
+    for row in rows:
+        print('\t'.join('' if row[col] is None else str(row[col]) for col in columns))
+    print(f"{len(rows)} programs ({elapsed:.1f} ms)", file=sys.stderr)
+    return 0
+
+def cmd_run_partition(args):
+    """Generate one partition of a split run from its manifest"""
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(args.manifest)), "results")
+    try:
+        result = run_partition(args.manifest, output)
+    except (OSError, ValueError) as e:
+        print(f"✗ {e}", file=sys.stderr)
+        return 1
+    print(f"✓ {result['success_count']}/{result['total']} programs, {len(result['skipped'])} skipped")
+    return 0 if not result['verify_failures'] else 1
+
+def cmd_merge(args):
+    """Validate partition results and combine them into one output folder"""
+    results = args.results or os.path.join(args.manifest_dir, "results")
+    try:
+        merge_partitions(args.manifest_dir, results, args.output)
+    except (OSError, ValueError) as e:
+        print(f"✗ {e}", file=sys.stderr)
+        return 1
+    return 0
+
+def cmd_store(args):
+    """List, materialize or diff runs of the content-addressed output store"""
+    if not os.path.isdir(args.store):
+        print(f"Output store not found: {args.store}", file=sys.stderr)
+        return 1
+    store = OutputStore(args.store)
+    try:
+        if args.action == 'runs':
+            for run_id in store.runs():
+                run = store.load_run(run_id)
+                print(f"{run_id}\t{len(run['programs'])} programs\t{run.get('workbook') or ''}")
+            count, total = store.size()
+            print(f"{count} stored bodies, {total / 1e6:.1f} MB", file=sys.stderr)
+        elif args.action == 'materialize':
+            count = store.materialize(args.run, args.output, args.stencil or None)
+            print(f"✓ {count} programs of run {args.run} written to {args.output}")
+        elif args.action == 'diff':
+            if args.stencil:
+                import difflib
+                a = store.load_run(args.run_a)['programs']
+                b = store.load_run(args.run_b)['programs']
+                # one element per line, so the diff shows the changed parameters
+                split = lambda body: body.replace('><', '>\n<').splitlines(True)
+                for name in args.stencil:
+                    old = split(store.get(a[name]['hash'])) if name in a else []
+                    new = split(store.get(b[name]['hash'])) if name in b else []
+                    sys.stdout.writelines(difflib.unified_diff(old, new, f"{args.run_a}/{name}",
+                                                               f"{args.run_b}/{name}"))
+                return 0
+            changes = store.diff(args.run_a, args.run_b)
+            for kind in ('added', 'removed', 'changed'):
+                for name in changes[kind]:
+                    print(f"{kind}\t{name}")
+            print(f"{len(changes['added'])} added, {len(changes['removed'])} removed, "
+                  f"{len(changes['changed'])} changed, {changes['unchanged']} unchanged", file=sys.stderr)
+    except (OSError, KeyError, ValueError) as e:
+        print(f"✗ {e}", file=sys.stderr)
+        return 1
+    return 0
+
+def cmd_similar(args):
+    """Print the programs most similar to one row of a data file as TSV"""
+    with open(args.mapping, 'r') as f:
+        mapping = {key: value for key, value in json.load(f).items() if value and value != "(None)"}
+    df = read_input(args.data)
+    overrides = ZoneOverrideStore.load(args.zone_overrides) if args.zone_overrides else None
+    names, features = workbook_features(df, mapping, overrides)
+    if args.stencil is not None:
+        if args.stencil not in names:
+            print(f"Program not found: {args.stencil}", file=sys.stderr)
+            return 1
+        position = names.index(args.stencil)
+    else:
+        position = args.row - 1
+    
+    index = ProgramSimilarityIndex()
+    index.set_source('workbook', names, list(df.index + 1), features)
+    if args.catalog:
+        index.set_source('library', *catalog_features(args.catalog))
+    start = time.perf_counter()
+    index.build()
+    matches = index.query_program('workbook', position, args.k)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(matches.to_csv(sep='\t', index=False), end='')
+    print(f"{len(matches)} of {len(index)} programs ({elapsed:.1f} ms incl. index build)", file=sys.stderr)
+    return 0
+
+def cmd_migrate(args):
+    """Re-render a folder of existing programs into a new template revision"""
+    carry = None
+    if args.bound_only:
+        zone_paths = {}
+        for path in ("heating_zone_mapping.json", "cooling_zone_mapping.json"):
+            if os.path.exists(path):
+                with open(path, 'r') as f:
+                    zone_paths.update(json.load(f))
+        carry = bound_variable_paths(zone_paths, load_custom_bindings())
+    try:
+        report = migrate_programs(args.source, args.template, args.output, carry_paths=carry,
+                                  workers=args.workers)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"✗ {e}", file=sys.stderr)
+        return 1
+    return 0 if not (report['Status'] == 'error').any() else 1
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="ERSA Soldering Program Generator "
+                                                 "(no command: start the GUI)")
+    parser.add_argument('--startup-check', action='store_true',
+                        help=f"Open the window, report startup time and exit non-zero "
+                             f"if it exceeds {STARTUP_BUDGET_MS} ms or imported pandas/numpy")
+    commands = parser.add_subparsers(dest='command')
+    
+    catalog = commands.add_parser('catalog', help="Query the catalog of generated programs")
+    catalog.add_argument('--db', default=CATALOG_DB, help="Catalog database file")
+    catalog.add_argument('--stencil', help="Exact STENCIL / program name")
+    catalog.add_argument('--stencil-like', help="SQL LIKE pattern, e.g. 'C5320%%'")
+    catalog.add_argument('--program-id', type=int)
+    catalog.add_argument('--width', type=float)
+    catalog.add_argument('--min-width', type=float)
+    catalog.add_argument('--max-width', type=float)
+    catalog.add_argument('--cbs-active', help="yes/no")
+    catalog.add_argument('--park-active', help="yes/no")
+    catalog.add_argument('--run-id', type=int)
+    catalog.add_argument('--content-hash')
+    catalog.add_argument('--zones', action='store_true', help="Include zone values")
+    catalog.add_argument('--limit', type=int, default=100)
+    catalog.set_defaults(handler=cmd_catalog)
+    
+    run_part = commands.add_parser('run-partition', help="Generate one partition of a split run")
+    run_part.add_argument('manifest', help="Partition manifest (part_NNN.json)")
+    run_part.add_argument('--output', help="Results folder (default: <manifest dir>/results); "
+                                           "the partition writes into its part_NNN sub-folder")
+    run_part.set_defaults(handler=cmd_run_partition)
+    
+    merge = commands.add_parser('merge', help="Combine the results of all partitions of a split run")
+    merge.add_argument('manifest_dir', help="Folder with the part_NNN.json manifests")
+    merge.add_argument('--results', help="Folder holding the part_NNN result folders "
+                                         "(default: <manifest dir>/results)")
+    merge.add_argument('--output', required=True, help="Merged output folder")
+    merge.set_defaults(handler=cmd_merge)
+    
+    similar = commands.add_parser('similar', help="Programs most similar to one row (board size, CBS, zones)")
+    similar.add_argument('data', help="Workbook or CSV/Parquet/Feather file")
+    target = similar.add_mutually_exclusive_group(required=True)
+    target.add_argument('--stencil', help="Program name of the query row")
+    target.add_argument('--row', type=int, help="1-based row number of the query row")
+    similar.add_argument('-k', type=int, default=SIMILARITY_K, help="Number of matches")
+    similar.add_argument('--mapping', default="column_mapping_config.json", help="Column mapping JSON")
+    similar.add_argument('--catalog', help="Also search the newest programs of this catalog database")
+    similar.add_argument('--zone-overrides', help="Zone overrides (.npz) to apply to the data")
+    similar.set_defaults(handler=cmd_similar)
+    
+    migrate = commands.add_parser('migrate', help="Re-render existing programs into a new template revision")
+    migrate.add_argument('source', help="Folder of existing program XML files (searched recursively)")
+    migrate.add_argument('--template', required=True, help="New template XML")
+    migrate.add_argument('--output', required=True, help="Folder for the migrated programs and the report")
+    migrate.add_argument('--workers', type=int, help=f"Worker processes (default: one per {MIGRATION_CHUNKSIZE} files, "
+                                                            f"at most one per CPU)")
+    migrate.add_argument('--bound-only', action='store_true',
+                         help="Carry only the variables the generator binds (zone mappings, custom bindings); "
+                              "all others take the new template's values")
+    migrate.set_defaults(handler=cmd_migrate)
+    
+    store = commands.add_parser('store', help="Runs kept in the content-addressed output store")
+    store.add_argument('--store', default=OUTPUT_STORE_DIR, help="Output store folder")
+    actions = store.add_subparsers(dest='action', required=True)
+    actions.add_parser('runs', help="List stored runs")
+    materialize = actions.add_parser('materialize', help="Write the program files of a run")
+    materialize.add_argument('run', help="Run id, 'latest' or 'previous'")
+    materialize.add_argument('--output', required=True, help="Target folder")
+    materialize.add_argument('--stencil', action='append', help="Only this program (repeatable)")
+    diff = actions.add_parser('diff', help="Programs added/removed/changed between two runs")
+    diff.add_argument('run_a', help="Run id, 'latest' or 'previous'")
+    diff.add_argument('run_b', help="Run id, 'latest' or 'previous'")
+    diff.add_argument('--stencil', action='append', help="Show a unified diff of this program (repeatable)")
+    store.set_defaults(handler=cmd_store)
+    return parser
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    if getattr(args, 'handler', None):
+        return args.handler(args)
+
     root = tk.Tk()
     app = ERSAProgramGeneratorGUI(root)
+    root.update()
+    startup_ms = (time.perf_counter() - _STARTUP_T0) * 1000
+    app.log(f"✓ Window ready in {startup_ms:.0f} ms")
+
+    if args.startup_check:
+        heavy = [name for name in ('pandas', 'numpy', 'openpyxl') if name in sys.modules]
+        root.destroy()
+        print(f"Startup: {startup_ms:.0f} ms (budget {STARTUP_BUDGET_MS} ms)")
+        if heavy:
+            print(f"Heavy modules imported during startup: {', '.join(heavy)}")
+        return 0 if startup_ms <= STARTUP_BUDGET_MS and not heavy else 1
+
+    # Warm pandas & co. while the user is picking files
+    root.after(200, lambda: threading.Thread(target=warm_heavy_imports, daemon=True).start())
     root.mainloop()
+    return 0
 
 if __name__ == "__main__":
-    main()
-
-
-print("âœ“ Updated: ERSA_Program_Generator_Final.py")
-print("\n" + "="*80)
-print("UPDATED CBS LOGIC:")
-print("="*80)
-print("\nðŸ“‹ New Logic:")
-print("\n  Case 1: CBS = NA or Empty")
-print("    â†’ Park_Active = True")
-print("    â†’ CBS_Active = False")
-print("    â†’ CBS Width = (not updated)")
-print("\n  Case 2: CBS has a value (e.g., 75)")
-print("    â†’ Park_Active = False")
-print("    â†’ CBS_Active = True  â† NEW!")
-print("    â†’ CBS Width = 75")
-print("\nâœ¨ Now CBS will be activated when it has a value!")
-print("\nðŸ“ XML Parameters Updated:")
-print("  â€¢ enmProg|enmA_Tr|1|enmSngSoll â†’ CBS Width value")
-print("  â€¢ enmProg|enmA_Tr|1|enmBlnSollAktiv â†’ CBS Active (True/False)")
-print("  â€¢ enmProg|enmA_AxMu|1|enmBlnParkPosSollAktiv â†’ Park Active (True/False)")
+    sys.exit(main())
@@ -0,0 +1,54 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(ROOT, "ERSA_Program_Generator.py")
+sys.path.insert(0, ROOT)
+
+TEMPLATE = """<?xml version="1.0" encoding="utf-8"?>
+<NewDataSet>
+  <SolderingPrograms><programid>1</programid><libraryid>1</libraryid><version>1</version><name>T</name>
+    <notes /><creationuser>1</creationuser><changeuser>1</changeuser><creationdate /><changedate /></SolderingPrograms>
+  <ProgramHistory><historyid>1</historyid><setnumber>1</setnumber><creationuser /><changeuser />
+    <creationdate /><changedate /></ProgramHistory>
+  <ProgramParameter><variable>enmProg|enmPcb|enmSngSollLaenge</variable><value>0</value><datatype>Single</datatype></ProgramParameter>
+  <ProgramParameter><variable>enmProg|enmA_AxBr|1|enmSngSoll</variable><value>0</value><datatype>Single</datatype></ProgramParameter>
+  <ProgramParameter><variable>enmProg|enmHz|1|enmSngSoll</variable><value>0</value><datatype>Single</datatype></ProgramParameter>
+  <ProgramParameter><variable>enmProg|enmHz|2|enmSngSoll</variable><value>0</value><datatype>Single</datatype></ProgramParameter>
+</NewDataSet>
+"""
+
+ZONE_PATHS = {f"Heating_Top_Z{zone}_Temp": f"enmProg|enmHz|{zone}|enmSngSoll" for zone in (1, 2)}
+MAPPING = {'STENCIL': 'Name', 'PCB_Length': 'L', 'PCB_Width': 'W', 'Heating_Top_Temp': 'HT'}
+
+
+@pytest.fixture
+def ersa():
+    import ERSA_Program_Generator
+    return ERSA_Program_Generator
+
+
+@pytest.fixture
+def template(tmp_path):
+    path = tmp_path / "template.xml"
+    path.write_text(TEMPLATE, encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def programs():
+    """Six programs; BRD-2 appears twice, BRD-4 has no width (skipped)"""
+    pd = pytest.importorskip("pandas")
+    return pd.DataFrame({
+        'Name': ["BRD-1", "BRD-2", "BRD-3", "BRD-2", "BRD-4", "BRD-5"],
+        'L': [200.0, 210.0, 220.0, 230.0, 240.0, 250.0],
+        'W': [100.0, 110.0, 120.0, 130.0, None, 150.0],
+        'HT_1': [180.0, 181.0, 182.0, 183.0, 184.0, 185.0],
+        'HT_2': [190.0, 191.0, 192.0, 193.0, 194.0, 195.0],
+    })
+
+
+def quiet(message, color=None):
+    pass
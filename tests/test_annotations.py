@@ -0,0 +1,78 @@
+import zipfile
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from conftest import MAPPING, ZONE_PATHS, quiet
+
+pd = pytest.importorskip("pandas")
+
+
+@pytest.fixture
+def run(ersa, template, programs, tmp_path):
+    settings = {'template_path': template, 'output_dir': str(tmp_path / "out"), 'mapping': MAPPING,
+                'zone_paths': ZONE_PATHS, 'writer_threads': 3}
+    generator = ersa.ProgramGenerator(settings, log=quiet)
+    generator.run(programs)
+    return generator
+
+
+def test_annotations_per_row(run):
+    annotations = run.annotations()
+    assert list(annotations['Program']) == ["BRD-1", "BRD-2", "BRD-3", "BRD-2", "BRD-4", "BRD-5"]
+    assert list(annotations['ERSA_ProgramID'].isna()) == [False, True, False, False, True, False]
+    assert annotations.loc[0, 'ERSA_ProgramID'] == 10000
+    assert annotations.loc[3, 'ERSA_HistoryID'] == 6003
+    # BRD-2 row 2 was overwritten by row 4, BRD-4 has no width
+    assert annotations.loc[1, 'ERSA_Skip_Reason'].startswith("Overwritten")
+    assert pd.isna(annotations.loc[1, 'ERSA_Output_File'])
+    assert annotations.loc[3, 'ERSA_Output_File'] == "BRD-2.xml"
+    assert annotations.loc[4, 'ERSA_Skip_Reason'].startswith("Missing/invalid")
+    assert annotations['ERSA_Output_File'].dropna().is_unique
+
+
+def test_csv_copy_and_sidecar(ersa, run, programs, tmp_path):
+    source = tmp_path / "data.csv"
+    programs.to_csv(source, index=False)
+    annotations = run.annotations()
+
+    copy_path = ersa.write_annotations(str(source), annotations, 'copy', data=programs)
+    copy = pd.read_csv(copy_path)
+    assert list(copy.columns) == list(programs.columns) + ersa.ANNOTATION_COLUMNS
+    assert list(copy['ERSA_ProgramID'].fillna(0).astype(int)) == [10000, 0, 10002, 10003, 0, 10005]
+
+    sidecar = pd.read_csv(ersa.write_annotations(str(source), annotations, 'sheet'))
+    assert list(sidecar.columns) == ['Row', 'Program'] + ersa.ANNOTATION_COLUMNS
+    assert list(sidecar['Row']) == [1, 2, 3, 4, 5, 6]
+
+
+def test_xlsx_sidecar_sheet_is_streamed_in(ersa, run, programs, tmp_path):
+    pytest.importorskip("openpyxl")
+    source = str(tmp_path / "data.xlsx")
+    programs.to_excel(source, index=False)
+    annotations = run.annotations()
+
+    copy_path = ersa.write_annotations(source, annotations, 'copy')
+    assert copy_path.endswith("data_annotated.xlsx")
+    assert pd.ExcelFile(source).sheet_names == ["Sheet1"]    # source untouched
+
+    # in place, twice: the second write replaces the sheet
+    for _ in range(2):
+        assert ersa.write_annotations(source, annotations, 'sheet') == source
+    with zipfile.ZipFile(source) as package:
+        for part in ('xl/workbook.xml', 'xl/_rels/workbook.xml.rels', '[Content_Types].xml'):
+            ET.fromstring(package.read(part))
+    sheets = pd.read_excel(source, sheet_name=None)
+    assert list(sheets) == ["Sheet1", ersa.ANNOTATION_SHEET]
+    pd.testing.assert_frame_equal(sheets["Sheet1"], programs, check_dtype=False)
+    sidecar = sheets[ersa.ANNOTATION_SHEET]
+    assert list(sidecar['Program']) == list(programs['Name'])
+    assert sidecar.loc[0, 'ERSA_ProgramID'] == 10000
+
+    # a batch load never reads the sidecar sheet as program data
+    assert [name for name, _sheet in ersa.read_workbook_sheets(source)] == ["Sheet1"]
+
+
+def test_xls_is_refused(ersa, run, tmp_path):
+    with pytest.raises(ValueError):
+        ersa.write_annotations(str(tmp_path / "old.xls"), run.annotations(), 'sheet')
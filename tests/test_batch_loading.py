@@ -0,0 +1,52 @@
+import pytest
+
+from conftest import MAPPING
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("openpyxl")
+
+
+@pytest.fixture
+def workbooks(programs, tmp_path):
+    """Two workbooks: A with two sheets, B whose sheet names its columns differently"""
+    a, b = tmp_path / "A.xlsx", tmp_path / "B.xlsx"
+    with pd.ExcelWriter(a) as writer:
+        programs.iloc[:2].to_excel(writer, sheet_name="Line1", index=False)
+        programs.iloc[2:4].to_excel(writer, sheet_name="Line2", index=False)
+    renamed = programs.iloc[4:].rename(columns={'W': 'Width', 'HT_1': 'Top_1', 'HT_2': 'Top_2'})
+    renamed.to_excel(b, sheet_name="Line3", index=False)
+    return [str(a), str(b)]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_batch_matches_one_sheet(ersa, workbooks, programs, workers):
+    overrides = {"B.xlsx:Line3": {'PCB_Width': 'Width', 'Heating_Top_Temp': 'Top'}}
+    df = ersa.load_batch(workbooks, MAPPING, overrides, max_workers=workers)
+
+    assert list(df.index) == list(range(len(programs)))
+    assert list(df[ersa.SOURCE_COLUMN]) == ["A.xlsx:Line1"] * 2 + ["A.xlsx:Line2"] * 2 + ["B.xlsx:Line3"] * 2
+    pd.testing.assert_frame_equal(df[list(programs.columns)], programs, check_dtype=False)
+
+
+def test_first_sheet_only_and_sheet_name_override(ersa, workbooks, programs):
+    df = ersa.load_batch(workbooks, MAPPING, {"Line3": {'PCB_Width': 'Width'}}, all_sheets=False, max_workers=1)
+    assert list(df[ersa.SOURCE_COLUMN]) == ["A.xlsx:Line1"] * 2 + ["B.xlsx:Line3"] * 2
+    assert df['W'].iloc[2:].isna().tolist() == [True, False]
+    assert "Top_1" in df.columns    # not overridden, so left under its own name
+
+
+def test_zone_column_styles_are_aligned(ersa, programs, tmp_path):
+    # HT_1 in one workbook, HT_Z1 / HT2 style in the other: all end up under the first sheet's names
+    programs.iloc[:3].to_excel(tmp_path / "A.xlsx", index=False)
+    programs.iloc[3:].rename(columns={'HT_1': 'HT_Z1', 'HT_2': 'HT2'}).to_excel(tmp_path / "B.xlsx", index=False)
+    df = ersa.load_batch([str(tmp_path / "A.xlsx"), str(tmp_path / "B.xlsx")], MAPPING, max_workers=1)
+    assert not {'HT_Z1', 'HT2'} & set(df.columns)
+    zones = ersa.build_zone_matrix(df, MAPPING)
+    assert zones[:, :2, 0].tolist() == programs[['HT_1', 'HT_2']].to_numpy().tolist()
+
+
+def test_override_replaces_clashing_column(ersa, programs):
+    df = programs.assign(Width=programs['W'] * 2)
+    renamed = ersa.apply_sheet_overrides(df, MAPPING, {'PCB_Width': 'Width'})
+    pd.testing.assert_series_equal(renamed['W'], programs['W'] * 2)
+    assert list(renamed.columns).count('W') == 1
@@ -0,0 +1,79 @@
+import pytest
+
+from conftest import MAPPING
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+
+def effective(ersa, store, df, variable):
+    return ersa.bulk_edit_table(df, MAPPING, store)[2][variable].tolist()
+
+
+def zone_tab_edit(ersa, store, stencil, variable, value):
+    """What the zone tabs' save does: one program's full grid with one edited cell"""
+    slot, param = divmod(ersa.ZONE_VARIABLES.index(variable), len(ersa.ZONE_PARAMS))
+    values, edited = store.get(stencil) or (np.zeros((len(ersa.ZONE_SLOTS), len(ersa.ZONE_PARAMS)), np.float32),
+                                            np.zeros((len(ersa.ZONE_SLOTS), len(ersa.ZONE_PARAMS)), bool))
+    values, edited = values.copy(), edited.copy()
+    values[slot, param], edited[slot, param] = value, True
+    store.set_program(stencil, values, edited)
+
+
+def test_evaluate_apply_undo_keeps_zone_tab_edits(ersa, programs):
+    store = ersa.ZoneOverrideStore()
+    editor = ersa.ZoneBulkEditor(store)
+    zone_tab_edit(ersa, store, "BRD-3", "Heating_Top_Z2_Temp", 300)    # same cell as the bulk edit
+    zone_tab_edit(ersa, store, "BRD-1", "Heating_Top_Z1_Temp", 170)    # untouched by the bulk edit
+
+    plan = editor.evaluate("Heating_Top_Z2_Temp = Heating_Top_Z1_Temp + 20 where PCB_Length > 215",
+                           programs, MAPPING)
+    assert plan['matched'] == 4
+    assert plan['names'] == ["BRD-3", "BRD-2", "BRD-4", "BRD-5"]
+    assert list(plan['current']) == [300, 193, 194, 195]
+    assert list(editor.preview(plan)['Row']) == [3, 4, 5, 6]
+    assert editor.apply(plan) == 4
+    # BRD-2 is keyed by name: its first row takes the value of the last one
+    assert effective(ersa, store, programs, "Heating_Top_Z2_Temp") == [190, 203, 202, 203, 204, 205]
+
+    zone_tab_edit(ersa, store, "BRD-5", "Heating_Top_Z1_Temp", 100)    # after the bulk edit
+    assert editor.undo() == plan['text']
+    assert effective(ersa, store, programs, "Heating_Top_Z2_Temp") == [190, 191, 300, 193, 194, 195]
+    assert effective(ersa, store, programs, "Heating_Top_Z1_Temp") == [170, 181, 182, 183, 184, 100]
+    assert editor.undo() is None
+
+
+def test_stale_plans_and_scalar_conditions(ersa, programs):
+    store = ersa.ZoneOverrideStore()
+    editor = ersa.ZoneBulkEditor(store)
+    plan = editor.evaluate("Heating_Top_Z1_Temp = 200 where True", programs, MAPPING)
+    assert plan['matched'] == len(programs) and len(plan['rows']) == len(programs)
+
+    zone_tab_edit(ersa, store, "BRD-1", "Heating_Top_Z3_Temp", 150)
+    with pytest.raises(ValueError, match="preview again"):
+        editor.apply(plan)
+
+    # a value equal to the sheet is no edit
+    editor.apply(editor.evaluate("Heating_Top_Z1_Temp = 180 where PCB_Width == 100", programs, MAPPING))
+    assert store.get("BRD-1")[1].sum() == 1
+
+
+@pytest.mark.parametrize("text, message", [
+    ("PCB_Length = 5", "not a zone variable"),
+    ("Heating_Top_Z1_Temp = Nope + 1", "Cannot evaluate"),
+    ("Heating_Top_Z1_Temp = 1 where PCB_Length + 1", "true/false"),
+])
+def test_bad_expressions(ersa, programs, text, message):
+    with pytest.raises(ValueError, match=message):
+        ersa.ZoneBulkEditor(ersa.ZoneOverrideStore()).evaluate(text, programs, MAPPING)
+
+
+def test_store_round_trip(ersa, programs, tmp_path):
+    store = ersa.ZoneOverrideStore()
+    editor = ersa.ZoneBulkEditor(store)
+    editor.apply(editor.evaluate("Cooling_Top_Z3_Conv = 40 where PCB_Length < 215", programs, MAPPING))
+    store.save(tmp_path / "zones.npz")
+    loaded = ersa.ZoneOverrideStore.load(tmp_path / "zones.npz")
+    assert loaded.stencils == ["BRD-1", "BRD-2"]
+    assert effective(ersa, loaded, programs, "Cooling_Top_Z3_Conv")[:4] == pytest.approx([40, 40, np.nan, 40],
+                                                                                          nan_ok=True)
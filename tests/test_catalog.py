@@ -0,0 +1,40 @@
+import hashlib
+import json
+
+import pytest
+
+from conftest import MAPPING, ZONE_PATHS, quiet
+
+pd = pytest.importorskip("pandas")
+
+
+@pytest.fixture
+def catalog(ersa, template, programs, tmp_path):
+    settings = {'template_path': template, 'output_dir': str(tmp_path / "out"), 'mapping': MAPPING,
+                'zone_paths': ZONE_PATHS, 'catalog': str(tmp_path / "catalog.db")}
+    ersa.ProgramGenerator(settings, log=quiet).run(programs)
+    ersa.ProgramGenerator(settings, log=quiet).run(programs.assign(W=programs['W'] + 1))
+    return ersa.ProgramCatalog(str(tmp_path / "catalog.db"))
+
+
+def test_one_row_per_written_program(catalog, tmp_path):
+    rows = catalog.query(run_id=2)
+    # BRD-2's first row was overwritten by its second, BRD-4 was skipped
+    assert sorted(row['stencil'] for row in rows) == ["BRD-1", "BRD-2", "BRD-3", "BRD-5"]
+    brd2 = catalog.query(stencil="BRD-2", run_id=2)[0]
+    assert (brd2['length'], brd2['width']) == (230.0, 131.0)
+    assert json.loads(brd2['zones']) == {"Heating_Top_Z1_Temp": 183.0, "Heating_Top_Z2_Temp": 193.0}
+    data = (tmp_path / "out" / brd2['output_path']).read_bytes()
+    assert brd2['content_hash'] == hashlib.sha256(data).hexdigest()
+    assert catalog.query(content_hash=brd2['content_hash'])[0]['program_id'] == brd2['program_id']
+
+
+def test_filters_and_latest(catalog):
+    assert [row['run_id'] for row in catalog.query(stencil="BRD-1")] == [2, 1]
+    assert [row['stencil'] for row in catalog.query(stencil_like="BRD-%", min_width=140, max_width=151)] \
+        == ["BRD-5", "BRD-5"]
+    assert len(catalog.query(limit=3)) == 3
+    latest = catalog.latest_programs()
+    assert [row['stencil'] for row in latest] == ["BRD-1", "BRD-2", "BRD-3", "BRD-5"]
+    assert {row['run_id'] for row in latest} == {2}
+    assert catalog.fingerprint() == (2, 8)
@@ -0,0 +1,42 @@
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from conftest import MAPPING, ZONE_PATHS, quiet
+
+pd = pytest.importorskip("pandas")
+
+
+def written_values(path):
+    root = ET.parse(path).getroot()
+    values = {p.find('variable').text: p.find('value').text for p in root.iter('ProgramParameter')}
+    for section in ('SolderingPrograms', 'ProgramHistory'):
+        for child in root.find(section):
+            values[f"{section}|{child.tag}"] = child.text
+    return values
+
+
+def test_plan_matches_generated_files(ersa, template, programs, tmp_path):
+    settings = {'template_path': template, 'output_dir': str(tmp_path / "out"), 'mapping': MAPPING,
+                'zone_paths': ZONE_PATHS}
+    planner = ersa.ProgramGenerator(settings, log=quiet)
+    plan = planner.change_plan(programs)
+    assert not (tmp_path / "out").exists()    # a dry run writes nothing
+    assert planner.plan_skipped == [{'Program': "BRD-4", 'Reason': planner.skip_reasons[4]}]
+    assert sorted(plan['Row'].unique()) == [1, 2, 3, 4, 6]
+    assert list(plan.columns) == ['Row', 'Program', 'Variable', 'Template_Value', 'New_Value', 'Changed']
+
+    ersa.ProgramGenerator(settings, log=quiet).run(programs)
+    last_rows = plan[~plan.duplicated(['Program', 'Variable'], keep='last')]
+    for program, rows in last_rows.groupby('Program'):
+        values = written_values(tmp_path / "out" / f"{program}.xml")
+        for variable, new in zip(rows['Variable'], rows['New_Value']):
+            assert values[variable] == new, (program, variable)
+
+    brd1 = plan[plan['Program'] == "BRD-1"].set_index('Variable')
+    assert brd1.loc["enmProg|enmHz|1|enmSngSoll", ['Template_Value', 'New_Value', 'Changed']].tolist() \
+        == ["0", "180.0", True]
+    assert brd1.loc["SolderingPrograms|programid", 'New_Value'] == "10000"
+    assert brd1.loc["SolderingPrograms|libraryid", ['Template_Value', 'New_Value', 'Changed']].tolist() \
+        == ["1", "100", True]
+    assert not brd1.loc["ProgramHistory|setnumber", 'Changed']
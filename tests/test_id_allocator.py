@@ -0,0 +1,49 @@
+import json
+import subprocess
+import sys
+
+from conftest import ROOT
+
+WORKERS = 6
+BLOCKS = 15
+
+RESERVE_SCRIPT = """
+import json, sys
+import ERSA_Program_Generator as ersa
+allocator = ersa.IdAllocator(sys.argv[1])
+blocks = [allocator.reserve(int(sys.argv[2]), workbook=sys.argv[3], program_start=10000, history_start=6000)
+          for _ in range(%d)]
+print(json.dumps(blocks))
+""" % BLOCKS
+
+
+def test_concurrent_processes_never_overlap(tmp_path):
+    db = str(tmp_path / "ids.sqlite")
+    sizes = [1 + worker * 7 for worker in range(WORKERS)]
+    procs = [subprocess.Popen([sys.executable, "-c", RESERVE_SCRIPT, db, str(size), f"book{worker}.xlsx"],
+                              cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+             for worker, size in enumerate(sizes)]
+    blocks = []
+    for proc in procs:
+        out, err = proc.communicate(timeout=120)
+        assert proc.returncode == 0, err
+        blocks.extend(json.loads(out))
+
+    assert len(blocks) == WORKERS * BLOCKS
+    for kind in ('program_start', 'history_start'):
+        ranges = sorted((block[kind], block[kind] + block['count']) for block in blocks)
+        for (_start, stop), (next_start, _next_stop) in zip(ranges, ranges[1:]):
+            assert stop <= next_start, f"{kind} blocks overlap"
+        # blocks are handed out back to back from the floor
+        assert ranges[0][0] == (10000 if kind == 'program_start' else 6000)
+        assert ranges[-1][1] == ranges[0][0] + sum(block['count'] for block in blocks)
+    assert len({block['reservation_id'] for block in blocks}) == len(blocks)
+
+
+def test_floor_and_continuation(tmp_path, ersa):
+    allocator = ersa.IdAllocator(str(tmp_path / "ids.sqlite"))
+    first = allocator.reserve(5, program_start=100, history_start=50)
+    second = allocator.reserve(3, program_start=100, history_start=50)
+    raised = allocator.reserve(2, program_start=500, history_start=50)
+    assert (first['program_start'], second['program_start'], raised['program_start']) == (100, 105, 500)
+    assert (first['history_start'], second['history_start'], raised['history_start']) == (50, 55, 58)
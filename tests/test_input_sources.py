@@ -0,0 +1,63 @@
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from conftest import MAPPING, ZONE_PATHS, quiet
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+FORMATS = [".csv", ".parquet", ".feather", ".xlsx"]
+
+
+@pytest.fixture
+def exports(programs, tmp_path):
+    """The same sheet in every input format, with an unmapped column the readers should skip"""
+    df = programs.assign(Comment=[f"note {i}" for i in range(len(programs))])
+    paths = {}
+    for ext in FORMATS:
+        path = tmp_path / f"programs{ext}"
+        if ext == ".csv":
+            df.to_csv(path, index=False)
+        elif ext == ".parquet":
+            df.to_parquet(path, index=False)
+        elif ext == ".feather":
+            df.to_feather(path)
+        else:
+            pytest.importorskip("openpyxl")
+            df.to_excel(path, index=False)
+        paths[ext] = str(path)
+    return paths
+
+
+@pytest.mark.parametrize("chunksize", [None, 2])
+def test_readers_agree(ersa, exports, programs, chunksize):
+    columns = ersa.mapped_columns(ersa.input_columns(exports[".csv"]), MAPPING)
+    assert columns == ["Name", "L", "W", "HT_1", "HT_2"]
+    seen = []
+    for ext, path in exports.items():
+        assert ersa.input_columns(path) == list(programs.columns) + ["Comment"]
+        df = ersa.read_input(path, columns=columns, chunksize=chunksize, progress=seen.append)
+        assert list(df.index) == list(range(len(programs)))
+        pd.testing.assert_frame_equal(df, programs, check_dtype=False)
+    # Excel arrives in one piece, the other formats in chunks of two rows
+    assert seen == ([6] * 4 if chunksize is None else [2, 4, 6] * 3 + [6])
+
+
+def test_generation_is_the_same_for_every_format(ersa, exports, template, tmp_path):
+    outputs = {}
+    for ext, path in exports.items():
+        out = tmp_path / f"out{ext}"
+        settings = {'template_path': template, 'output_dir': str(out), 'mapping': MAPPING,
+                    'zone_paths': ZONE_PATHS}
+        df = ersa.read_input(path, columns=ersa.mapped_columns(ersa.input_columns(path), MAPPING))
+        result = ersa.ProgramGenerator(settings, log=quiet).run(df)
+        outputs[ext] = (result['skipped'], {
+            name: [(el.tag, el.text) for el in ET.parse(out / file).getroot().iter() if not el.tag.endswith('date')]
+            for name, file in result['program_index'].items()})
+    assert all(output == outputs[".xlsx"] for output in outputs.values())
+
+
+def test_unsupported_extension(ersa, tmp_path):
+    with pytest.raises(ValueError, match="Unsupported input file type '.txt'"):
+        ersa.read_input(str(tmp_path / "programs.txt"))
@@ -0,0 +1,80 @@
+import pytest
+
+from conftest import MAPPING, ZONE_PATHS, quiet
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+
+def test_zone_overrides_are_checked(ersa, template, programs, tmp_path):
+    store = ersa.ZoneOverrideStore()
+    editor = ersa.ZoneBulkEditor(store)
+    editor.apply(editor.evaluate("Heating_Top_Z1_Temp = 999 where PCB_Length > 215", programs, MAPPING))
+    settings = {'template_path': template, 'output_dir': str(tmp_path / "out"), 'mapping': MAPPING,
+                'zone_paths': ZONE_PATHS}
+    generator = ersa.ProgramGenerator(settings, log=quiet, zone_overrides=store)
+    generator.run(programs)
+
+    skipped = {row['Program']: row['Reason'] for row in generator.skipped}
+    assert set(skipped) == {"BRD-2", "BRD-3", "BRD-4", "BRD-5"}
+    assert "Top heating temperature" in skipped["BRD-3"] and "999" in skipped["BRD-3"]
+    assert skipped["BRD-4"].startswith("Missing/invalid")
+    assert not (tmp_path / "out" / "BRD-3.xml").exists()
+    assert (tmp_path / "out" / "BRD-1.xml").exists()
+
+
+def test_sheet_and_zone_matrix_agree(ersa, programs):
+    mapping = dict(MAPPING, Heating_Top_TolMinus='TM')
+    df = programs.assign(HT_1=[180, 400, 182, 183, -5, 185], TM_1=[5, 5, 500, 5, 5, 5])
+    rules = ersa.DEFAULT_MACHINE_RULES
+    sheet_pass, sheet = ersa.evaluate_machine_rules(df, mapping, rules)
+    zones = ersa.build_zone_matrix(df, mapping)
+    matrix_pass, matrix = ersa.evaluate_machine_rules(df, mapping, rules, zone_matrix=zones)
+
+    assert list(sheet_pass) == list(matrix_pass) == [True, False, False, True, False, True]
+    pd.testing.assert_frame_equal(sheet, matrix)
+
+
+def test_bottom_cooling_zones_are_checked(ersa, programs):
+    mapping = dict(MAPPING, Cooling_Bottom_Temp='CB')
+    df = programs.assign(CB_1=[40, 40, 200, 40, 40, 40])
+    zones = ersa.build_zone_matrix(df, mapping)
+    zones[5, ersa.ZONE_SLOTS.index("Cooling_Bottom_Z2"), 0] = 180    # e.g. edited in the cooling tab
+    passed, violations = ersa.evaluate_machine_rules(df, mapping, ersa.DEFAULT_MACHINE_RULES, zone_matrix=zones)
+
+    assert list(~passed) == [False, False, True, False, False, True]
+    assert list(violations['Rule']) == ["Bottom cooling temperature"] * 2
+    assert list(violations['Column']) == ["CB_1", "Cooling_Bottom_Z2_Temp"]
+
+
+def full_sheet(ersa, rows, seed=0):
+    """rows programs with every zone block mapped, values inside the default limits"""
+    rng = np.random.default_rng(seed)
+    mapping = {'STENCIL': 'Name', 'PCB_Length': 'L', 'PCB_Width': 'W', 'CBS_Width': 'C'}
+    width = rng.uniform(60, 450, rows)
+    columns = {'Name': [f"P{i}" for i in range(rows)], 'L': rng.uniform(50, 500, rows), 'W': width, 'C': width * 0.8}
+    ranges = {'Temp': (150, 300), 'TolPlus': (1, 10), 'TolMinus': (1, 10), 'Conv': (0, 100)}
+    for prefix, count in ersa.ZONE_LAYOUT:
+        for param in ersa.ZONE_PARAMS:
+            mapping[f"{prefix}_{param}"] = f"{prefix}_{param}"
+            low, high = (20, 100) if prefix.startswith("Cooling") and param == "Temp" else ranges[param]
+            for zone_num in range(1, count + 1):
+                columns[f"{prefix}_{param}_{zone_num}"] = rng.uniform(low, high, rows)
+    return pd.DataFrame(columns), mapping
+
+
+def test_100k_rows_under_a_second(ersa):
+    df, mapping = full_sheet(ersa, 100_000)
+    bad = np.random.default_rng(1).choice(len(df), 1000, replace=False)
+    df.loc[bad, "Heating_Top_Temp_3"] = 999
+    df.loc[bad[:100], "C"] = df.loc[bad[:100], "W"] + 1
+    zones = ersa.build_zone_matrix(df, mapping)
+
+    for kwargs in ({}, {'zone_matrix': zones}):
+        start = ersa.time.perf_counter()
+        passed, violations = ersa.evaluate_machine_rules(df, mapping, ersa.DEFAULT_MACHINE_RULES, **kwargs)
+        elapsed = ersa.time.perf_counter() - start
+        assert elapsed < 1.0, f"{elapsed:.2f} s"
+        assert int((~passed).sum()) == 1000 and len(violations) == 1100
+        reasons = ersa.summarize_violations(violations)
+        assert len(reasons) == 1000 and "CBS narrower than width" in reasons[int(bad[0])]
@@ -0,0 +1,90 @@
+import os
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from conftest import MAPPING, ZONE_PATHS, quiet
+
+pd = pytest.importorskip("pandas")
+
+NEW_PATH = "enmProg|enmNew|1|enmSngSoll"
+DROPPED_PATH = "enmProg|enmHz|2|enmSngSoll"
+
+
+@pytest.fixture
+def library(ersa, template, programs, tmp_path):
+    """Programs generated from the old template, in a sharded folder"""
+    out = tmp_path / "library"
+    settings = {'template_path': template, 'output_dir': str(out), 'mapping': MAPPING,
+                'zone_paths': ZONE_PATHS, 'output_layout': "Stencil prefix"}
+    ersa.ProgramGenerator(settings, log=quiet).run(programs)
+    return out
+
+
+@pytest.fixture
+def new_template(template, tmp_path):
+    text = open(template, encoding='utf-8').read()
+    text = text.replace(f"<variable>{DROPPED_PATH}</variable><value>0</value>",
+                        f"<variable>{NEW_PATH}</variable><value>42</value>")
+    path = tmp_path / "template_v2.xml"
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+def parameters(path):
+    root = ET.parse(path).getroot()
+    return {p.find('variable').text: p.find('value').text for p in root.iter('ProgramParameter')}
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_values_metadata_and_report(ersa, library, new_template, tmp_path, workers):
+    out = tmp_path / f"migrated{workers}"
+    report = ersa.migrate_programs(str(library), new_template, str(out), workers=workers, log=quiet)
+
+    assert len(report) == 4 and set(report['Status']) == {'unmatched'}
+    assert set(report['Unmatched']) == {DROPPED_PATH}
+    assert (report['New_Defaults'] == 1).all()
+    assert os.path.exists(out / ersa.MIGRATION_REPORT)
+
+    row = report[report['Program'] == "BRD-3"].iloc[0]
+    old_file, new_file = library / row['File'], out / row['File']
+    old, new = parameters(old_file), parameters(new_file)
+    assert new[NEW_PATH] == "42"
+    assert DROPPED_PATH not in new
+    assert all(new[path] == old[path] for path in new if path in old)
+
+    old_meta = ET.parse(old_file).getroot().find('SolderingPrograms')
+    new_meta = ET.parse(new_file).getroot().find('SolderingPrograms')
+    for tag in ('programid', 'name', 'creationdate'):
+        assert new_meta.find(tag).text == old_meta.find(tag).text
+    assert new_meta.find('changedate').text != old_meta.find('changedate').text
+
+
+def test_bound_only_keeps_new_template_values(ersa, library, new_template, tmp_path):
+    carry = ersa.bound_variable_paths({})    # board size only, no zone mappings
+    report = ersa.migrate_programs(str(library), new_template, str(tmp_path / "bound"),
+                                   carry_paths=carry, workers=1, log=quiet)
+    new = parameters(tmp_path / "bound" / report['File'].iloc[0])
+    assert new["enmProg|enmHz|1|enmSngSoll"] == "0"
+    assert float(new["enmProg|enmPcb|enmSngSollLaenge"]) > 0
+
+
+def test_bad_files_and_templates(ersa, library, new_template, tmp_path):
+    (library / "broken.xml").write_text("<NewDataSet><oops>", encoding='utf-8')
+    report = ersa.migrate_programs(str(library), new_template, str(tmp_path / "m"), workers=2, log=quiet)
+    assert report.set_index('File').loc["broken.xml", 'Status'] == "error"
+
+    bad_template = tmp_path / "bad.xml"
+    bad_template.write_text("<NewDataSet>", encoding='utf-8')
+    with pytest.raises(ValueError, match="not a valid template"):
+        ersa.migrate_programs(str(library), str(bad_template), str(tmp_path / "m2"), workers=2, log=quiet)
+    with pytest.raises(ValueError, match="No program XML"):
+        ersa.migrate_programs(str(tmp_path / "m2"), new_template, str(tmp_path / "m3"), log=quiet)
+
+
+def test_output_inside_source_is_skipped(ersa, library, new_template):
+    out = library / "migrated"
+    ersa.migrate_programs(str(library), new_template, str(out), workers=1, log=quiet)
+    report = ersa.migrate_programs(str(library), new_template, str(out), workers=1, log=quiet)
+    assert len(report) == 4
+    assert not any(name.startswith("migrated") for name in report['File'])
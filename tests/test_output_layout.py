@@ -0,0 +1,40 @@
+import json
+import os
+
+import pytest
+
+from conftest import MAPPING, ZONE_PATHS, quiet
+
+pd = pytest.importorskip("pandas")
+
+
+def test_shard_directories(ersa):
+    assert ersa.shard_directory("Flat", "BRD-1") == ""
+    assert ersa.shard_directory("Stencil prefix", "brd-1") == "BR"
+    assert ersa.shard_directory("Stencil prefix", "x") == "X"
+    assert ersa.shard_directory("Stencil prefix", "#1") == "_1"
+    hashed = ersa.shard_directory("Hash prefix", "BRD-1")
+    assert len(hashed) == 2 and hashed == ersa.shard_directory("Hash prefix", "BRD-1")
+    assert ersa.plan_output_paths(["A B/1"], "Flat") == ["A_B_1.xml"]
+
+
+@pytest.mark.parametrize("layout", ["Flat", "Hash prefix", "Stencil prefix"])
+def test_index_points_at_every_file(ersa, template, programs, tmp_path, layout):
+    out = tmp_path / "out"
+    settings = {'template_path': template, 'output_dir': str(out), 'mapping': MAPPING,
+                'zone_paths': ZONE_PATHS, 'output_layout': layout}
+    result = ersa.ProgramGenerator(settings, log=quiet).run(programs)
+
+    index = json.loads((out / ersa.INDEX_FILE).read_text(encoding='utf-8'))
+    assert sorted(index) == ["BRD-1", "BRD-2", "BRD-3", "BRD-5"]
+    assert index == {name: path.replace(os.sep, "/") for name, path in result['program_index'].items()}
+    written = sorted(path.relative_to(out).as_posix() for path in out.rglob("*.xml"))
+    assert written == sorted(index.values())
+    assert all((path.count("/") == 0) == (layout == "Flat") for path in written)
+
+
+def test_unknown_layout(ersa, template, programs, tmp_path):
+    settings = {'template_path': template, 'output_dir': str(tmp_path), 'mapping': MAPPING,
+                'output_layout': "Library ID"}
+    with pytest.raises(ValueError, match="Unknown output layout 'Library ID'"):
+        ersa.ProgramGenerator(settings, log=quiet).run(programs)
@@ -0,0 +1,49 @@
+import pytest
+
+from conftest import MAPPING, ZONE_PATHS, quiet
+
+pd = pytest.importorskip("pandas")
+
+
+@pytest.fixture
+def generate(ersa, template, tmp_path):
+    def run(df, out):
+        settings = {'template_path': template, 'output_dir': str(tmp_path / out), 'mapping': MAPPING,
+                    'zone_paths': ZONE_PATHS, 'output_layout': "Hash prefix",
+                    'output_store': str(tmp_path / "store"), 'id_allocator': str(tmp_path / "ids.db")}
+        generator = ersa.ProgramGenerator(settings, log=quiet)
+        generator.run(df)
+        return generator
+    return run
+
+
+def files(folder):
+    return {path.relative_to(folder).as_posix(): path.read_bytes()
+            for path in folder.rglob("*.xml")}
+
+
+def test_identical_runs_share_bodies(ersa, generate, programs, tmp_path):
+    first = generate(programs, "run1")
+    second = generate(programs, "run2")
+    # the allocator gave the second run new IDs, but the bodies are the same
+    assert first.store_entries["BRD-1"]['program_id'] != second.store_entries["BRD-1"]['program_id']
+    assert first.store_new == 4 and second.store_new == 0
+
+    store = ersa.OutputStore(str(tmp_path / "store"))
+    assert store.size()[0] == 4
+    diff = store.diff("previous", "latest")
+    assert diff == {'added': [], 'removed': [], 'changed': [], 'unchanged': 4}
+
+
+def test_materialize_and_diff_round_trip(ersa, generate, programs, tmp_path):
+    generate(programs, "run1")
+    edited = programs.assign(HT_1=programs['HT_1'].where(programs['Name'] != "BRD-3", 200.0))
+    generate(edited[edited['Name'] != "BRD-5"], "run2")
+    store = ersa.OutputStore(str(tmp_path / "store"))
+    first, second = store.runs()
+
+    for run_id, out in ((first, "run1"), (second, "run2")):
+        assert store.materialize(run_id, str(tmp_path / f"copy-{out}")) == len(store.load_run(run_id)['programs'])
+        assert files(tmp_path / f"copy-{out}") == files(tmp_path / out)
+    assert store.diff(first, second) == {'added': [], 'removed': ["BRD-5"], 'changed': ["BRD-3"], 'unchanged': 2}
+    assert store.size()[0] == 5
@@ -0,0 +1,45 @@
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from conftest import MAPPING, ZONE_PATHS
+
+pd = pytest.importorskip("pandas")
+np = pytest.importorskip("numpy")
+
+
+def test_parameter_search(ersa, template):
+    index = ersa.TemplateParameterIndex.from_file(template)
+    assert len(index) == 4 and "enmProg|enmHz|1|enmSngSoll" in index
+    assert index.datatype("enmProg|enmHz|1|enmSngSoll") == "Single"
+    # prefix matches first (case-insensitive), then substring matches
+    assert [index.paths[i] for i in index.search("ENMPROG|ENMHZ")] == \
+        ["enmProg|enmHz|1|enmSngSoll", "enmProg|enmHz|2|enmSngSoll"]
+    assert [index.paths[i] for i in index.search("SngSoll")][:1] == ["enmProg|enmA_AxBr|1|enmSngSoll"]
+    assert index.search("", limit=2) == [0, 1]
+
+
+def test_binding_texts(ersa):
+    cells = pd.Series(["yes", "0", "x", "maybe", None, " 12.5 ", "7"])
+    assert ersa.binding_texts(cells, "Boolean").tolist() == ["True", "False", "True", None, None, None, None]
+    assert ersa.binding_texts(cells, "Single").tolist() == [None, "0.0", None, None, None, "12.5", "7.0"]
+    assert ersa.binding_texts(cells, "Int32").tolist() == [None, "0", None, None, None, "12", "7"]
+    assert ersa.binding_texts(cells, "String").tolist() == ["yes", "0", "x", "maybe", None, "12.5", "7"]
+
+
+def test_custom_bindings_in_generation(ersa, template, programs, tmp_path):
+    logged = []
+    df = programs.assign(Override=[None, None, 250, None, None, "n/a"])
+    settings = {'template_path': template, 'output_dir': str(tmp_path / "out"), 'mapping': MAPPING,
+                'zone_paths': ZONE_PATHS, 'custom_bindings': {
+                    "enmProg|enmHz|2|enmSngSoll": "Override",     # blank cells keep the zone value
+                    "enmProg|enmMissing": "Override",             # not in the template
+                    "enmProg|enmHz|1|enmSngSoll": "NoSuchColumn"}}
+    ersa.ProgramGenerator(settings, log=lambda message, color=None: logged.append(message)).run(df)
+
+    def zone2(name):
+        root = ET.parse(tmp_path / "out" / f"{name}.xml").getroot()
+        return root.find("ProgramParameter[variable='enmProg|enmHz|2|enmSngSoll']/value").text
+    assert [zone2(name) for name in ("BRD-1", "BRD-3", "BRD-5")] == ["190.0", "250.0", "195.0"]
+    assert any("enmProg|enmMissing is not in the template" in message for message in logged)
+    assert any("column 'NoSuchColumn' not found" in message for message in logged)
@@ -0,0 +1,69 @@
+import json
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from conftest import MAPPING, ZONE_PATHS, quiet
+
+pd = pytest.importorskip("pandas")
+
+
+def contents(path):
+    """Everything but the run timestamps"""
+    return [(el.tag, el.text) for el in ET.parse(path).getroot().iter() if not el.tag.endswith('date')]
+
+
+@pytest.fixture
+def sheet(programs):
+    """The six programs plus more rows, so every partition has several"""
+    more = pd.DataFrame({'Name': [f"BRD-{i}" for i in range(6, 20)], 'L': range(300, 314),
+                         'W': range(100, 114), 'HT_1': 200.0, 'HT_2': 210.0})
+    return pd.concat([programs, more], ignore_index=True)
+
+
+@pytest.fixture
+def overrides(ersa, sheet):
+    store = ersa.ZoneOverrideStore()
+    editor = ersa.ZoneBulkEditor(store)
+    editor.apply(editor.evaluate("Heating_Top_Z2_Temp = 222 where PCB_Length > 305", sheet, MAPPING))
+    return store
+
+
+def test_split_run_merge_equals_sequential(ersa, template, sheet, overrides, tmp_path):
+    settings = {'template_path': template, 'mapping': MAPPING, 'zone_paths': ZONE_PATHS,
+                'output_layout': "Hash prefix", 'id_allocator': str(tmp_path / "ids.db")}
+    sequential = ersa.ProgramGenerator({**settings, 'id_allocator': None, 'output_dir': str(tmp_path / "seq"),
+                                        'metadata': {'programid_start': 50000, 'historyid_start': 70000}},
+                                       log=quiet, zone_overrides=overrides).run(sheet)
+
+    # the allocator starts at the typed values, so the block equals the sequential IDs
+    settings['metadata'] = {'programid_start': 50000, 'historyid_start': 70000}
+    manifests = ersa.write_partition_manifests(sheet, settings, 10, str(tmp_path / "jobs"),
+                                               zone_overrides=overrides, log=quiet)
+    assert len(manifests) == 10    # BRD-2 rows 2 and 4 land in different partitions
+    for manifest in reversed(manifests):    # order does not matter
+        ersa.run_partition(manifest, str(tmp_path / "results"), log=quiet)
+    merged = ersa.merge_partitions(str(tmp_path / "jobs"), str(tmp_path / "results"),
+                                   str(tmp_path / "merged"), log=quiet)
+
+    assert merged['program_index'] == {name: path.replace("\\", "/")
+                                       for name, path in sequential['program_index'].items()}
+    assert merged['duplicates'] == ["BRD-2"]
+    assert merged['skipped'] == sequential['skipped']
+    for path in merged['program_index'].values():
+        assert contents(tmp_path / "merged" / path) == contents(tmp_path / "seq" / path)
+    body = (tmp_path / "merged" / merged['program_index']["BRD-12"]).read_text(encoding='utf-8')
+    assert "<value>222.0</value>" in body
+
+
+def test_merge_rejects_incomplete_results(ersa, template, sheet, tmp_path):
+    settings = {'template_path': template, 'mapping': MAPPING, 'zone_paths': ZONE_PATHS}
+    manifests = ersa.write_partition_manifests(sheet, settings, 2, str(tmp_path / "jobs"), log=quiet)
+    ersa.run_partition(manifests[0], str(tmp_path / "results"), log=quiet)
+    with pytest.raises(ValueError, match="Missing results for partitions: 1"):
+        ersa.merge_partitions(str(tmp_path / "jobs"), str(tmp_path / "results"), str(tmp_path / "out"), log=quiet)
+
+    data = json.loads((tmp_path / "jobs" / "part_001.json").read_text())
+    (tmp_path / "jobs" / ("part_001." + data['data_file'].split(".")[-1])).write_bytes(b"tampered")
+    with pytest.raises(ValueError, match="does not match the manifest hash"):
+        ersa.run_partition(manifests[1], str(tmp_path / "results"), log=quiet)
@@ -0,0 +1,76 @@
+import time
+
+import pytest
+
+from conftest import MAPPING, ZONE_PATHS, quiet
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+
+def random_features(ersa, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    features = np.full((rows, len(ersa.SIMILARITY_FEATURES)), np.nan, dtype=np.float32)
+    features[:, :3] = rng.uniform(50, 400, (rows, 3))
+    features[:, 3:23] = rng.uniform(150, 260, (rows, 20))     # Heating_Top Z1..Z10 Temp/Conv
+    return features
+
+
+def brute_force(ersa, features, position, k):
+    """Reference: z-scored board and zone groups, each weighted by 1/sqrt(feature count)"""
+    present = ~np.all(np.isnan(features), axis=0)
+    data = features[:, present].astype(np.float64)
+    z = np.nan_to_num((data - np.nanmean(data, axis=0)) / np.nanstd(data, axis=0))
+    board = np.array([name in ersa.SIMILARITY_BOARD_FEATURES for name in ersa.SIMILARITY_FEATURES])[present]
+    z *= np.where(board, 1 / np.sqrt(board.sum()), 1 / np.sqrt((~board).sum()))
+    distances = np.sqrt(((z - z[position]) ** 2).sum(axis=1))
+    distances[position] = np.inf
+    return list(np.argsort(distances, kind='stable')[:k])
+
+
+def test_query_matches_brute_force(ersa):
+    features = random_features(ersa, 2000)
+    names = [f"P{i}" for i in range(len(features))]
+    index = ersa.ProgramSimilarityIndex()
+    index.set_source('workbook', names, list(range(1, len(names) + 1)), features)
+    for position in (0, 17, 1999):
+        matches = index.query_program('workbook', position, k=5)
+        assert list(matches['Program']) == [names[i] for i in brute_force(ersa, features, position, 5)]
+        assert matches['Distance'].is_monotonic_increasing
+        assert names[position] not in set(matches['Program'])
+
+    # an exact copy of a program is its nearest neighbour at distance 0
+    top = index.query(features[42], k=1)
+    assert list(top['Program']) == ["P42"] and top['Distance'][0] == 0
+
+
+def test_sources_and_incremental_rebuild(ersa, programs, template, tmp_path):
+    settings = {'template_path': template, 'output_dir': str(tmp_path / "out"), 'mapping': MAPPING,
+                'zone_paths': ZONE_PATHS, 'catalog': str(tmp_path / "catalog.db")}
+    ersa.ProgramGenerator(settings, log=quiet).run(programs)
+
+    names, features = ersa.workbook_features(programs, MAPPING)
+    index = ersa.ProgramSimilarityIndex()
+    assert index.set_source('workbook', names, list(programs.index + 1), features)
+    assert not index.set_source('workbook', names, list(programs.index + 1), features.copy())
+    library = ersa.catalog_features(str(tmp_path / "catalog.db"))
+    assert sorted(library[0]) == ["BRD-1", "BRD-2", "BRD-3", "BRD-5"]
+    index.set_source('library', *library)
+    assert len(index) == 10
+
+    matches = index.query_program('workbook', 2, k=3)    # BRD-3
+    assert matches.iloc[0][['Source', 'Program', 'Distance']].tolist() == ['library', "BRD-3", 0]
+    assert set(matches['Source']) <= {'workbook', 'library'}
+
+
+def test_query_speed_over_100k_programs(ersa):
+    features = random_features(ersa, 100_000, seed=1)
+    index = ersa.ProgramSimilarityIndex()
+    index.set_source('workbook', range(len(features)), range(len(features)), features)
+    index.build()
+    timings = []
+    for position in range(5):
+        start = time.perf_counter()
+        index.query_program('workbook', position)
+        timings.append(time.perf_counter() - start)
+    assert sorted(timings)[2] < 0.2
@@ -0,0 +1,36 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT, SCRIPT
+
+HEAVY_MODULES = ('pandas', 'numpy', 'openpyxl')
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import ERSA_Program_Generator as ersa
+print(json.dumps({'ms': (time.perf_counter() - start) * 1000, 'budget': ersa.STARTUP_BUDGET_MS,
+                  'heavy': [name for name in %r if name in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def test_import_within_budget_without_heavy_modules():
+    result = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=ROOT,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    probe = json.loads(result.stdout.strip().splitlines()[-1])
+    assert probe['heavy'] == []
+    assert probe['ms'] < probe['budget']
+
+
+@pytest.mark.skipif(sys.platform.startswith('linux') and not os.environ.get('DISPLAY'),
+                    reason="needs a display for the Tk window")
+def test_window_startup_check(tmp_path):
+    result = subprocess.run([sys.executable, SCRIPT, "--startup-check"], cwd=tmp_path,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "Heavy modules" not in result.stdout
@@ -0,0 +1,41 @@
+import gzip
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from conftest import MAPPING, ZONE_PATHS, quiet
+
+pd = pytest.importorskip("pandas")
+
+
+def contents(element):
+    return [(el.tag, el.text) for el in element.iter() if not el.tag.endswith('date')]
+
+
+def generate(ersa, template, programs, out, mode):
+    write_files, export = ersa.EXPORT_MODES[mode]
+    settings = {'template_path': template, 'output_dir': str(out), 'mapping': MAPPING,
+                'zone_paths': ZONE_PATHS, 'write_files': write_files, 'stream_export': export}
+    return ersa.ProgramGenerator(settings, log=quiet).run(programs)
+
+
+def test_gzip_export_matches_program_files(ersa, template, programs, tmp_path):
+    generate(ersa, template, programs, tmp_path, "Files + combined XML (gzip)")
+    with gzip.open(tmp_path / (ersa.EXPORT_FILE + ".gz"), 'rb') as f:
+        root = ET.parse(f).getroot()
+    assert root.tag == ersa.EXPORT_ROOT_TAG
+    programs_out = list(root)
+    # every generated row in row order, including BRD-2's overwritten first row
+    names = [program.find('SolderingPrograms/name').text for program in programs_out]
+    assert names == ["BRD-1", "BRD-2", "BRD-3", "BRD-2", "BRD-5"]
+    for program, name in zip(programs_out[2:], names[2:]):
+        assert contents(program) == contents(ET.parse(tmp_path / f"{name}.xml").getroot())
+
+
+def test_export_only_writes_no_program_files(ersa, template, programs, tmp_path):
+    result = generate(ersa, template, programs, tmp_path / "out", "Combined XML")
+    assert result['success_count'] == 5
+    assert [path.name for path in (tmp_path / "out").iterdir()] == [ersa.EXPORT_FILE]
+    root = ET.parse(tmp_path / "out" / ersa.EXPORT_FILE).getroot()
+    values = [p.find("ProgramParameter[variable='enmProg|enmHz|2|enmSngSoll']/value").text for p in root]
+    assert values == ["190.0", "191.0", "192.0", "193.0", "195.0"]
@@ -0,0 +1,40 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+
+def random_programs(ersa, n, seed=0):
+    rng = np.random.default_rng(seed)
+    zones = np.full((n, len(ersa.ZONE_SLOTS), len(ersa.ZONE_PARAMS)), np.nan, dtype=np.float32)
+    heating = ersa._zone_slots("Heating_Top") + ersa._zone_slots("Heating_Bottom")
+    cooling = ersa._zone_slots("Cooling_Top") + ersa._zone_slots("Cooling_Bottom")
+    zones[:, heating, 0] = rng.uniform(120, 280, (n, len(heating)))
+    zones[:, cooling, 0] = rng.uniform(20, 80, (n, len(cooling)))
+    zones[:, :, 3] = rng.uniform(0, 100, (n, len(ersa.ZONE_SLOTS)))
+    return zones, rng.uniform(50, 400, n), rng.uniform(50, 300, n)
+
+
+def test_block_equals_per_row(ersa, monkeypatch):
+    zones, length, width = random_programs(ersa, 12)
+    length[3] = np.nan    # an invalid row must not shift its neighbours
+    monkeypatch.setattr(ersa, "PROFILE_BLOCK_ROWS", 5)
+    block = ersa.estimate_thermal_profiles(zones, length, width)
+
+    for i in range(len(length)):
+        row = ersa.estimate_thermal_profiles(zones[i:i + 1], length[i:i + 1], width[i:i + 1])
+        expected = row.iloc[0]
+        actual = block.iloc[i]
+        if i == 3:
+            assert np.isnan(actual['Peak_C']) and actual['Flag'] == expected['Flag']
+            continue
+        assert actual[['Peak_C', 'TAL_s', 'Time_To_Peak_s', 'Max_Ramp_K_s']].tolist() == pytest.approx(
+            expected[['Peak_C', 'TAL_s', 'Time_To_Peak_s', 'Max_Ramp_K_s']].tolist())
+
+
+def test_profiles_stay_physical(ersa):
+    zones, length, width = random_programs(ersa, 500, seed=1)
+    report = ersa.estimate_thermal_profiles(zones, length, width)
+    hottest = np.nanmax(zones[:, :, 0], axis=1)
+    assert (report['Peak_C'] <= hottest + 0.1).all()
+    assert (report['Peak_C'] > ersa.DEFAULT_THERMAL_PROFILE['ambient_c']).all()
+    assert report['Max_Ramp_K_s'].max() < 20
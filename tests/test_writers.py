@@ -0,0 +1,38 @@
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from conftest import MAPPING, ZONE_PATHS, quiet
+
+pd = pytest.importorskip("pandas")
+
+
+def contents(path):
+    """Everything but the run timestamps"""
+    root = ET.parse(path).getroot()
+    return [(el.tag, el.text) for el in root.iter() if not el.tag.endswith('date')]
+
+
+def generate(ersa, template, df, out, writers):
+    settings = {'template_path': template, 'output_dir': str(out), 'mapping': MAPPING,
+                'zone_paths': ZONE_PATHS, 'writer_threads': writers, 'verify': True}
+    return ersa.ProgramGenerator(settings, log=quiet).run(df)
+
+
+def test_duplicate_names_with_several_writers(ersa, template, programs, tmp_path):
+    # Many rows sharing a few names: the last row for each name must win on disk
+    df = pd.concat([programs.dropna()] * 50, ignore_index=True)
+    df['HT_1'] = range(len(df))
+    last = df.drop_duplicates('Name', keep='last').set_index('Name')['HT_1']
+    one = generate(ersa, template, df, tmp_path / "one", 1)
+    many = generate(ersa, template, df, tmp_path / "many", 4)
+
+    assert one['verify_failures'] == [] and many['verify_failures'] == []
+    names = sorted(p.name for p in (tmp_path / "one").glob("*.xml"))
+    assert names == sorted(p.name for p in (tmp_path / "many").glob("*.xml"))
+    assert len(names) == df['Name'].nunique()
+    for name in names:
+        assert contents(tmp_path / "one" / name) == contents(tmp_path / "many" / name)
+        root = ET.parse(tmp_path / "many" / name).getroot()
+        heating = {p.find('variable').text: p.find('value').text for p in root.iter('ProgramParameter')}
+        assert float(heating["enmProg|enmHz|1|enmSngSoll"]) == last[name[:-len(".xml")]]